@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Headless acquisition engine (no PyQt / pyqtgraph)
+- Stream sources: TCPSource (Rust backend :8083) and ReplaySource (recorded CSV)
+- AcquisitionEngine owns buffers, session recording, sample counters and
+  START/STOP commands; consumers attach callbacks or iterate blocks
+- CLI: record sessions on a display-less lab server
+
+Usage:
+    python acquisition.py --name "bawang merah 2" --start --until-done
+    python acquisition.py --replay "data/bawang merah 2_20251125_152528.csv" --speed 0 --name test
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from command_channel import CommandChannel
+from features import FeatureExtractor
+from filters import FilterChain
+from lod import MinMaxPyramid
+from replay import iter_stamped_batches, load_session_csv
+from resample import StreamingResampler
+from running_stats import RunningStats
+from ringbuffer import BUFFER_FIELDS, SensorRingBuffer
+from sensor_protocol import (FSM_STATES, LineFramer, ParseStats, ReceiveClock, SensorBlock,
+                             parse_sensor_lines)
+from session_recorder import CSV_FIELDS, SessionRecorder, export_session_json
+
+# ===== BACKEND CONFIGURATION =====
+TCP_DATA_HOST = "127.0.0.1"
+TCP_DATA_PORT = 8083
+TCP_CMD_HOST = "127.0.0.1"
+TCP_CMD_PORT = 8082
+
+
+# ===== STREAM SOURCES =====
+class TCPSource:
+    """
+    Stream SENSOR: dari backend Rust dengan reconnect otomatis.
+
+    line_batches(stop) menghasilkan (lines, stamps) per batch: baris
+    dikumpulkan sampai batch_interval detik atau batch_max baris.
+    batch_interval = 0 berarti setiap recv langsung dikirim.
+    """
+
+    def __init__(self, host=TCP_DATA_HOST, port=TCP_DATA_PORT, batch_interval=0.05,
+                 batch_max=256, retry_delay=2.0):
+        self.host = host
+        self.port = port
+        self.batch_interval = batch_interval
+        self.batch_max = max(1, batch_max)
+        self.retry_delay = retry_delay
+        self.stats = ParseStats()
+        self.on_status = None  # callable(str)
+
+    def _status(self, message):
+        if self.on_status is not None:
+            self.on_status(message)
+
+    def line_batches(self, stop):
+        addr = f"{self.host}:{self.port}"
+        self._status(f"📡 Connecting to Rust: {addr}...")
+        while not stop.is_set():
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=self.retry_delay)
+            except ConnectionRefusedError:
+                self._status(f"⚠️ Cannot connect to Rust. Make sure backend is running on {addr}")
+                stop.wait(self.retry_delay)
+                continue
+            except OSError as e:
+                self._status(f"⚠️ Connection error: {e}")
+                stop.wait(self.retry_delay)
+                continue
+
+            self._status(f"🟢 Connected to Rust: {addr}")
+            try:
+                with sock:
+                    yield from self._read(sock, stop)
+            except OSError as e:
+                self._status(f"⚠️ Connection error: {e}")
+                stop.wait(self.retry_delay)
+
+    def _read(self, sock, stop):
+        sock.settimeout(self.batch_interval or 0.5)
+        framer = LineFramer(stats=self.stats)
+        clock = ReceiveClock()
+        pending = []
+        stamps = []
+        last_flush = time.monotonic()
+
+        while not stop.is_set():
+            try:
+                if not framer.recv_from(sock):
+                    break
+                lines = framer.pop_lines()
+                if lines:
+                    pending.extend(lines)
+                    stamps.extend(clock.stamps(len(lines)))
+            except socket.timeout:
+                pass
+
+            now = time.monotonic()
+            if pending and (len(pending) >= self.batch_max
+                            or now - last_flush >= self.batch_interval):
+                yield pending, stamps
+                pending, stamps = [], []
+                last_flush = now
+
+        if pending:
+            yield pending, stamps
+
+    def blocks(self, stop):
+        """Generator SensorBlock (sudah di-parse, record rusak ditandai valid=False)"""
+        for lines, stamps in self.line_batches(stop):
+            block = parse_sensor_lines(lines, stamps, stats=self.stats)
+            if len(block):
+                yield block
+
+
+class ReplaySource(TCPSource):
+    """
+    Stream dari CSV rekaman dengan timing asli (speed <= 0 = secepat mungkin).
+    Stamp per baris = timestamp rekaman digeser ke awal replay.
+    """
+
+    def __init__(self, csv_path, speed=1.0, loop=False, batch_interval=0.05, batch_max=256):
+        super().__init__(batch_interval=batch_interval, batch_max=batch_max)
+        self.csv_path = csv_path
+        self.speed = speed
+        self.loop = loop
+
+    def line_batches(self, stop):
+        name = os.path.basename(self.csv_path)
+        columns = load_session_csv(self.csv_path)
+        speed = f"{self.speed:g}x" if self.speed > 0 else "max speed"
+        self._status(f"🟢 Connected to replay: {name} ({speed})")
+        for lines, stamps in iter_stamped_batches(columns, self.speed, self.batch_interval or 0.05,
+                                                  self.batch_max, self.loop):
+            if stop.is_set():
+                return
+            self.stats.lines += len(lines)
+            yield lines, stamps
+        self._status(f"✅ Replay finished: {name}")
+
+
+# ===== ACQUISITION ENGINE =====
+FEATURE_SOURCES = ("smoothed", "filtered", "raw")   # input FeatureExtractor saat filters aktif
+
+
+class AcquisitionEngine:
+    """
+    Inti akuisisi tanpa GUI: buffer live, journal sesi, counter, dan command.
+    Command dikirim lewat CommandChannel persisten; ack dicocokkan dengan
+    kolom state pada setiap blok yang di-ingest.
+
+    ingest()/ingest_sample() harus dipanggil dari satu thread saja (thread
+    GUI, atau thread run() pada mode headless). Listener dipanggil setelah
+    setiap blok masuk: listener(block). ingest() = record() + update_views().
+    record() harus lossless: journal, counter, ack, dan semua akumulator
+    sesi (resampler, filter, LOD, fitur, statistik). update_views() hanya
+    menulis ring buffer + listener, jadi GUI boleh membuang blok di jalur
+    tampilan saat tertinggal: plot berlubang, statistik dan fitur tetap utuh.
+
+    Dengan resample_ms, journal dan ack command tetap memakai sampel mentah,
+    sedangkan buffer, LOD dan fitur menerima deret grid tetap (+ field gap).
+
+    Dengan filters (spec string / FilterChain), deret terfilter disimpan di
+    `filtered` / `filtered_lod` di samping buffer mentah. features_on memilih
+    deret untuk FeatureExtractor: "smoothed" (default; median / EMA tanpa
+    stage baseline, karena extractor menghitung baseline sendiri per siklus
+    dan fitur `baseline` akan menjadi ~0), "filtered" atau "raw".
+    """
+
+    def __init__(self, source=None, data_dir="data", maxlen=200, lod=False,
+                 cmd_host=TCP_CMD_HOST, cmd_port=TCP_CMD_PORT, cmd_timeout=2.0,
+                 resample_ms=None, resample_method="linear", filters=None, features_on="smoothed"):
+        self.source = source
+        self.data_dir = data_dir
+        self.resampler = StreamingResampler(resample_ms, resample_method) if resample_ms else None
+        fields = BUFFER_FIELDS + ("gap",) if self.resampler is not None else BUFFER_FIELDS
+        self.buffers = SensorRingBuffer(maxlen=maxlen, fields=fields)
+        self.lod = MinMaxPyramid() if lod else None
+        self.filters = FilterChain(filters) if isinstance(filters, str) else filters
+        self.filtered = SensorRingBuffer(maxlen=maxlen, fields=fields) if self.filters is not None else None
+        self.filtered_lod = MinMaxPyramid() if lod and self.filters is not None else None
+        if features_on not in FEATURE_SOURCES:
+            raise ValueError(f"Unknown feature source: {features_on!r} (expected one of {FEATURE_SOURCES})")
+        self.features_on = features_on
+        self.recorder = SessionRecorder(data_dir)
+        self.features = FeatureExtractor()   # fitur per siklus FSM (per level)
+        self.running_stats = RunningStats()  # mean / std / min / max / drift per scope
+        self.cmd_host = cmd_host
+        self.cmd_port = cmd_port
+        self.cmd_timeout = cmd_timeout
+        self.commands = CommandChannel(cmd_host, cmd_port, connect_timeout=cmd_timeout)
+        self.sample_count = 0
+        self.malformed_count = 0
+        self.closed = False
+        self.on_status = None  # callable(str)
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def stats(self):
+        return self.source.stats if self.source is not None else None
+
+    def _status(self, message):
+        if self.on_status is not None:
+            self.on_status(message)
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    # ----- ingest -----
+    def ingest(self, block):
+        """Masukkan satu SensorBlock ke journal, buffer dan LOD. Return jumlah sampel valid"""
+        block = self.record(block)
+        return self.update_views(block) if block is not None else 0
+
+    def record(self, block):
+        """
+        Jalur rekaman (lossless): journal, counter sampel, ack command dan
+        akumulator sesi. Deret tampilan disimpan di block.view untuk
+        update_views(). Return blok valid (None jika kosong)
+        """
+        if self.closed:
+            return None
+        self.malformed_count += block.malformed
+        valid = block.compress()
+        n = len(valid)
+        if not n:
+            return None
+        self.recorder.append_block(valid)
+        self.sample_count += n
+        self.commands.observe(valid)
+        block.view = valid.view = self._accumulate(valid)
+        return valid
+
+    def update_views(self, block):
+        """Jalur tampilan (boleh dilewati): ring buffer + listener. Return jumlah sampel"""
+        if self.closed or block.view is None:
+            return 0
+        block = block.compress()
+        self._show(*block.view)
+        for callback in self._listeners:
+            callback(block)
+        return len(block)
+
+    def ingest_sample(self, data):
+        """Masukkan satu sampel dict (jalur legacy per-baris)"""
+        if self.closed:
+            return
+        row = {key: data.get(key) for key in CSV_FIELDS}
+        row["timestamp"] = data.get("timestamp", int(time.time() * 1000))
+        self.recorder.append(row)
+        self.sample_count += 1
+        block = SensorBlock({key: np.array([value], dtype=np.float64) for key, value in row.items()})
+        if np.isfinite(block["state"]).all():
+            self.commands.observe(block)
+        if self.resampler is not None or self.filters is not None:
+            self._show(*self._accumulate(block))
+            return
+        self.buffers.append(data)
+        if self.lod is not None:
+            self.lod.append(data)
+        columns = {key: np.array([value]) for key, value in data.items()}
+        self.features.update(columns)
+        self.running_stats.update(columns)
+
+    def _accumulate(self, block):
+        """
+        Akumulator sesi (jalur rekaman): resampler, filter, LOD, fitur dan
+        statistik. Return (blok tampilan, kolom terfilter / None)
+        """
+        if self.resampler is not None:
+            block = SensorBlock(self.resampler.process(block))
+        n = len(block)
+        if not n:
+            return block, None
+        if self.lod is not None:
+            self.lod.extend(block.columns, n)
+        feature_input = block
+        filtered = None
+        if self.filters is not None:
+            filtered, smoothed = self.filters.process(block, smoothed=True)
+            if self.filtered_lod is not None:
+                self.filtered_lod.extend(filtered, n)
+            if self.features_on != "raw":
+                feature_input = smoothed if self.features_on == "smoothed" else filtered
+        self.features.update(feature_input)
+        self.running_stats.update(block)
+        return block, filtered
+
+    def _show(self, block, filtered):
+        """Ring buffer live (mentah + terfilter) dari hasil _accumulate"""
+        n = len(block)
+        if not n:
+            return
+        self.buffers.extend(block.columns, n)
+        if filtered is not None:
+            self.filtered.extend(filtered, n)
+
+    def reset(self):
+        """Kosongkan buffer live + counter (journal tidak disentuh)"""
+        self.buffers.clear()
+        if self.lod is not None:
+            self.lod.clear()
+        self.features.reset()
+        self.running_stats.reset()
+        if self.resampler is not None:
+            self.resampler.reset()
+        if self.filters is not None:
+            self.filters.reset()
+            self.filtered.clear()
+            if self.filtered_lod is not None:
+                self.filtered_lod.clear()
+        self.sample_count = 0
+
+    def clear(self):
+        """Buang sesi aktif (journal dihapus) dan kosongkan buffer"""
+        self.recorder.discard()
+        self.reset()
+
+    # ----- stream -----
+    def blocks(self):
+        """Iterasi blok mentah dari source (tanpa ingest)"""
+        return self.source.blocks(self._stop)
+
+    def run(self):
+        """Loop blocking: baca source dan ingest sampai stop()"""
+        for block in self.blocks():
+            self.ingest(block)
+
+    def start(self):
+        """Jalankan run() di background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="AcquisitionEngine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Hentikan run() dan tunggu thread selesai"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def request_stop(self):
+        """Minta run() berhenti tanpa menunggu (untuk listener / signal handler)"""
+        self._stop.set()
+
+    def is_running(self):
+        """True selama thread start() masih jalan dan belum diminta berhenti"""
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def wait(self, timeout=None):
+        """Tunggu sampai stream selesai atau diminta berhenti. Return True jika sudah berhenti"""
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        return not self.is_running()
+
+    def close(self):
+        """Stop stream, flush journal (tetap bisa di-recover). Blok berikutnya diabaikan"""
+        self.closed = True
+        self.stop()
+        self.commands.stop()
+        self.recorder.close()
+
+    # ----- commands -----
+    def send_command(self, cmd):
+        """Kirim command ke backend (port 8082) dan tunggu terkirim. Return True jika terkirim"""
+        result = self.commands.send(cmd)
+        if not result.wait_sent(self.cmd_timeout * 2 + self.commands.retry_delay):
+            self._status(f"⚠️ Command error: {result.error or 'timeout'}")
+            return False
+        return True
+
+    def begin_session(self):
+        """Kosongkan buffer dan mulai journal baru"""
+        self.reset()
+        self.recorder.start()
+
+    def start_sampling(self):
+        """START_SAMPLING + mulai journal baru"""
+        if not self.send_command("START_SAMPLING"):
+            return False
+        self.begin_session()
+        return True
+
+    def stop_sampling(self):
+        return self.send_command("STOP_SAMPLING")
+
+    # ----- save -----
+    def save(self, sample_name, stamp=None):
+        """Finalize journal ke data_dir/<sample_name>_<stamp>.csv. Return (path, rows)"""
+        stamp = stamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        rows = self.recorder.rows
+        path = self.recorder.finalize(os.path.join(self.data_dir, f"{sample_name}_{stamp}.csv"))
+        return path, rows
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Headless E-Nose session recorder")
+    parser.add_argument("--name", default="Unknown", help="sample name (file prefix)")
+    parser.add_argument("--label", default="", help="label stored in the JSON export")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--host", default=TCP_DATA_HOST)
+    parser.add_argument("--port", type=int, default=TCP_DATA_PORT)
+    parser.add_argument("--cmd-host", default=TCP_CMD_HOST)
+    parser.add_argument("--cmd-port", type=int, default=TCP_CMD_PORT)
+    parser.add_argument("--replay", metavar="CSV", help="record from a recorded CSV instead of TCP")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (0 = max)")
+    parser.add_argument("--start", action="store_true", help="send START_SAMPLING first (STOP at the end)")
+    parser.add_argument("--duration", type=float, default=0, help="stop after N seconds (0 = no limit)")
+    parser.add_argument("--until-done", action="store_true", help="stop when the FSM reaches DONE")
+    parser.add_argument("--json", action="store_true", help="also export the columnar JSON")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    if args.replay:
+        source = ReplaySource(args.replay, args.speed)
+    else:
+        source = TCPSource(args.host, args.port)
+    engine = AcquisitionEngine(source, args.data_dir, cmd_host=args.cmd_host, cmd_port=args.cmd_port)
+    if not args.quiet:
+        source.on_status = print
+        engine.on_status = print
+
+    done_state = FSM_STATES.index("DONE")
+    last_report = [time.monotonic(), 0]
+    running = [False]  # FSM sudah keluar dari IDLE/DONE
+
+    def on_block(block):
+        state = block["state"]
+        running[0] = running[0] or bool(((state > 0) & (state < done_state)).any())
+        if args.until_done and running[0] and state[-1] == done_state:
+            engine.request_stop()
+        now = time.monotonic()
+        if not args.quiet and now - last_report[0] >= 5.0:
+            rate = (engine.sample_count - last_report[1]) / (now - last_report[0])
+            state = FSM_STATES[int(block["state"][-1]) % len(FSM_STATES)]
+            print(f"📊 {engine.sample_count} samples ({rate:.1f}/s) | {state} | "
+                  f"level {int(block['level'][-1]) + 1} | malformed {engine.malformed_count}")
+            last_report[:] = [now, engine.sample_count]
+
+    engine.add_listener(on_block)
+    if not args.quiet:
+        engine.features.on_cycle = lambda c: print(
+            f"🧪 Level {c.level + 1} cycle done ({c.samples} samples)")
+    signal.signal(signal.SIGINT, lambda *_: engine.request_stop())
+
+    if args.start and not engine.start_sampling():
+        print(f"❌ Failed to send START_SAMPLING to {args.cmd_host}:{args.cmd_port}")
+        return 1
+    if not engine.recorder.active:
+        engine.recorder.start()
+
+    engine.start()
+    deadline = time.monotonic() + args.duration if args.duration > 0 else None
+    while not engine.wait(0.2):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+    engine.stop()
+
+    if args.start:
+        engine.stop_sampling()
+
+    if not engine.recorder.rows:
+        print("⚠️ No data recorded")
+        engine.clear()
+        return 1
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_path, rows = engine.save(args.name, stamp)
+    print(f"💾 Saved {rows} samples -> {csv_path}")
+    if args.json:
+        json_path = csv_path[:-4] + ".json"
+        export_session_json(csv_path, json_path, {
+            "sample_name": args.name,
+            "ei_label": args.label,
+            "timestamp": stamp,
+            "total_samples": rows,
+        })
+        print(f"💾 JSON -> {json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
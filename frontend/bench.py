@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Benchmark suite for the ingest-to-pixel hot path
+- parse:   parse_sensor_data (per line) vs parse_sensor_lines (bulk)
+- ingest:  on_data_update / on_block_update cost vs ring-buffer size
+- plot:    update_plot frame time (grid / combined, dirty / idle)
+- export:  journal finalize + JSON export time vs session length
+- stream:  end-to-end synthetic streams 4 Hz .. 10 kHz + recorded sessions
+
+Runs headless (offscreen Qt) and writes machine-readable JSON.
+
+Usage:
+    python bench.py                       # full suite, table on stdout
+    python bench.py --quick --json bench.json
+    python bench.py --only parse,stream
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt6 import QtWidgets
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from handoff import HandoffQueue
+from replay import load_session_csv
+from sensor_protocol import format_sensor_lines, parse_sensor_data, parse_sensor_lines
+from render_scheduler import RENDER_MAX_FPS
+from ringbuffer import SENSOR_CHANNELS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RECORDED_GLOBS = [
+    os.path.join(HERE, "data", "*.csv"),
+    os.path.join(HERE, "..", "data_CSV_dan_JSON", "*.csv"),
+]
+STREAM_RATES = (4, 40, 400, 1000, 4000, 10000)   # Hz (4 Hz = Arduino 250 ms)
+BATCH_INTERVAL = 0.05                            # s, sama dengan RX_BATCH_INTERVAL_MS
+FRAME_INTERVAL = 1.0 / RENDER_MAX_FPS             # s, frame tercepat RenderScheduler
+
+
+# ===== HELPERS =====
+def synthetic_columns(n, seed=0):
+    """Random walk untuk 7 channel + state/level seperti FSM"""
+    rng = np.random.default_rng(seed)
+    cols = {name: np.abs(10 + np.cumsum(rng.normal(0, 0.1, n))) for name in SENSOR_CHANNELS}
+    cols["state"] = (np.arange(n) // 200) % 7
+    cols["level"] = (np.arange(n) // 1400) % 5
+    cols["timestamp"] = np.arange(n) * 250.0
+    return cols
+
+
+def synthetic_lines(n, seed=0):
+    return format_sensor_lines(synthetic_columns(n, seed))
+
+
+def recorded_lines():
+    files = sorted(f for pattern in RECORDED_GLOBS for f in glob.glob(pattern))
+    return {os.path.basename(f): format_sensor_lines(load_session_csv(f)) for f in files}
+
+
+def timed(fn, repeat=3):
+    """Waktu terbaik dari `repeat` kali (detik)"""
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+class IdleReceiver(QObject):
+    """Pengganti receiver yang tidak pernah mengirim data (bench menyuntik sendiri)"""
+    ready = pyqtSignal()
+    status_changed = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.record_queue = HandoffQueue()
+        self.display_queue = HandoffQueue()
+
+    def run(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def make_window():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([sys.argv[0]])
+    import main
+    window = main.MainWindow(receiver=IdleReceiver())
+    window.scheduler.render = lambda: None  # bench memanggil update_plot sendiri
+    window.show()
+    app.processEvents()
+    return app, window
+
+
+def reset_window(window, maxlen):
+    window.engine.clear()
+    window.buffers.maxlen = maxlen
+
+
+# ===== STAGES =====
+def bench_parse(quick):
+    results = []
+    lines = synthetic_lines(20000 if quick else 100000)
+    str_lines = [line.decode() for line in lines]
+    n = len(lines)
+
+    t = timed(lambda: [parse_sensor_data(line) for line in str_lines[:n // 10]], 1) * 10
+    results.append({"stage": "parse", "impl": "parse_sensor_data", "samples": n,
+                    "seconds": t, "samples_per_s": n / t})
+    for batch in (1, 16, 256, 4096):
+        def run():
+            for i in range(0, n, batch):
+                parse_sensor_lines(lines[i:i + batch], 0.0)
+        t = timed(run, 1 if batch == 1 else 3)
+        results.append({"stage": "parse", "impl": "parse_sensor_lines", "batch": batch,
+                        "samples": n, "seconds": t, "samples_per_s": n / t})
+    return results
+
+
+def bench_ingest(window, quick):
+    results = []
+    n = 2000 if quick else 10000
+    lines = synthetic_lines(n)
+    samples = [parse_sensor_data(line.decode()) for line in lines]
+    blocks = [parse_sensor_lines(lines[i:i + 256], 0.0) for i in range(0, n, 256)]
+    sizes = (200, 10000, 100000) if quick else (200, 10000, 100000, 1000000)
+    for maxlen in sizes:
+        reset_window(window, maxlen)
+
+        def per_sample():
+            for s in samples:
+                window.on_data_update(s)
+        t = timed(per_sample, 1)
+        results.append({"stage": "ingest", "impl": "on_data_update", "maxlen": maxlen,
+                        "samples": n, "seconds": t, "us_per_sample": t / n * 1e6})
+
+        reset_window(window, maxlen)
+
+        def per_block():
+            for b in blocks:
+                window.on_block_update(b)
+        t = timed(per_block, 1)
+        results.append({"stage": "ingest", "impl": "on_block_update", "maxlen": maxlen,
+                        "samples": n, "seconds": t, "us_per_sample": t / n * 1e6})
+    reset_window(window, 200)
+    return results
+
+
+def bench_plot(app, window, quick):
+    results = []
+    frames = 10 if quick else 30
+    sizes = (200, 10000) if quick else (200, 10000, 100000)
+    block = parse_sensor_lines(synthetic_lines(20), 0.0)
+    for maxlen in sizes:
+        reset_window(window, maxlen)
+        window.buffers.extend(synthetic_columns(maxlen), maxlen)
+        for tab, view in ((0, "grid"), (1, "combined")):
+            window.tabs.setCurrentIndex(tab)
+            app.processEvents()
+            for mode in ("dirty", "idle"):
+                times = []
+                for _ in range(frames):
+                    if mode == "dirty":
+                        window.buffers.extend(block.columns, len(block))
+                    t = time.perf_counter()
+                    window.update_plot()
+                    app.processEvents()  # paint
+                    times.append(time.perf_counter() - t)
+                results.append({"stage": "plot", "view": view, "mode": mode, "maxlen": maxlen,
+                                "frames": frames, "ms_per_frame_p50": 1e3 * float(np.median(times)),
+                                "ms_per_frame_max": 1e3 * max(times)})
+    window.tabs.setCurrentIndex(0)
+    reset_window(window, 200)
+    return results
+
+
+def bench_export(quick):
+    from session_recorder import SessionRecorder, export_session_json
+    results = []
+    sizes = (1000, 10000) if quick else (1000, 10000, 100000, 500000)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            lines = synthetic_lines(n)
+            blocks = [parse_sensor_lines(lines[i:i + 256], 0.0) for i in range(0, n, 256)]
+            rec = SessionRecorder(tmp)
+            t = time.perf_counter()
+            for b in blocks:
+                rec.append_block(b)
+            t_append = time.perf_counter() - t
+            csv_path = os.path.join(tmp, f"s{n}.csv")
+            t = time.perf_counter()
+            rec.finalize(csv_path)
+            t_finalize = time.perf_counter() - t
+            t_json = timed(lambda: export_session_json(csv_path, os.path.join(tmp, f"s{n}.json"),
+                                                       {"total_samples": n}), 1)
+            results.append({"stage": "export", "samples": n, "append_s": t_append,
+                            "finalize_s": t_finalize, "json_s": t_json,
+                            "csv_bytes": os.path.getsize(csv_path),
+                            "json_bytes": os.path.getsize(os.path.join(tmp, f"s{n}.json"))})
+    return results
+
+
+def run_stream(app, window, lines, rate, n=None):
+    """
+    Simulasi stream: baris dikirim per BATCH_INTERVAL (waktu stream), frame
+    tiap FRAME_INTERVAL. load = waktu CPU / waktu stream (< 1 = sanggup).
+    """
+    reset_window(window, 200)
+    n = len(lines) if n is None else min(len(lines), n)
+    per_batch = max(1, int(round(rate * BATCH_INTERVAL)))
+    t_parse = t_ingest = t_plot = 0.0
+    frames = 0
+    next_frame = 0.0
+    for i in range(0, n, per_batch):
+        sim_t = i / rate
+        t0 = time.perf_counter()
+        block = parse_sensor_lines(lines[i:i + per_batch], sim_t * 1000.0)
+        t1 = time.perf_counter()
+        window.on_block_update(block)
+        t2 = time.perf_counter()
+        t_parse += t1 - t0
+        t_ingest += t2 - t1
+        while sim_t >= next_frame:
+            t3 = time.perf_counter()
+            window.update_plot()
+            app.processEvents()
+            t_plot += time.perf_counter() - t3
+            frames += 1
+            next_frame += FRAME_INTERVAL
+    stream_s = n / rate
+    busy = t_parse + t_ingest + t_plot
+    return {"samples": n, "rate_hz": rate, "stream_s": stream_s, "frames": frames,
+            "parse_s": t_parse, "ingest_s": t_ingest, "plot_s": t_plot,
+            "load": busy / stream_s if stream_s else 0.0,
+            "max_rate_hz": n / busy if busy else float("inf")}
+
+
+def bench_stream(app, window, quick):
+    results = []
+    duration = 2.0 if quick else 10.0
+    lines = synthetic_lines(int(max(STREAM_RATES) * duration))
+    for rate in STREAM_RATES:
+        # Rate rendah: simulasi minimal 10 s waktu stream (biaya didominasi frame)
+        r = run_stream(app, window, lines, rate, int(rate * max(duration, 10.0)))
+        r.update({"stage": "stream", "source": "synthetic"})
+        results.append(r)
+    for name, rec_lines in recorded_lines().items():
+        r = run_stream(app, window, rec_lines, 1000)
+        r.update({"stage": "stream", "source": name})
+        results.append(r)
+        if quick:
+            break
+    reset_window(window, 200)
+    return results
+
+
+# ===== REPORT =====
+def print_table(results):
+    for r in results:
+        items = [f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}"
+                 for k, v in r.items() if k != "stage"]
+        print(f"[{r['stage']:>6}] " + "  ".join(items))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="E-Nose ingest-to-pixel benchmarks")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes (CI smoke run)")
+    parser.add_argument("--only", default="parse,ingest,plot,export,stream",
+                        help="comma separated stages")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON ('-' = stdout)")
+    args = parser.parse_args()
+    stages = set(args.only.split(","))
+    if args.json and args.json != "-":
+        args.json = os.path.abspath(args.json)
+
+    workdir = tempfile.mkdtemp(prefix="enose_bench_")
+    os.chdir(workdir)  # recorder menulis ke ./data
+    try:
+        results = []
+        if "parse" in stages:
+            results += bench_parse(args.quick)
+        if "export" in stages:
+            results += bench_export(args.quick)
+        if stages & {"ingest", "plot", "stream"}:
+            app, window = make_window()
+            if "ingest" in stages:
+                results += bench_ingest(window, args.quick)
+            if "plot" in stages:
+                results += bench_plot(app, window, args.quick)
+            if "stream" in stages:
+                results += bench_stream(app, window, args.quick)
+            window.recorder.discard()
+
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "results": results,
+        }
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=1)
+            print()
+        else:
+            print_table(results)
+            if args.json:
+                with open(args.json, "w") as f:
+                    json.dump(report, f, indent=1)
+    finally:
+        os.chdir(HERE)
+        shutil.rmtree(workdir, ignore_errors=True)
+    # os._exit melewati flush stdio: tulis dulu semua output (stdout bisa di-redirect ke file)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)  # thread Qt receiver/recorder tidak perlu ditunggu
+
+if __name__ == "__main__":
+    sys.path.insert(0, HERE)
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Local real-time classifier (NumPy only)
+- Window features from the live ring buffer: per-channel log level,
+  normalized response pattern and short-term slope
+- Models: kNN (default), LDA with shrinkage, softmax logistic regression
+- Trained from the curated session CSVs (label parsed from the file name,
+  only labels in TRAIN_LABELS; free-text GUI names, recovered_* and
+  Unknown_* journals are skipped), saved as .npz; inference on one window
+  is a few matrix-vector products
+
+Usage:
+    python classifier.py train ../data_CSV_dan_JSON --eval
+    python classifier.py train ../data_CSV_dan_JSON data --labels "bawang merah,daun bawang"
+    python classifier.py predict "data/bawang merah 2_20251125_152528.csv"
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from replay import load_session_csv
+from ringbuffer import SENSOR_CHANNELS
+from session_recorder import parse_session_filename
+
+MODEL_PATH = os.path.join("data", "classifier.npz")
+TRAIN_DIRS = (os.path.join("..", "data_CSV_dan_JSON"),)   # dataset terkurasi saja
+TRAIN_LABELS = ("bawang bombai", "bawang merah", "bawang putih", "daun bawang")
+SKIP_PREFIXES = ("recovered_", "unknown_", ".")   # journal pulihan / sesi tanpa nama
+WINDOW = 40          # sampel per window fitur (~10 s pada 4 Hz)
+TRAIN_STEP = 10
+MODELS = ("knn", "lda", "logreg")
+
+
+# ===== FEATURES =====
+def window_features(x):
+    """
+    Fitur satu window x (W, n_channel):
+      log1p(mean)         - level absolut per channel
+      mean / sum(mean)    - pola respons (tahan drift skala)
+      slope / (mean + 1)  - tren relatif dalam window
+    """
+    x = np.abs(np.asarray(x, dtype=np.float64))
+    mean = x.mean(axis=0)
+    pattern = mean / max(mean.sum(), 1e-9)
+    w = len(x)
+    if w > 1:
+        t = np.arange(w) - (w - 1) / 2.0
+        slope = (t @ x) / (t @ t)
+    else:
+        slope = np.zeros_like(mean)
+    return np.concatenate([np.log1p(mean), pattern, slope / (mean + 1.0)])
+
+
+def session_windows(columns, window=WINDOW, step=TRAIN_STEP, channels=SENSOR_CHANNELS):
+    """Matriks fitur semua sliding window dalam satu sesi"""
+    x = np.column_stack([np.asarray(columns[ch], dtype=np.float64) for ch in channels])
+    x = x[np.isfinite(x).all(axis=1)]
+    if len(x) < window:
+        return np.empty((0, 3 * len(channels)))
+    starts = range(0, len(x) - window + 1, step)
+    return np.array([window_features(x[a:a + window]) for a in starts])
+
+
+def training_files(paths, labels=TRAIN_LABELS):
+    """
+    [(path, label)] file sesi untuk training. Hanya label dalam `labels`
+    (None = semua label); recovered_* / Unknown_* selalu dilewati.
+    """
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files += sorted(glob.glob(os.path.join(p, "*.csv")))
+        elif os.path.exists(p):
+            files.append(p)
+    out = []
+    for path in files:
+        if os.path.basename(path).lower().startswith(SKIP_PREFIXES):
+            continue
+        label = parse_session_filename(path)["label"]
+        if labels is None or label in labels:
+            out.append((path, label))
+    return out
+
+
+def load_training_set(paths, window=WINDOW, step=TRAIN_STEP, labels=TRAIN_LABELS):
+    """(X, y, groups, files) dari file / direktori sesi; label dari nama file"""
+    files = training_files(paths, labels)
+    xs, ys, groups = [], [], []
+    for i, (path, label) in enumerate(files):
+        feats = session_windows(load_session_csv(path), window, step)
+        if not len(feats):
+            continue
+        xs.append(feats)
+        ys += [label] * len(feats)
+        groups += [i] * len(feats)
+    if not xs:
+        raise ValueError("No training windows found")
+    return np.vstack(xs), np.array(ys), np.array(groups), [path for path, _ in files]
+
+
+# ===== MODELS =====
+def _softmax(z):
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+class SensorClassifier:
+    """
+    Model kecil di atas fitur window yang sudah distandarisasi.
+
+    fit(X, y) -> self, predict_proba(X) -> (n, n_class), classify(window)
+    -> (label, confidence). Parameter disimpan / dimuat lewat save()/load().
+    """
+
+    def __init__(self, model="knn", k=7, shrinkage=0.1, l2=1e-2, epochs=300, lr=0.5):
+        if model not in MODELS:
+            raise ValueError(f"Unknown model: {model!r} (expected one of {MODELS})")
+        self.model = model
+        self.k = k
+        self.shrinkage = shrinkage
+        self.l2 = l2
+        self.epochs = epochs
+        self.lr = lr
+        self.classes = None
+        self.mu = self.sigma = None
+        self.W = self.b = None          # lda / logreg: skor = X @ W + b
+        self.X_train = self.y_train = None  # knn
+        self._train_sq = None
+
+    def _scale(self, X):
+        return (X - self.mu) / self.sigma
+
+    def fit(self, X, y):
+        self.classes, yi = np.unique(y, return_inverse=True)
+        self.mu = X.mean(axis=0)
+        self.sigma = X.std(axis=0) + 1e-9
+        Z = self._scale(X)
+        n_class = len(self.classes)
+
+        if self.model == "knn":
+            self.X_train, self.y_train = Z, yi
+            self._train_sq = (Z * Z).sum(axis=1)
+        elif self.model == "lda":
+            means = np.array([Z[yi == c].mean(axis=0) for c in range(n_class)])
+            cov = np.cov((Z - means[yi]).T)
+            cov = (1 - self.shrinkage) * cov + self.shrinkage * np.eye(len(cov)) * np.trace(cov) / len(cov)
+            inv = np.linalg.pinv(cov)
+            priors = np.bincount(yi, minlength=n_class) / len(yi)
+            self.W = inv @ means.T
+            self.b = -0.5 * np.einsum("ij,ji->i", means, self.W) + np.log(priors)
+        else:  # logreg (softmax, full-batch gradient descent)
+            onehot = np.eye(n_class)[yi]
+            self.W = np.zeros((Z.shape[1], n_class))
+            self.b = np.zeros(n_class)
+            for _ in range(self.epochs):
+                p = _softmax(Z @ self.W + self.b)
+                g = (p - onehot) / len(Z)
+                self.W -= self.lr * (Z.T @ g + self.l2 * self.W)
+                self.b -= self.lr * g.sum(axis=0)
+        return self
+
+    def predict_proba(self, X):
+        Z = self._scale(np.atleast_2d(X))
+        if self.model == "knn":
+            # |z - x|^2 tanpa konstanta |z|^2 (tidak mengubah urutan tetangga)
+            d = self._train_sq - 2.0 * (Z @ self.X_train.T)
+            k = min(self.k, len(self.X_train))
+            nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+            votes = self.y_train[nearest]
+            return np.stack([(votes == c).mean(axis=1) for c in range(len(self.classes))], axis=1)
+        return _softmax(Z @ self.W + self.b)
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def classify(self, window):
+        """Satu window (W, n_channel) -> (label, confidence)"""
+        p = self.predict_proba(window_features(window))[0]
+        i = int(np.argmax(p))
+        return str(self.classes[i]), float(p[i])
+
+    # ----- persistence -----
+    def save(self, path=MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        params = {"model": self.model, "k": self.k, "classes": self.classes,
+                  "mu": self.mu, "sigma": self.sigma}
+        if self.model == "knn":
+            params.update(X_train=self.X_train, y_train=self.y_train)
+        else:
+            params.update(W=self.W, b=self.b)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **params)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path, allow_pickle=False) as f:
+            clf = cls(str(f["model"]), int(f["k"]))
+            clf.classes = f["classes"]
+            clf.mu, clf.sigma = f["mu"], f["sigma"]
+            if clf.model == "knn":
+                clf.X_train, clf.y_train = f["X_train"], f["y_train"]
+                clf._train_sq = (clf.X_train * clf.X_train).sum(axis=1)
+            else:
+                clf.W, clf.b = f["W"], f["b"]
+        return clf
+
+
+def train_classifier(paths=TRAIN_DIRS, model="knn", save_path=MODEL_PATH, labels=TRAIN_LABELS):
+    """Latih dari file sesi lalu simpan. Return (SensorClassifier, n_window, n_file)"""
+    X, y, _, files = load_training_set(paths, labels=labels)
+    clf = SensorClassifier(model).fit(X, y)
+    if save_path:
+        clf.save(save_path)
+    return clf, len(X), len(files)
+
+
+def load_or_train(paths=TRAIN_DIRS, model_path=MODEL_PATH, model="knn", labels=TRAIN_LABELS):
+    """Muat model tersimpan; latih ulang jika belum ada atau ada sesi training yang lebih baru"""
+    newest = max((os.path.getmtime(f) for f, _ in training_files(paths, labels)), default=0.0)
+    if os.path.exists(model_path) and os.path.getmtime(model_path) >= newest:
+        return SensorClassifier.load(model_path)
+    return train_classifier(paths, model, model_path, labels)[0]
+
+
+def evaluate(X, y, groups, model="knn"):
+    """Akurasi leave-one-file-out (per window)"""
+    correct = 0
+    for g in np.unique(groups):
+        test = groups == g
+        if len(np.unique(y[~test])) < 2:
+            continue
+        clf = SensorClassifier(model).fit(X[~test], y[~test])
+        correct += int((clf.predict(X[test]) == y[test]).sum())
+    return correct / len(y)
+
+
+# ===== LIVE INFERENCE =====
+class LiveClassifier:
+    """
+    Inferensi inkremental dari ring buffer: update(buffers) memakai window
+    terakhir (view tanpa copy) dan hanya jalan jika buffer berubah.
+    """
+
+    def __init__(self, model, window=WINDOW, channels=SENSOR_CHANNELS):
+        self.model = model
+        self.window = window
+        self.channels = tuple(channels)
+        self.reset()
+
+    def reset(self):
+        self.label = None
+        self.confidence = 0.0
+        self.last_ms = 0.0
+        self._key = None
+
+    def update(self, buffers):
+        """Return (label, confidence) atau None jika data belum cukup / tidak berubah"""
+        key = (id(buffers), buffers.version)
+        if key == self._key or len(buffers) < self.window:
+            return None
+        self._key = key
+        t0 = time.perf_counter()
+        x = np.column_stack([buffers.view(ch)[-self.window:] for ch in self.channels])
+        if not np.isfinite(x).all():
+            return None
+        self.label, self.confidence = self.model.classify(x)
+        self.last_ms = (time.perf_counter() - t0) * 1000.0
+        return self.label, self.confidence
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Local E-Nose classifier")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    tr = sub.add_parser("train", help="train from session CSVs")
+    tr.add_argument("paths", nargs="*", default=list(TRAIN_DIRS))
+    tr.add_argument("--model", choices=MODELS, default="knn")
+    tr.add_argument("--out", default=MODEL_PATH)
+    tr.add_argument("--eval", action="store_true", help="leave-one-file-out accuracy")
+    tr.add_argument("--labels", default=",".join(TRAIN_LABELS),
+                    help="comma-separated training labels ('all' = any file name label)")
+    pr = sub.add_parser("predict", help="classify session CSVs window by window")
+    pr.add_argument("paths", nargs="+")
+    pr.add_argument("--model-path", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.cmd == "train":
+        labels = None if args.labels.strip().lower() == "all" else \
+            tuple(" ".join(l.lower().split()) for l in args.labels.split(",") if l.strip())
+        X, y, groups, files = load_training_set(args.paths, labels=labels)
+        clf = SensorClassifier(args.model).fit(X, y)
+        clf.save(args.out)
+        print(f"🧠 {args.model}: {len(X)} windows from {len(files)} sessions, "
+              f"classes={clf.classes.tolist()} -> {args.out}")
+        if args.eval:
+            for model in MODELS:
+                print(f"   {model:>6}: leave-one-file-out accuracy {evaluate(X, y, groups, model):.1%}")
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            clf.classify(np.abs(np.random.rand(WINDOW, len(SENSOR_CHANNELS))))
+        print(f"   inference: {(time.perf_counter() - t0):.3f} ms per window")
+    else:
+        clf = SensorClassifier.load(args.model_path)
+        for path in args.paths:
+            X = session_windows(load_session_csv(path))
+            if not len(X):
+                print(f"{os.path.basename(path)}: too short")
+                continue
+            p = clf.predict_proba(X).mean(axis=0)
+            i = int(np.argmax(p))
+            print(f"{os.path.basename(path)}: {clf.classes[i]} ({p[i]:.0%})")
+
+
+if __name__ == "__main__":
+    main()
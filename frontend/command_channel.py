@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Persistent command channel (GUI -> Rust :8082 -> Arduino)
+- One long-lived TCP connection with automatic reconnect
+- Commands are queued and written by a sender thread (never blocks the GUI)
+- Pipelined: several commands may be in flight; acks are matched in order
+- Ack = the sample stream confirms the FSM state change (state field),
+  round-trip time is measured from send to the receipt timestamp of the
+  first confirming sample
+
+Usage (latency probe, needs the backend + a live stream):
+    python command_channel.py START_SAMPLING STOP_SAMPLING --repeat 5 --interval 3
+"""
+
+import argparse
+import queue
+import select
+import socket
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from sensor_protocol import FSM_STATES
+
+TCP_CMD_HOST = "127.0.0.1"
+TCP_CMD_PORT = 8082
+
+# State FSM saat sampling aktif (PRE_COND .. RECOVERY); START diabaikan Arduino di sini
+SAMPLING_STATES = tuple(range(FSM_STATES.index("PRE_COND"), FSM_STATES.index("DONE")))
+
+# Command -> state FSM yang menandakan command sudah dijalankan Arduino. START:
+# state sampling mana pun (bukan hanya PRE_COND), jadi START saat FSM sudah
+# berjalan langsung selesai (noop) dan tidak menunggu ack_timeout
+COMMAND_ACK_STATES = {
+    "START_SAMPLING": SAMPLING_STATES,
+    "STOP_SAMPLING": (FSM_STATES.index("IDLE"),),
+}
+
+
+# ===== COMMAND RESULT =====
+class CommandResult:
+    """Status satu command: queued -> sent -> acked / failed"""
+
+    def __init__(self, cmd, seq):
+        self.cmd = cmd
+        self.seq = seq
+        self.ack_states = COMMAND_ACK_STATES.get(cmd, ())
+        self.queued_at = time.time() * 1000.0
+        self.sent_at = None       # ms (epoch), saat sendall selesai
+        self.acked_at = None      # ms, timestamp sampel yang mengonfirmasi
+        self.error = None
+        self.noop = False         # FSM sudah di state tujuan, tidak ada transisi
+        self._sent = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def ok(self):
+        return self.error is None and self.sent_at is not None
+
+    @property
+    def rtt_ms(self):
+        if self.acked_at is None or self.sent_at is None:
+            return None
+        return max(0.0, self.acked_at - self.sent_at)
+
+    def wait_sent(self, timeout=None):
+        """Tunggu sampai command terkirim. Return True jika terkirim tanpa error"""
+        self._sent.wait(timeout)
+        return self.sent_at is not None and self.error is None
+
+    def wait(self, timeout=None):
+        """Tunggu sampai command di-ack / gagal. Return True jika di-ack"""
+        self._done.wait(timeout)
+        return self.acked_at is not None or self.noop
+
+    def __repr__(self):
+        rtt = self.rtt_ms
+        state = ("error: " + self.error if self.error else
+                 "noop" if self.noop else
+                 f"{rtt:.0f} ms" if rtt is not None else
+                 "sent" if self.sent_at else "queued")
+        return f"<{self.cmd} #{self.seq} {state}>"
+
+
+# ===== COMMAND CHANNEL =====
+class CommandChannel:
+    """
+    Koneksi command persisten dengan antrian dan pelacakan ack.
+
+    send() hanya menaruh command di antrian dan langsung return
+    CommandResult. observe(block) dipanggil oleh pemilik stream sampel
+    (thread ingest) untuk mencocokkan state FSM dengan command yang
+    menunggu ack. on_result(result) dipanggil saat command selesai
+    (ack, timeout, atau gagal kirim) - bisa dari thread sender maupun
+    thread ingest.
+    """
+
+    def __init__(self, host=TCP_CMD_HOST, port=TCP_CMD_PORT, connect_timeout=2.0,
+                 ack_timeout=10.0, retry_delay=1.0, history=256):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.ack_timeout = ack_timeout
+        self.retry_delay = retry_delay
+        self.on_result = None   # callable(CommandResult)
+        self.on_sent = None     # callable(CommandResult)
+        self.on_status = None   # callable(str)
+        self.last_state = None  # state FSM terakhir dari stream
+        self.rtt_history = deque(maxlen=history)
+        self.sent = self.acked = self.failed = self.reconnects = 0
+        self._seq = 0
+        self._queue = queue.Queue()
+        self._awaiting = deque()    # command terkirim yang menunggu ack (FIFO)
+        self._lock = threading.Lock()
+        self._sock = None
+        self._thread = None
+        self._running = False
+
+    # ----- lifecycle -----
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="CommandChannel", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._queue.put(None)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.connect_timeout + 1)
+        self._thread = None
+        self._close()
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    @property
+    def pending(self):
+        """Jumlah command di antrian + menunggu ack"""
+        return self._queue.qsize() + len(self._awaiting)
+
+    # ----- producer side -----
+    def send(self, cmd):
+        """Antrikan command (non-blocking). Return CommandResult"""
+        self.start()
+        with self._lock:
+            self._seq += 1
+            result = CommandResult(cmd.strip().upper(), self._seq)
+        self._queue.put(result)
+        return result
+
+    # ----- sender thread -----
+    def _status(self, message):
+        if self.on_status is not None:
+            self.on_status(message)
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._status(f"🎛️ Command channel connected: {self.host}:{self.port}")
+
+    def _peer_closed(self):
+        """Backend tidak pernah mengirim data: socket readable = koneksi putus"""
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+            return bool(readable) and not self._sock.recv(1, socket.MSG_PEEK)
+        except OSError:
+            return True
+
+    def _write(self, payload):
+        """Kirim dengan satu kali reconnect jika koneksi lama sudah putus"""
+        for attempt in (0, 1):
+            try:
+                if self._sock is not None and self._peer_closed():
+                    self._close()
+                if self._sock is None:
+                    if attempt:
+                        self.reconnects += 1
+                    self._connect()
+                self._sock.sendall(payload)
+                return None
+            except OSError as e:
+                self._close()
+                error = str(e)
+        return error
+
+    def _run(self):
+        while self._running:
+            try:
+                result = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                self.expire()
+                continue
+            if result is None:
+                break
+            # Pipelining: ambil semua command yang sudah antri, kirim dalam satu write
+            batch = [result]
+            while True:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    self._running = False
+                    break
+                batch.append(more)
+            payload = b"".join(f"{r.cmd}\n".encode() for r in batch)
+            error = self._write(payload)
+            if error is None:
+                self._mark_sent(batch)
+            else:
+                self._status(f"⚠️ Command channel error: {error}")
+                for r in batch:
+                    self._finish(r, error=error)
+                time.sleep(self.retry_delay)
+
+    def _mark_sent(self, batch):
+        now = time.time() * 1000.0
+        with self._lock:
+            for r in batch:
+                r.sent_at = now
+                self.sent += 1
+                predicted = (self._awaiting[-1].ack_states[0] if self._awaiting
+                             else self.last_state)
+                if not r.ack_states:
+                    r.noop = True
+                elif predicted in r.ack_states:
+                    r.noop = True  # sudah di state tujuan: tidak akan ada transisi
+                else:
+                    self._awaiting.append(r)
+        for r in batch:
+            r._sent.set()
+            if self.on_sent is not None:
+                self.on_sent(r)
+            if r.noop:
+                self._finish(r)
+
+    def _finish(self, result, error=None):
+        if error is not None:
+            result.error = error
+            self.failed += 1
+        elif result.acked_at is not None:
+            self.acked += 1
+            self.rtt_history.append(result.rtt_ms)
+        result._sent.set()
+        result._done.set()
+        if self.on_result is not None:
+            self.on_result(result)
+
+    # ----- ack matching (thread ingest) -----
+    def observe(self, block):
+        """Cocokkan state pada SensorBlock dengan command yang menunggu ack"""
+        n = len(block)
+        if not n:
+            return
+        states = block["state"]
+        self.last_state = int(states[-1])
+        if not self._awaiting:
+            return
+        stamps = block["timestamp"]
+        done = []
+        with self._lock:
+            start = 0
+            while self._awaiting and start < n:
+                head = self._awaiting[0]
+                hit = np.flatnonzero((stamps[start:] >= np.floor(head.sent_at))
+                                     & np.isin(states[start:], head.ack_states))
+                if not len(hit):
+                    break
+                start += int(hit[0])
+                head.acked_at = float(stamps[start])
+                done.append(self._awaiting.popleft())
+        for r in done:
+            self._finish(r)
+        self.expire()
+
+    def expire(self):
+        """Gagalkan command yang tidak di-ack dalam ack_timeout"""
+        now = time.time() * 1000.0
+        expired = []
+        with self._lock:
+            while self._awaiting and now - self._awaiting[0].sent_at > self.ack_timeout * 1000.0:
+                expired.append(self._awaiting.popleft())
+        for r in expired:
+            self._finish(r, error=f"no FSM ack within {self.ack_timeout:g}s")
+
+    def rtt_summary(self):
+        """Ringkasan RTT ack (ms) dari history"""
+        if not self.rtt_history:
+            return {"count": 0}
+        rtt = np.asarray(self.rtt_history)
+        p50, p95 = np.percentile(rtt, [50, 95])
+        return {"count": len(rtt), "p50_ms": float(p50), "p95_ms": float(p95),
+                "max_ms": float(rtt.max()), "last_ms": float(rtt[-1])}
+
+
+# ===== CLI (latency probe) =====
+def main():
+    from acquisition import TCP_DATA_HOST, TCP_DATA_PORT, TCPSource
+
+    parser = argparse.ArgumentParser(description="Send E-Nose commands and measure FSM ack latency")
+    parser.add_argument("commands", nargs="+", help="e.g. START_SAMPLING STOP_SAMPLING")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between commands")
+    parser.add_argument("--host", default=TCP_CMD_HOST)
+    parser.add_argument("--port", type=int, default=TCP_CMD_PORT)
+    parser.add_argument("--data-host", default=TCP_DATA_HOST)
+    parser.add_argument("--data-port", type=int, default=TCP_DATA_PORT)
+    parser.add_argument("--ack-timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    channel = CommandChannel(args.host, args.port, ack_timeout=args.ack_timeout)
+    channel.on_status = print
+    channel.on_result = lambda r: print(f"  {r}")
+
+    source = TCPSource(args.data_host, args.data_port)
+    source.on_status = print
+    stop = threading.Event()
+
+    def pump():
+        for block in source.blocks(stop):
+            channel.observe(block.compress())
+    threading.Thread(target=pump, daemon=True).start()
+    while channel.last_state is None and not stop.wait(0.1):
+        pass  # tunggu sampel pertama supaya state awal diketahui
+
+    results = []
+    for _ in range(args.repeat):
+        for cmd in args.commands:
+            results.append(channel.send(cmd))
+            time.sleep(args.interval)
+    for r in results:
+        r.wait(args.ack_timeout)
+    stop.set()
+    channel.stop()
+    print(f"📊 sent={channel.sent} acked={channel.acked} failed={channel.failed} "
+          f"reconnects={channel.reconnects} rtt={channel.rtt_summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Cached dataset index over all recorded sessions
+- Scans frontend/data, "data convert csv" and data_CSV_dan_JSON
+- Per file: label / replicate (from the file name), rows, duration,
+  sample rate, timestamp order, per-channel min / max / mean, SHA-1 hash
+- Persisted as JSON; an entry is re-parsed only when its size or mtime
+  changed, so listing / filtering thousands of sessions needs only stat()
+- New / changed files are parsed in a process pool
+
+Usage:
+    python dataset_index.py                              # scan default dirs + summary
+    python dataset_index.py --label "bawang putih" --list
+    python dataset_index.py --kind raw --min-duration 300 --json
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from replay import load_session_csv
+from ringbuffer import SENSOR_CHANNELS
+from session_recorder import parse_session_filename
+
+DATASET_DIRS = ("data", "data convert csv", os.path.join("..", "data_CSV_dan_JSON"))
+INDEX_PATH = os.path.join("data", ".dataset_index.json")
+INDEX_VERSION = 1        # naikkan jika isi entry berubah -> scan ulang semua
+PARALLEL_MIN_FILES = 8   # di bawah ini parse di proses sendiri (overhead pool)
+GAP_FACTOR = 10.0        # jarak > GAP_FACTOR x median dianggap jeda antar rekaman
+MIN_ORDERED = 0.99       # minimal fraksi timestamp tidak mundur agar durasi dihitung
+
+
+# ===== ENTRY =====
+class SessionEntry:
+    """Metadata satu file sesi (nilai statistik per channel: min, max, mean)"""
+
+    __slots__ = ("path", "label", "replicate", "sample_name", "stamp", "kind", "size",
+                 "mtime_ns", "rows", "duration_s", "rate_hz", "monotonic", "has_fsm", "stats",
+                 "sha1")
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    def __repr__(self):
+        return f"<SessionEntry {self.label!r} #{self.replicate} rows={self.rows} {self.kind}>"
+
+
+def scan_file(path):
+    """Parse satu file -> SessionEntry (dipanggil di worker process)"""
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        sha1 = hashlib.sha1(f.read()).hexdigest()
+    columns = load_session_csv(path)
+    ts = columns["timestamp"]
+    rows = len(ts)
+    # Durasi = jumlah jarak antar sampel yang wajar (jeda antar rekaman yang
+    # digabung tidak dihitung), rate dari median jarak. File augmentasi dengan
+    # timestamp acak tidak punya durasi / rate (None).
+    dt = np.diff(ts)
+    duration = median_dt = None
+    if len(dt) and np.mean(dt >= 0) >= MIN_ORDERED:
+        step = dt[dt > 0]
+        median_dt = float(np.median(step))
+        duration = float(step[step <= GAP_FACTOR * median_dt].sum()) / 1000.0
+    stats = {}
+    for ch in SENSOR_CHANNELS:
+        x = columns[ch]
+        x = x[np.isfinite(x)]
+        stats[ch] = [float(x.min()), float(x.max()), float(x.mean())] if len(x) else [None] * 3
+    info = parse_session_filename(path)
+    return SessionEntry(
+        path=os.path.abspath(path),
+        label=info["label"],
+        replicate=info["replicate"],
+        sample_name=info["sample_name"],
+        stamp=info["stamp"],
+        kind="ei" if os.path.basename(path).startswith("ei_") else "raw",
+        size=st.st_size,
+        mtime_ns=st.st_mtime_ns,
+        rows=rows,
+        duration_s=duration,
+        rate_hz=1000.0 / median_dt if median_dt else None,
+        monotonic=bool(np.all(dt >= 0)),
+        has_fsm=bool(np.any(columns["state"] > 0)),
+        stats=stats,
+        sha1=sha1,
+    )
+
+
+# ===== INDEX =====
+class DatasetIndex:
+    """
+    Index persisten semua sesi di `dirs`.
+
+    refresh() hanya stat() file yang sudah ada di cache; file baru /
+    berubah (size atau mtime beda) di-parse ulang, file yang hilang
+    dibuang, lalu cache ditulis jika ada perubahan.
+    """
+
+    def __init__(self, dirs=DATASET_DIRS, cache_path=INDEX_PATH, workers=None):
+        self.dirs = tuple(dirs)
+        self.cache_path = cache_path
+        self.workers = workers
+        self.entries = {}        # abspath -> SessionEntry
+        self.errors = {}         # abspath -> pesan error scan terakhir
+        self.scanned = 0         # jumlah file yang di-parse pada refresh() terakhir
+        self._load_cache()
+
+    # ----- cache -----
+    def _load_cache(self):
+        try:
+            with open(self.cache_path) as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            return
+        if doc.get("version") != INDEX_VERSION:
+            return
+        self.entries = {d["path"]: SessionEntry.from_dict(d) for d in doc.get("entries", [])}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        doc = {"version": INDEX_VERSION, "entries": [e.to_dict() for e in self.entries.values()]}
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(doc, f, separators=(",", ":"))
+        os.replace(tmp, self.cache_path)
+
+    # ----- scan -----
+    def files(self):
+        found = []
+        for d in self.dirs:
+            if os.path.isdir(d):
+                found += sorted(f for f in glob.glob(os.path.join(d, "*.csv"))
+                                if not os.path.basename(f).startswith("."))
+            elif os.path.isfile(d):
+                found.append(d)
+        return [os.path.abspath(f) for f in found]
+
+    def refresh(self, force=False):
+        """Sinkronkan index dengan disk. Return True jika ada perubahan"""
+        current = self.files()
+        removed = set(self.entries) - set(current)
+        for path in removed:
+            del self.entries[path]
+
+        todo = []
+        for path in current:
+            entry = self.entries.get(path)
+            st = os.stat(path)
+            if force or entry is None or entry.size != st.st_size or entry.mtime_ns != st.st_mtime_ns:
+                todo.append(path)
+
+        self.scanned = len(todo)
+        self.errors = {}
+        if len(todo) < PARALLEL_MIN_FILES or self.workers == 1:
+            results = [_scan_safe(path) for path in todo]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(_scan_safe, todo, chunksize=4))
+        for path, (entry, error) in zip(todo, results):
+            if entry is not None:
+                self.entries[path] = entry
+            else:
+                self.entries.pop(path, None)
+                self.errors[path] = error
+
+        if todo or removed:
+            self.save()
+            return True
+        return False
+
+    # ----- query -----
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def filter(self, label=None, replicate=None, kind=None, min_rows=0, min_duration=None,
+               has_fsm=None, dirs=None):
+        """Entry yang cocok dengan semua kriteria (label tidak case-sensitive)"""
+        label = label.lower() if label else None
+        roots = tuple(os.path.abspath(d) + os.sep for d in dirs) if dirs else None
+        out = []
+        for e in self.entries.values():
+            if label is not None and e.label != label:
+                continue
+            if replicate is not None and e.replicate != str(replicate):
+                continue
+            if kind is not None and e.kind != kind:
+                continue
+            if e.rows < min_rows or (min_duration is not None and (e.duration_s or 0) < min_duration):
+                continue
+            if has_fsm is not None and e.has_fsm != has_fsm:
+                continue
+            if roots is not None and not e.path.startswith(roots):
+                continue
+            out.append(e)
+        return sorted(out, key=lambda e: e.path)
+
+    def labels(self):
+        """{label: jumlah file}"""
+        counts = {}
+        for e in self.entries.values():
+            counts[e.label] = counts.get(e.label, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def duplicates(self):
+        """Kelompok file dengan isi identik (hash sama)"""
+        groups = {}
+        for e in self.entries.values():
+            groups.setdefault(e.sha1, []).append(e.path)
+        return [sorted(paths) for paths in groups.values() if len(paths) > 1]
+
+    def load(self, entries):
+        """Generator (entry, dict kolom) untuk subset hasil filter()"""
+        for e in entries:
+            yield e, load_session_csv(e.path)
+
+
+def _scan_safe(path):
+    try:
+        return scan_file(path), None
+    except Exception as e:
+        return None, str(e)
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Index recorded E-Nose sessions")
+    parser.add_argument("dirs", nargs="*", default=list(DATASET_DIRS))
+    parser.add_argument("--cache", default=INDEX_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="re-parse every file")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--label")
+    parser.add_argument("--replicate")
+    parser.add_argument("--kind", choices=("raw", "ei"))
+    parser.add_argument("--min-rows", type=int, default=0)
+    parser.add_argument("--min-duration", type=float, help="seconds")
+    parser.add_argument("--list", action="store_true", help="one line per file")
+    parser.add_argument("--json", action="store_true", help="print matching entries as JSON")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = DatasetIndex(args.dirs, args.cache, args.workers)
+    index.refresh(force=args.rebuild)
+    elapsed = time.perf_counter() - t0
+    for path, error in index.errors.items():
+        print(f"❌ {path}: {error}")
+
+    entries = index.filter(args.label, args.replicate, args.kind, args.min_rows, args.min_duration)
+    if args.json:
+        print(json.dumps([e.to_dict() for e in entries], indent=2))
+        return
+    if args.list:
+        for e in entries:
+            rate = f"{e.rate_hz:.2f} Hz" if e.rate_hz else "-"
+            duration = f"{e.duration_s:.1f}s" if e.duration_s is not None else "-"
+            print(f"{e.label:<15} {e.replicate or '-':>5} {e.kind:>3} {e.rows:>7} rows "
+                  f"{duration:>9} {rate:>9}  {os.path.basename(e.path)}")
+    labels = {}
+    for e in entries:
+        labels[e.label] = labels.get(e.label, 0) + 1
+    shown = dict(sorted(labels.items())) if len(labels) <= 8 else f"{len(labels)} labels"
+    print(f"📚 {len(entries)}/{len(index)} sessions, {sum(e.rows for e in entries)} rows, "
+          f"labels={shown} (parsed {index.scanned}, {elapsed * 1000:.0f} ms)")
+    dups = index.duplicates()
+    if dups:
+        print(f"   {len(dups)} groups of identical files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Batch converter to Edge Impulse formats
+- Raw session CSV -> EI CSV (timestamps rebased to 0, 100, 200 ms, values
+  rounded to 2 decimals) or EI data-acquisition JSON
+- Parsing, rebasing and formatting are vectorized (no per-row Python)
+- Files are converted in parallel in a process pool
+- Manifest in the output directory: unchanged sources (size + mtime and the
+  same format options) are skipped
+
+Usage:
+    python ei_convert.py data                                   # -> "data convert csv/ei_*.csv"
+    python ei_convert.py data ../data_CSV_dan_JSON --format json --out ei_json
+    python ei_convert.py data --interval-ms 250 --force         # format tweak: re-export all
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from replay import load_session_csv
+from resample import resample
+from session_recorder import SENSOR_CSV_FIELDS
+
+CONVERT_DIR = "data convert csv"
+MANIFEST_NAME = ".ei_convert_manifest.json"
+FORMATS = ("csv", "json")
+EI_INTERVAL_MS = 100
+EI_DECIMALS = 2
+EI_DEVICE_TYPE = "SPS_ENOSE"
+SENSOR_UNITS = "ppm"
+CONVERTER_VERSION = 1   # naikkan jika layout output berubah -> semua file diekspor ulang
+
+
+# ===== CONVERSION =====
+def ei_table(columns, interval_ms=EI_INTERVAL_MS, fields=SENSOR_CSV_FIELDS):
+    """
+    Tabel (n, len(fields)): timestamp = 0, interval, 2*interval, ... dan
+    nilai sensor mentah. Baris dengan nilai kosong / NaN dibuang.
+    Pembulatan dilakukan saat format (%.2f, sama dengan konversi manual).
+    """
+    values = np.column_stack([np.asarray(columns[f], dtype=np.float64) for f in fields[1:]])
+    values = values[np.isfinite(values).all(axis=1)]
+    stamps = np.arange(len(values), dtype=np.float64) * interval_ms
+    return np.column_stack([stamps, values])
+
+
+def _format_rows(table, row):
+    """Satu operasi format % untuk seluruh tabel (tanpa loop per baris)"""
+    return [row] * len(table), tuple(table.ravel().tolist())
+
+
+def format_csv(table, decimals=EI_DECIMALS, fields=SENSOR_CSV_FIELDS):
+    """Teks CSV EI (tanpa newline di akhir, sama dengan file hasil konversi manual)"""
+    header = ",".join(fields)
+    if not len(table):
+        return header
+    rows, cells = _format_rows(table, "%d" + f",%.{decimals}f" * (len(fields) - 1))
+    return header + "\n" + "\n".join(rows) % cells
+
+
+def format_json(table, device_name, interval_ms=EI_INTERVAL_MS, decimals=EI_DECIMALS,
+                fields=SENSOR_CSV_FIELDS):
+    """Dokumen EI data-acquisition (tanpa signature / HMAC)"""
+    doc = json.dumps({
+        "protected": {"ver": "v1", "alg": "none", "iat": int(time.time())},
+        "signature": "0" * 64,
+        "payload": {
+            "device_name": device_name,
+            "device_type": EI_DEVICE_TYPE,
+            "interval_ms": interval_ms,
+            "sensors": [{"name": f, "units": SENSOR_UNITS} for f in fields[1:]],
+            "values": None,
+        },
+    }, separators=(",", ":"))
+    # Nilai diformat langsung sebagai teks JSON dengan pembulatan yang sama seperti CSV
+    rows, cells = _format_rows(table[:, 1:], "[" + ",".join([f"%.{decimals}f"] * (len(fields) - 1)) + "]")
+    values = "[" + ",".join(rows) % cells + "]"
+    head, tail = doc.rsplit('"values":null', 1)
+    return head + '"values":' + values + tail
+
+
+def output_path(src, out_dir, fmt="csv"):
+    """<out_dir>/ei_<nama sesi>.<fmt>"""
+    stem = os.path.splitext(os.path.basename(src))[0]
+    return os.path.join(out_dir, f"ei_{stem}.{fmt}")
+
+
+def convert_file(src, dst, fmt="csv", interval_ms=EI_INTERVAL_MS, decimals=EI_DECIMALS,
+                 resampled=False):
+    """
+    Konversi satu file (dipanggil di worker process). Return jumlah baris.
+    resampled=True: data diinterpolasi ke grid interval_ms dulu, sehingga
+    timestamp EI sesuai waktu asli (bukan sekadar nomor baris x interval).
+    """
+    columns = load_session_csv(src)
+    if resampled:
+        columns = resample(columns, interval_ms)[0]
+    table = ei_table(columns, interval_ms)
+    if fmt == "csv":
+        text = format_csv(table, decimals)
+    elif fmt == "json":
+        name = os.path.splitext(os.path.basename(src))[0]
+        text = format_json(table, name, interval_ms, decimals)
+    else:
+        raise ValueError(f"Unknown format: {fmt!r} (expected one of {FORMATS})")
+    tmp = dst + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        f.write(text)
+    os.replace(tmp, dst)
+    return len(table)
+
+
+# ===== MANIFEST =====
+def _signature(src, fmt, interval_ms, decimals, resampled):
+    st = os.stat(src)
+    return [st.st_size, st.st_mtime_ns, fmt, interval_ms, decimals, resampled, CONVERTER_VERSION]
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+# ===== BATCH =====
+def session_files(paths):
+    """File CSV sesi dari daftar file / direktori (file tersembunyi dilewati)"""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files += sorted(f for f in glob.glob(os.path.join(p, "*.csv"))
+                            if not os.path.basename(f).startswith("."))
+        elif os.path.exists(p):
+            files.append(p)
+    return files
+
+
+def convert_directory(paths, out_dir=CONVERT_DIR, fmt="csv", interval_ms=EI_INTERVAL_MS,
+                      decimals=EI_DECIMALS, workers=None, force=False, progress=None,
+                      resampled=False):
+    """
+    Konversi semua sesi di `paths` ke out_dir secara paralel.
+
+    progress(src, rows_or_None, error_or_None) dipanggil per file selesai.
+    Return dict: converted, skipped, failed, rows, errors {src: pesan}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    report = {"converted": 0, "skipped": 0, "failed": 0, "rows": 0, "errors": {}}
+
+    todo = []
+    for src in session_files(paths):
+        dst = output_path(src, out_dir, fmt)
+        key = os.path.basename(dst)   # satu entri per file output (csv & json bisa satu folder)
+        sig = _signature(src, fmt, interval_ms, decimals, resampled)
+        if not force and manifest.get(key, {}).get("sig") == sig and os.path.exists(dst):
+            report["skipped"] += 1
+            continue
+        todo.append((src, dst, key, sig))
+
+    def done(src, dst, key, sig, rows=None, error=None):
+        if error is None:
+            manifest[key] = {"sig": sig, "source": os.path.abspath(src), "rows": rows}
+            report["converted"] += 1
+            report["rows"] += rows
+        else:
+            manifest.pop(key, None)
+            report["failed"] += 1
+            report["errors"][src] = error
+        if progress is not None:
+            progress(src, rows, error)
+
+    if len(todo) == 1 or workers == 1:
+        for src, dst, key, sig in todo:
+            try:
+                done(src, dst, key, sig,
+                     rows=convert_file(src, dst, fmt, interval_ms, decimals, resampled))
+            except Exception as e:
+                done(src, dst, key, sig, error=str(e))
+    elif todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(pool.submit(convert_file, src, dst, fmt, interval_ms, decimals, resampled),
+                        (src, dst, key, sig)) for src, dst, key, sig in todo]
+            for future, (src, dst, key, sig) in futures:
+                try:
+                    done(src, dst, key, sig, rows=future.result())
+                except Exception as e:
+                    done(src, dst, key, sig, error=str(e))
+
+    _save_manifest(out_dir, manifest)
+    return report
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Convert E-Nose sessions to Edge Impulse format")
+    parser.add_argument("paths", nargs="+", help="session CSV files or directories")
+    parser.add_argument("--out", default=CONVERT_DIR)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--interval-ms", type=int, default=EI_INTERVAL_MS)
+    parser.add_argument("--decimals", type=int, default=EI_DECIMALS)
+    parser.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-export unchanged files too")
+    parser.add_argument("--resample", action="store_true",
+                        help="interpolate onto a real interval-ms grid instead of renumbering rows")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    def progress(src, rows, error):
+        if args.quiet:
+            return
+        name = os.path.basename(src)
+        print(f"❌ {name}: {error}" if error else f"✅ {name}: {rows} rows")
+
+    t0 = time.perf_counter()
+    report = convert_directory(args.paths, args.out, args.format, args.interval_ms,
+                               args.decimals, args.workers, args.force, progress, args.resample)
+    print(f"📊 converted={report['converted']} skipped={report['skipped']} "
+          f"failed={report['failed']} rows={report['rows']} "
+          f"in {time.perf_counter() - t0:.2f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
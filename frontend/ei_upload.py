@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Edge Impulse upload queue
+- Pooled requests.Session (keep-alive) shared by N upload workers
+- Retry with exponential backoff for network errors / 429 / 5xx
+- Disk-backed spool: queued uploads survive restarts and offline periods
+- Bulk upload of a whole directory (label parsed from the file name)
+- Ingestion URL / API key configurable (env EI_API_URL, EI_API_KEY)
+
+Usage:
+    python ei_upload.py ../data_CSV_dan_JSON --workers 4
+    python ei_upload.py "data/bawang merah 2_20251125_152528.csv" --label "bawang merah"
+    python ei_upload.py --flush                       # upload whatever is left in the spool
+    python ei_upload.py ../data_CSV_dan_JSON --url http://127.0.0.1:4810   # local stand-in
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import os
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from session_recorder import parse_session_filename
+
+# ===== EDGE IMPULSE CONFIGURATION =====
+EI_API_URL = os.environ.get("EI_API_URL", "https://ingestion.edgeimpulse.com")
+EI_API_KEY = os.environ.get("EI_API_KEY", "ei_4ab099b49f2becd6bb6ce8b3ab59de6c83b6ee70a451aaca")
+EI_PROJECT_ID = "821850"
+EI_UPLOAD_PATH = "/api/training/files"
+
+SPOOL_DIR = os.path.join("data", ".upload_spool")
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+
+def count_csv_rows(path, chunk_size=1 << 20):
+    """Jumlah baris data (tanpa header) dengan menghitung newline per chunk"""
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1  # baris terakhir tanpa newline
+    return max(0, lines - 1)
+
+
+class UploadError(Exception):
+    def __init__(self, message, retryable):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+# ===== HTTP CLIENT =====
+class EdgeImpulseClient:
+    """Upload CSV via Ingestion API (multipart/form-data) di atas satu Session"""
+
+    def __init__(self, api_url=EI_API_URL, api_key=EI_API_KEY, pool_size=4, timeout=60):
+        self.upload_url = api_url.rstrip("/") + EI_UPLOAD_PATH
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def upload_csv(self, csv_file, label, sample_name):
+        """Return dict respons; lempar UploadError (retryable / permanen) jika gagal"""
+        headers = {"x-api-key": self.api_key, "x-label": label}
+        try:
+            with open(csv_file, "rb") as f:
+                response = self.session.post(
+                    self.upload_url,
+                    headers=headers,
+                    files={"data": (f"{sample_name}.csv", f, "text/csv")},
+                    timeout=self.timeout,
+                )
+        except FileNotFoundError:
+            raise UploadError(f"❌ File not found: {csv_file}", False)
+        except requests.exceptions.Timeout:
+            raise UploadError("❌ Upload timeout - Edge Impulse server lambat", True)
+        except requests.exceptions.ConnectionError:
+            raise UploadError("❌ Cannot connect - check internet & API key", True)
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.status_code in (200, 201):
+            if body.get("success", False):
+                return body
+            raise UploadError(f"❌ API success but error: "
+                              f"{body.get('message', 'Upload failed internally')}", False)
+        message = body.get("message", response.text[:300])
+        raise UploadError(f"❌ Upload failed (Status {response.status_code}):\n{message}",
+                          response.status_code in RETRY_STATUS)
+
+    def close(self):
+        self.session.close()
+
+
+# ===== UPLOAD JOB =====
+class UploadJob:
+    """Satu file di spool: disimpan sebagai <spool>/<id>.json"""
+
+    FIELDS = ("id", "csv_path", "label", "sample_name", "rows", "attempts",
+              "created", "last_error")
+
+    def __init__(self, csv_path, label, sample_name, rows=None, id=None, attempts=0,
+                 created=None, last_error=None):
+        self.id = id or uuid.uuid4().hex[:12]
+        self.csv_path = os.path.abspath(csv_path)
+        self.label = label
+        self.sample_name = sample_name
+        self.rows = rows
+        self.attempts = attempts
+        self.created = created or time.time()
+        self.last_error = last_error
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self):
+        return f"<UploadJob {self.sample_name!r} label={self.label!r} attempts={self.attempts}>"
+
+
+# ===== UPLOAD QUEUE =====
+class UploadQueue:
+    """
+    Antrian upload persisten dengan N worker.
+
+    submit() menulis job ke spool dulu, baru diantrikan; job hanya dihapus
+    dari spool setelah sukses atau gagal permanen (4xx). Error jaringan /
+    429 / 5xx dijadwalkan ulang dengan backoff eksponensial; setelah
+    `max_attempts` job diparkir di spool dan dicoba lagi saat start()
+    berikutnya atau retry_parked().
+
+    Callback (dipanggil dari thread worker):
+        on_progress(job, message)
+        on_retry(job, message, delay)
+        on_finished(job, success, message)
+    """
+
+    def __init__(self, client=None, spool_dir=SPOOL_DIR, workers=2, max_attempts=6,
+                 backoff_base=2.0, backoff_max=300.0):
+        self.client = client or EdgeImpulseClient(pool_size=workers)
+        self.spool_dir = spool_dir
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.on_progress = None
+        self.on_retry = None
+        self.on_finished = None
+        self.uploaded = self.failed = self.retries = 0
+        self._heap = []          # (due_monotonic, seq, job)
+        self._seq = 0
+        self._jobs = {}          # id -> job (antri / sedang upload)
+        self._parked = {}        # id -> job (melebihi max_attempts)
+        self._active = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self._running = False
+
+    # ----- spool -----
+    def _spool_path(self, job):
+        return os.path.join(self.spool_dir, f"{job.id}.json")
+
+    def _save(self, job):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        tmp = self._spool_path(job) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(job.as_dict(), f)
+        os.replace(tmp, self._spool_path(job))
+
+    def _remove(self, job):
+        try:
+            os.remove(self._spool_path(job))
+        except FileNotFoundError:
+            pass
+
+    def load_spool(self):
+        """Antrikan job yang tertinggal di spool. Return jumlah job"""
+        count = 0
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "*.json"))):
+            try:
+                with open(path) as f:
+                    job = UploadJob(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                continue
+            job.attempts = 0
+            with self._cond:
+                if job.id in self._jobs:
+                    continue
+            self._push(job, 0.0)
+            count += 1
+        return count
+
+    # ----- lifecycle -----
+    def start(self):
+        """Mulai worker dan lanjutkan spool dari run sebelumnya"""
+        if self._running:
+            return
+        self._running = True
+        self.load_spool()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"UploadWorker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, wait=True):
+        """Hentikan worker; job yang belum selesai tetap di spool"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+        self._threads = []
+
+    def join(self, timeout=None):
+        """Tunggu sampai antrian kosong (job terparkir tidak ditunggu)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._heap or self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    @property
+    def pending(self):
+        with self._cond:
+            return len(self._jobs)
+
+    @property
+    def parked(self):
+        with self._cond:
+            return list(self._parked.values())
+
+    # ----- producer side -----
+    def submit(self, csv_path, label, sample_name=None):
+        """Antrikan satu CSV. File yang sudah antri tidak diduplikasi. Return UploadJob"""
+        sample_name = sample_name or parse_session_filename(csv_path)["sample_name"]
+        path = os.path.abspath(csv_path)
+        with self._cond:
+            for job in list(self._jobs.values()) + list(self._parked.values()):
+                if job.csv_path == path:
+                    return job
+        job = UploadJob(csv_path, label, sample_name)
+        self._save(job)
+        self._push(job, 0.0)
+        return job
+
+    def submit_directory(self, directory, label=None, pattern="*.csv"):
+        """Antrikan semua CSV di direktori; label dari nama file jika label=None"""
+        jobs = []
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            if os.path.basename(path).startswith("."):
+                continue  # journal / file tersembunyi
+            info = parse_session_filename(path)
+            jobs.append(self.submit(path, label or info["label"], info["sample_name"]))
+        return jobs
+
+    def retry_parked(self):
+        """Antrikan ulang job yang terparkir"""
+        with self._cond:
+            parked, self._parked = list(self._parked.values()), {}
+        for job in parked:
+            job.attempts = 0
+            self._push(job, 0.0)
+        return len(parked)
+
+    def _push(self, job, delay):
+        with self._cond:
+            self._jobs[job.id] = job
+            self._seq += 1
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._seq, job))
+            self._cond.notify()
+
+    # ----- workers -----
+    def _next_job(self):
+        with self._cond:
+            while self._running:
+                if self._heap:
+                    due = self._heap[0][0]
+                    now = time.monotonic()
+                    if due <= now:
+                        job = heapq.heappop(self._heap)[2]
+                        self._active += 1
+                        return job
+                    self._cond.wait(due - now)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._process(job)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def _emit(self, callback, *args):
+        if callback is not None:
+            callback(*args)
+
+    def _process(self, job):
+        name = os.path.basename(job.csv_path)
+        try:
+            if job.rows is None:
+                job.rows = count_csv_rows(job.csv_path)
+            if not job.rows:
+                raise UploadError("❌ CSV file is empty!", False)
+            job.attempts += 1
+            self._emit(self.on_progress, job, f"📤 Uploading {name} ({job.rows} samples)...")
+            self.client.upload_csv(job.csv_path, job.label, job.sample_name)
+        except (UploadError, OSError) as e:
+            retryable = getattr(e, "retryable", False)
+            message = str(e) if isinstance(e, UploadError) else f"❌ Error: {e}"
+            if isinstance(e, FileNotFoundError):
+                message = f"❌ File not found: {job.csv_path}"
+            job.last_error = message
+            if retryable:
+                self._reschedule(job, message)
+                return
+            with self._cond:
+                self._jobs.pop(job.id, None)
+            self._remove(job)
+            self.failed += 1
+            self._emit(self.on_finished, job, False, message)
+            return
+
+        with self._cond:
+            self._jobs.pop(job.id, None)
+        self._remove(job)
+        self.uploaded += 1
+        message = f"✅ Successfully uploaded to Edge Impulse!\n\n"
+        message += f"📊 Samples: {job.rows}\n"
+        message += f"🏷️  Label: {job.label}\n"
+        message += f"📁 Sample Name: {job.sample_name}\n"
+        message += f"\n📍 View in Edge Impulse:\n"
+        message += f"https://studio.edgeimpulse.com/studio/{EI_PROJECT_ID}/data-acquisition"
+        self._emit(self.on_finished, job, True, message)
+
+    def _reschedule(self, job, message):
+        self.retries += 1
+        self._save(job)
+        if self.max_attempts and job.attempts >= self.max_attempts:
+            with self._cond:
+                self._jobs.pop(job.id, None)
+                self._parked[job.id] = job
+            self._emit(self.on_retry, job, message, None)
+            return
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (job.attempts - 1))
+        self._emit(self.on_retry, job, message, delay)
+        self._push(job, delay)
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Upload E-Nose sessions to Edge Impulse")
+    parser.add_argument("paths", nargs="*", help="CSV files or directories")
+    parser.add_argument("--label", help="label for all files (default: parsed from file name)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--url", default=EI_API_URL, help="ingestion base URL")
+    parser.add_argument("--api-key", default=EI_API_KEY)
+    parser.add_argument("--spool", default=SPOOL_DIR)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--flush", action="store_true", help="only upload the existing spool")
+    args = parser.parse_args()
+
+    client = EdgeImpulseClient(args.url, args.api_key, pool_size=args.workers)
+    uploads = UploadQueue(client, args.spool, args.workers, args.max_attempts)
+    uploads.on_progress = lambda job, msg: print(msg)
+    uploads.on_retry = lambda job, msg, delay: print(
+        f"⏳ {job.sample_name}: {msg.splitlines()[0]} -> "
+        + (f"retry in {delay:.0f}s" if delay is not None else "parked in spool"))
+    uploads.on_finished = lambda job, ok, msg: print(
+        f"{'✅' if ok else '❌'} {job.sample_name} [{job.label}]" + ("" if ok else f": {msg}"))
+
+    for path in [] if args.flush else args.paths:
+        if os.path.isdir(path):
+            uploads.submit_directory(path, args.label)
+        else:
+            info = parse_session_filename(path)
+            uploads.submit(path, args.label or info["label"], info["sample_name"])
+
+    t0 = time.monotonic()
+    uploads.start()
+    try:
+        uploads.join()
+    except KeyboardInterrupt:
+        pass
+    uploads.stop(wait=False)
+    print(f"📊 uploaded={uploads.uploaded} failed={uploads.failed} retries={uploads.retries} "
+          f"parked={len(uploads.parked)} in {time.monotonic() - t0:.1f}s")
+    return 0 if not uploads.failed and not uploads.parked else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
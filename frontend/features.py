@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Incremental per-cycle feature extraction
+- Hooks into the sample stream (SensorBlock / columns), O(1) state per
+  channel, updated run-by-run with NumPy reductions (no sample history)
+- One cycle = one motor level: RAMP_UP -> HOLD -> PURGE -> RECOVERY
+- Per channel: baseline, HOLD plateau, peak, rise time, AUC, recovery slope
+- Bulk export of all recorded sessions to one feature CSV
+
+Usage:
+    python features.py data/*.csv ../data_CSV_dan_JSON/*.csv --out features.csv
+"""
+
+import argparse
+import csv
+import glob
+import os
+
+import numpy as np
+
+from filters import FilterChain
+from replay import load_session_csv
+from resample import resample
+from ringbuffer import SENSOR_CHANNELS
+from sensor_protocol import FSM_STATES
+from session_recorder import parse_session_filename
+
+PRE_COND, RAMP_UP, HOLD, PURGE, RECOVERY, DONE = (
+    FSM_STATES.index(s) for s in ("PRE_COND", "RAMP_UP", "HOLD", "PURGE", "RECOVERY", "DONE"))
+REST_STATES = (PRE_COND, RECOVERY)
+
+# Semua nilai relatif terhadap baseline kecuali baseline sendiri
+FEATURE_NAMES = (
+    "baseline",        # rata-rata PRE_COND / RECOVERY sebelum siklus
+    "plateau",         # EMA akhir HOLD - baseline (steady state)
+    "peak",            # maksimum RAMP_UP+HOLD - baseline
+    "rise_time_s",     # waktu dari awal RAMP_UP sampai puncak
+    "auc",             # integral (x - baseline) dt selama RAMP_UP+HOLD (nilai*s)
+    "recovery_slope",  # kemiringan regresi linier selama PURGE (per s)
+)
+
+
+def feature_columns(channels=SENSOR_CHANNELS):
+    """Nama kolom vektor fitur: <channel>_<feature>"""
+    return [f"{ch}_{name}" for name in FEATURE_NAMES for ch in channels]
+
+
+# ===== CYCLE =====
+class CycleFeatures:
+    """Fitur satu siklus: values shape (len(FEATURE_NAMES), n_channel)"""
+
+    __slots__ = ("level", "start_ts", "end_ts", "samples", "values")
+
+    def __init__(self, level, start_ts, end_ts, samples, values):
+        self.level = level
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.samples = samples
+        self.values = values
+
+    @property
+    def vector(self):
+        """Vektor fitur datar (urutan sama dengan feature_columns())"""
+        return self.values.ravel()
+
+    def __repr__(self):
+        return f"<CycleFeatures L{self.level + 1} samples={self.samples}>"
+
+
+class _Cycle:
+    """Akumulator siklus yang sedang berjalan (per channel, vektor NumPy)"""
+
+    def __init__(self, level, t0, baseline):
+        nan = np.full_like(baseline, np.nan)
+        self.level = level
+        self.t0 = t0
+        self.t_last = t0
+        self.samples = 0
+        self.baseline = baseline
+        self.peak = np.full_like(baseline, -np.inf)
+        self.peak_t = np.full_like(baseline, t0)
+        self.auc = np.zeros_like(baseline)
+        self.plateau = nan
+        # Regresi linier PURGE: sum t, x, tt, tx (t relatif awal siklus, detik)
+        self.n_purge = 0
+        self.st = 0.0
+        self.stt = 0.0
+        self.sx = np.zeros_like(baseline)
+        self.stx = np.zeros_like(baseline)
+
+    def finish(self):
+        if self.n_purge >= 2:
+            den = self.n_purge * self.stt - self.st ** 2
+            slope = (self.n_purge * self.stx - self.st * self.sx) / den if den > 0 else np.nan
+        else:
+            slope = np.full_like(self.baseline, np.nan)
+        peak = np.where(np.isfinite(self.peak), self.peak - self.baseline, np.nan)
+        values = np.vstack([
+            self.baseline,
+            self.plateau - self.baseline,
+            peak,
+            (self.peak_t - self.t0) / 1000.0,
+            self.auc,
+            slope * np.ones_like(self.baseline),
+        ])
+        return CycleFeatures(self.level, self.t0, self.t_last, self.samples, values)
+
+
+# ===== EXTRACTOR =====
+class FeatureExtractor:
+    """
+    Ekstraksi fitur online, dipanggil per blok sampel: update(block).
+
+    Blok dipecah menjadi run (state, level) yang sama; setiap run
+    memperbarui akumulator dengan reduksi NumPy, jadi kerja per sampel
+    per channel O(1) dan memori konstan. Siklus ditutup saat level
+    berganti, FSM masuk DONE/IDLE, atau flush(); hasilnya ada di
+    `cycles` dan dikirim ke on_cycle(CycleFeatures).
+    """
+
+    def __init__(self, channels=SENSOR_CHANNELS, plateau_tau=40, on_cycle=None):
+        self.channels = tuple(channels)
+        self.alpha = 1.0 / max(1, plateau_tau)   # EMA plateau (~10 s pada 4 Hz)
+        self.on_cycle = on_cycle
+        self.reset()
+
+    def reset(self):
+        self.cycles = []
+        self._cycle = None
+        self._rest_sum = np.zeros(len(self.channels))
+        self._rest_n = 0
+        self._last_state = None
+        self._prev_t = None
+        self._prev_x = None
+
+    @property
+    def current(self):
+        """Fitur sementara dari siklus yang sedang berjalan (None jika tidak ada)"""
+        return self._cycle.finish() if self._cycle is not None else None
+
+    def update(self, block):
+        """Proses SensorBlock / dict kolom (harus punya timestamp, state, level)"""
+        n = len(block["timestamp"])
+        if not n:
+            return
+        t = np.asarray(block["timestamp"], dtype=np.float64)
+        state = np.asarray(block["state"]).astype(np.int64)
+        level = np.asarray(block["level"]).astype(np.int64)
+        x = np.column_stack([np.asarray(block[ch], dtype=np.float64) for ch in self.channels])
+
+        edges = np.flatnonzero((state[1:] != state[:-1]) | (level[1:] != level[:-1])) + 1
+        for a, b in zip(np.r_[0, edges], np.r_[edges, n]):
+            self._run(int(state[a]), int(level[a]), t[a:b], x[a:b])
+        self._prev_t = t[-1]
+        self._prev_x = x[-1]
+
+    def flush(self):
+        """Tutup siklus yang masih terbuka (akhir sesi)"""
+        self._close()
+
+    # ----- internal -----
+    def _close(self):
+        if self._cycle is None:
+            return
+        features = self._cycle.finish()
+        self._cycle = None
+        self.cycles.append(features)
+        if self.on_cycle is not None:
+            self.on_cycle(features)
+
+    def _run(self, state, level, t, x):
+        entering = state != self._last_state
+        self._last_state = state
+
+        if state in REST_STATES:
+            if entering:
+                self._rest_sum[:] = 0.0
+                self._rest_n = 0
+            self._rest_sum += x.sum(axis=0)
+            self._rest_n += len(x)
+        if state not in (RAMP_UP, HOLD, PURGE, RECOVERY):
+            self._close()  # IDLE / PRE_COND / DONE
+            return
+
+        cycle = self._cycle
+        if cycle is not None and cycle.level != level:
+            self._close()
+            cycle = None
+        if cycle is None:
+            if state != RAMP_UP:
+                return  # siklus tanpa awal RAMP_UP (mulai di tengah sesi)
+            baseline = self._rest_sum / self._rest_n if self._rest_n else x[0].copy()
+            cycle = self._cycle = _Cycle(level, t[0], baseline)
+            self._prev_t, self._prev_x = None, None
+
+        cycle.samples += len(x)
+        cycle.t_last = t[-1]
+
+        if state in (RAMP_UP, HOLD):
+            i = np.argmax(x, axis=0)
+            run_peak = x[i, np.arange(x.shape[1])]
+            better = run_peak > cycle.peak
+            cycle.peak = np.where(better, run_peak, cycle.peak)
+            cycle.peak_t = np.where(better, t[i], cycle.peak_t)
+            # Trapesium, termasuk sambungan dengan sampel sebelumnya
+            if self._prev_t is not None:
+                tt = np.r_[self._prev_t, t]
+                xx = np.vstack([self._prev_x, x])
+            else:
+                tt, xx = t, x
+            if len(tt) > 1:
+                y = xx - cycle.baseline
+                dt = np.diff(tt)[:, None] / 1000.0
+                cycle.auc += (0.5 * (y[1:] + y[:-1]) * dt).sum(axis=0)
+
+        if state == HOLD:
+            # EMA tertutup: e_k = (1-a)^k e_0 + a * sum (1-a)^(k-1-i) x_i
+            k = len(x)
+            decay = 1.0 - self.alpha
+            w = decay ** np.arange(k - 1, -1, -1)
+            e0 = np.where(np.isnan(cycle.plateau), x[0], cycle.plateau)
+            cycle.plateau = decay ** k * e0 + self.alpha * (w @ x)
+
+        if state == PURGE:
+            ts = (t - cycle.t0) / 1000.0
+            cycle.n_purge += len(ts)
+            cycle.st += ts.sum()
+            cycle.stt += (ts * ts).sum()
+            cycle.sx += x.sum(axis=0)
+            cycle.stx += ts @ x
+
+        self._prev_t = t[-1]
+        self._prev_x = x[-1]
+
+
+# ===== OFFLINE / BULK =====
+def extract_session(columns, channels=SENSOR_CHANNELS, plateau_tau=40):
+    """
+    Fitur semua siklus dalam satu sesi (dict kolom). Sesi lama tanpa kolom
+    FSM dianggap satu siklus: 10% awal = baseline, sisanya HOLD (perlu
+    minimal 2 sampel; lebih pendek -> tidak ada siklus).
+    """
+    n = len(columns["timestamp"])
+    state = np.asarray(columns.get("state", np.zeros(n)))
+    if not np.any(state > 0):
+        if n < 2:
+            return []
+        columns = dict(columns)
+        state = np.full(n, HOLD)
+        state[:max(1, n // 10)] = PRE_COND
+        state[max(1, n // 10)] = RAMP_UP
+        columns["state"] = state
+        columns["level"] = np.zeros(n)
+    extractor = FeatureExtractor(channels, plateau_tau)
+    extractor.update(columns)
+    extractor.flush()
+    return extractor.cycles
+
+
+def export_features(paths, out_csv, channels=SENSOR_CHANNELS, resample_ms=None, filters=None):
+    """
+    Satu baris per siklus untuk semua file sesi. Opsional di-resample lalu
+    dihaluskan dengan filters (tanpa stage baseline, sama seperti engine
+    live dengan features_on="smoothed"). Return jumlah baris
+    """
+    header = ["file", "label", "replicate", "level", "samples"] + feature_columns(channels)
+    rows = 0
+    with open(out_csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for path in paths:
+            info = parse_session_filename(path)
+            columns = load_session_csv(path)
+            if resample_ms:
+                columns = resample(columns, resample_ms)[0]
+            if filters:
+                columns = FilterChain(filters, channels).process(columns, smoothed=True)[1]
+            for cycle in extract_session(columns, channels):
+                writer.writerow([os.path.basename(path), info["label"], info["replicate"],
+                                 cycle.level + 1, cycle.samples]
+                                + [f"{v:.6g}" for v in cycle.vector])
+                rows += 1
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export per-cycle E-Nose features")
+    parser.add_argument("paths", nargs="+", help="session CSV files or directories")
+    parser.add_argument("--out", default="features.csv")
+    parser.add_argument("--resample-ms", type=float, help="resample to a fixed rate first")
+    parser.add_argument("--filters", metavar="SPEC",
+                        help="smooth first like the live GUI, e.g. 'median:5,ema:0.3' (baseline stage skipped)")
+    args = parser.parse_args()
+    files = []
+    for p in args.paths:
+        if os.path.isdir(p):
+            files += sorted(f for f in glob.glob(os.path.join(p, "*.csv"))
+                            if not os.path.basename(f).startswith("."))
+        else:
+            files.append(p)
+    rows = export_features(files, args.out, resample_ms=args.resample_ms, filters=args.filters)
+    print(f"💾 {rows} cycles from {len(files)} sessions -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
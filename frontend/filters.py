@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Streaming filter chain (NumPy only)
+- Stages: moving median (spike removal), EMA / first-order IIR low-pass,
+  baseline subtraction referenced to the PRE_COND phase
+- Configured with a short spec string, e.g. "median:5,ema:0.3,baseline"
+- Filter state is carried across blocks; per-row arithmetic does not
+  depend on where a block starts, so streaming output == offline output
+  of the same file (bit for bit)
+- Cost per sample is constant (median window, EMA chunk length)
+
+Usage:
+    python filters.py "data/bawang merah 2_20251125_152528.csv" --check
+    python filters.py data/*.csv --filters "median:7,ema:0.2" --out data/filtered
+"""
+
+import argparse
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from replay import load_session_csv
+from ringbuffer import SENSOR_CHANNELS
+from sensor_protocol import FSM_STATES
+
+DEFAULT_FILTERS = "median:5,ema:0.3,baseline"
+PRE_COND = FSM_STATES.index("PRE_COND")
+EMA_MAX_GAIN = 1e3      # batas d^-k dalam satu chunk EMA (presisi ~3 digit hilang)
+
+
+# ===== STAGES =====
+class MovingMedian:
+    """Median kausal `window` sampel terakhir; carry = window-1 input terakhir"""
+
+    name = "median"
+
+    def __init__(self, window=5):
+        self.window = max(1, int(window))
+        self.reset()
+
+    def reset(self):
+        self._carry = None
+
+    def process(self, x, state):
+        w = self.window
+        if w == 1 or not len(x):
+            return x.copy()
+        if self._carry is None:
+            self._carry = np.repeat(x[:1], w - 1, axis=0)   # awal sesi: ulangi sampel pertama
+        ext = np.concatenate([self._carry, x])
+        self._carry = ext[-(w - 1):].copy()
+        return np.median(sliding_window_view(ext, w, axis=0), axis=-1)
+
+    @property
+    def spec(self):
+        return f"median:{self.window}"
+
+
+class ExponentialSmoother:
+    """
+    EMA y_i = y_{i-1} + alpha (x_i - y_{i-1}), divektorisasi per chunk.
+
+    Dalam satu chunk (dimulai pada indeks sampel kelipatan `chunk`, dihitung
+    dari awal sesi) y_{c+r} = d^(r+1) * (y_{c-1} + alpha * sum_j d^-(j+1) x_{c+j})
+    dengan d = 1 - alpha. Jumlah kumulatif dihitung berurutan dengan nilai
+    carry di depan, sehingga hasil per baris identik berapapun ukuran blok.
+    """
+
+    name = "ema"
+
+    def __init__(self, alpha=0.3):
+        alpha = float(alpha)
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError(f"EMA alpha must be in (0, 1], got {alpha}")
+        self.alpha = alpha
+        decay = 1.0 - alpha
+        self.chunk = max(1, int(np.log(EMA_MAX_GAIN) / -np.log(decay))) if decay > 0 else 1
+        steps = np.arange(1, self.chunk + 1)
+        self._scale = (alpha * decay ** -steps)[:, None] if decay > 0 else None
+        self._grow = (decay ** steps)[:, None] if decay > 0 else None
+        self.reset()
+
+    def reset(self):
+        self._y = None      # output terakhir
+        self._s = None      # jumlah kumulatif chunk berjalan
+        self._pos = 0       # posisi dalam chunk
+
+    def process(self, x, state):
+        n = len(x)
+        if self._scale is None or not n:
+            return x.copy()
+        if self._y is None:
+            self._y = x[0].copy()
+        out = np.empty_like(x)
+        i = 0
+        while i < n:
+            pos = self._pos
+            m = min(self.chunk - pos, n - i)
+            s0 = self._y if pos == 0 else self._s
+            cs = np.cumsum(np.concatenate([s0[None], x[i:i + m] * self._scale[pos:pos + m]]), axis=0)[1:]
+            out[i:i + m] = cs * self._grow[pos:pos + m]
+            self._s, self._y = cs[-1], out[i + m - 1].copy()
+            self._pos = (pos + m) % self.chunk
+            i += m
+        return out
+
+    @property
+    def spec(self):
+        return f"ema:{self.alpha:g}"
+
+
+class BaselineSubtract:
+    """
+    x - baseline, baseline = rata-rata input selama run PRE_COND terakhir.
+    Selama PRE_COND baseline = rata-rata berjalan (kausal); setelahnya
+    dibekukan sampai PRE_COND berikutnya. Sebelum PRE_COND pertama
+    (atau file tanpa kolom FSM) data diteruskan apa adanya.
+    """
+
+    name = "baseline"
+
+    def __init__(self, phase=PRE_COND):
+        self.phase = int(phase)
+        self.reset()
+
+    def reset(self):
+        self._sum = None
+        self._count = 0
+        self._base = None
+        self._active = False    # sampel terakhir di dalam fase referensi
+
+    def process(self, x, state):
+        n = len(x)
+        out = x.copy()
+        if not n:
+            return out
+        inside = state == self.phase
+        edges = np.flatnonzero(inside[1:] != inside[:-1]) + 1
+        for a, b in zip(np.r_[0, edges], np.r_[edges, n]):
+            if not inside[a]:
+                self._active = False
+                if self._base is not None:
+                    out[a:b] = x[a:b] - self._base
+                continue
+            if not self._active:
+                self._sum, self._count = np.zeros(x.shape[1]), 0
+            cs = np.cumsum(np.concatenate([self._sum[None], x[a:b]]), axis=0)[1:]
+            base = cs / (self._count + np.arange(1, b - a + 1))[:, None]
+            out[a:b] = x[a:b] - base
+            self._sum, self._count, self._base = cs[-1], self._count + b - a, base[-1]
+            self._active = True
+        return out
+
+    @property
+    def spec(self):
+        return "baseline" if self.phase == PRE_COND else f"baseline:{FSM_STATES[self.phase]}"
+
+
+FILTER_TYPES = {"median": MovingMedian, "ema": ExponentialSmoother, "baseline": BaselineSubtract}
+
+
+def parse_filters(spec):
+    """'median:5,ema:0.3,baseline' -> list stage (kosong / 'none' -> [])"""
+    stages = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item or item.lower() == "none":
+            continue
+        name, _, arg = item.partition(":")
+        cls = FILTER_TYPES.get(name.strip().lower())
+        if cls is None:
+            raise ValueError(f"Unknown filter: {name!r} (expected one of {tuple(FILTER_TYPES)})")
+        if cls is BaselineSubtract and arg and not arg.strip().isdigit():
+            arg = FSM_STATES.index(arg.strip().upper())
+        stages.append(cls(arg) if arg != "" else cls())
+    return stages
+
+
+# ===== CHAIN =====
+class FilterChain:
+    """
+    Rangkaian stage untuk channel sensor. process(block) menerima
+    SensorBlock / dict kolom dan mengembalikan dict kolom baru: channel
+    terfilter, kolom lain (timestamp, state, level, gap) disalin apa adanya.
+    Nilai NaN / inf diganti nilai valid terakhir agar state filter tidak rusak.
+    """
+
+    def __init__(self, stages=DEFAULT_FILTERS, channels=SENSOR_CHANNELS):
+        self.stages = parse_filters(stages) if isinstance(stages, str) else list(stages)
+        self.channels = tuple(channels)
+        self.reset()
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+        self._last = None       # baris valid terakhir (hold untuk NaN)
+        self.samples = 0
+
+    @property
+    def spec(self):
+        return ",".join(stage.spec for stage in self.stages) or "none"
+
+    def _hold_invalid(self, x):
+        ok = np.isfinite(x)
+        if not ok.all():
+            idx = np.where(ok, np.arange(len(x))[:, None], -1)
+            np.maximum.accumulate(idx, axis=0, out=idx)
+            fallback = self._last if self._last is not None else np.zeros(x.shape[1])
+            x = np.where(idx >= 0, x[np.maximum(idx, 0), np.arange(x.shape[1])], fallback)
+        if len(x):
+            self._last = x[-1].copy()
+        return x
+
+    def process(self, block, smoothed=False):
+        """smoothed=True: return (terfilter, terhalus) - terhalus = keluaran sebelum stage baseline"""
+        ts = np.asarray(block["timestamp"])
+        n = len(ts)
+        state = np.asarray(block["state"]) if "state" in block else np.zeros(n)
+        x = np.column_stack([np.asarray(block[ch], dtype=np.float64) for ch in self.channels]) \
+            if n else np.empty((0, len(self.channels)))
+        x = self._hold_invalid(x)
+        smooth = None
+        for stage in self.stages:
+            if stage.name == "baseline" and smooth is None:
+                smooth = x
+            x = stage.process(x, state)
+        self.samples += n
+        out = self._columns(block, x)
+        if smoothed:
+            return out, out if smooth is None else self._columns(block, smooth)
+        return out
+
+    def _columns(self, block, x):
+        columns = block.columns if hasattr(block, "columns") else block
+        out = {name: col for name, col in columns.items() if name not in self.channels}
+        for k, ch in enumerate(self.channels):
+            out[ch] = x[:, k]
+        return out
+
+
+def filter_session(columns, stages=DEFAULT_FILTERS, channels=SENSOR_CHANNELS):
+    """Filter satu sesi utuh (dict kolom) dalam satu blok"""
+    return FilterChain(stages, channels).process(columns)
+
+
+def write_filtered(columns, path, channels=SENSOR_CHANNELS):
+    """Tulis sesi terfilter sebagai CSV (timestamp, channel, state, level)"""
+    fields = ("timestamp",) + tuple(channels) + ("state", "level")
+    table = np.column_stack([np.asarray(columns[f], dtype=np.float64) for f in fields])
+    row = "%d" + ",%.6g" * len(channels) + ",%d,%d"
+    with open(path, "w", newline="") as f:
+        f.write(",".join(fields) + "\n")
+        if len(table):
+            f.write("\n".join([row] * len(table)) % tuple(table.ravel().tolist()) + "\n")
+    return len(table)
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Filter E-Nose sessions (median / EMA / baseline)")
+    parser.add_argument("csv", nargs="+", help="session CSV files")
+    parser.add_argument("--filters", default=DEFAULT_FILTERS, help=f"default {DEFAULT_FILTERS!r}")
+    parser.add_argument("--out", help="write <out>/<name>.csv")
+    parser.add_argument("--check", action="store_true",
+                        help="compare streaming (random block sizes) against offline output")
+    args = parser.parse_args()
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    rng = np.random.default_rng(0)
+    for path in args.csv:
+        columns = load_session_csv(path)
+        out = filter_session(columns, args.filters)
+        name = os.path.basename(path)
+        print(f"🧹 {name}: {len(out['timestamp'])} samples, filters={FilterChain(args.filters).spec}")
+        if args.check:
+            chain = FilterChain(args.filters)
+            n = len(columns["timestamp"])
+            cuts = np.unique(np.r_[0, rng.integers(0, n, size=max(1, n // 20)), n])
+            parts = [chain.process({k: v[a:b] for k, v in columns.items()})
+                     for a, b in zip(cuts[:-1], cuts[1:])]
+            same = all(np.array_equal(np.concatenate([p[ch] for p in parts]), out[ch], equal_nan=True)
+                       for ch in SENSOR_CHANNELS)
+            print(f"   streaming ({len(parts)} blocks) == offline: {'✅' if same else '❌'}")
+        if args.out:
+            write_filtered(out, os.path.join(args.out, name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Bounded handoff queue (receiver thread -> consumer)
+- One producer thread, one consumer thread, no lock on the fast path:
+  deque append / popleft are atomic and every counter has one writer
+- Bounded capacity; when full the policy decides what happens:
+    never_drop       producer waits (backpressure to the socket), lossless
+    coalesce_latest  only the newest item is kept (display-only consumers)
+    drop_oldest      the oldest item is discarded
+- The consumer is woken once per empty -> non-empty transition (put()
+  returns True), so at most one wake-up is in flight instead of one
+  queued Qt signal per block
+- Counters: put, taken, dropped, high water, producer waits / wait time
+- put_async(): same policies for a producer inside an asyncio loop (waits
+  without blocking the loop)
+
+Usage:
+    python handoff.py --policy drop_oldest --capacity 64 --stall 2
+    python handoff.py --policy never_drop --items 5000
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from collections import deque
+
+NEVER_DROP = "never_drop"
+COALESCE_LATEST = "coalesce_latest"
+DROP_OLDEST = "drop_oldest"
+POLICIES = (NEVER_DROP, COALESCE_LATEST, DROP_OLDEST)
+WAIT_SLICE_S = 0.05     # producer never_drop: cek stop tiap interval ini
+
+
+# ===== QUEUE =====
+class HandoffQueue:
+    """
+    Antrean SPSC berkapasitas tetap. put() dari thread producer,
+    drain() dari thread consumer. coalesce_latest selalu berkapasitas 1.
+
+    dropped = put - taken - depth (tepat saat kedua sisi diam; counter
+    tidak perlu lock karena masing-masing hanya ditulis satu thread).
+    """
+
+    def __init__(self, capacity=256, policy=NEVER_DROP):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown handoff policy: {policy!r} (expected one of {POLICIES})")
+        self.policy = policy
+        self.capacity = 1 if policy == COALESCE_LATEST else max(1, int(capacity))
+        bounded = None if policy == NEVER_DROP else self.capacity
+        self._items = deque(maxlen=bounded)   # maxlen: append membuang item tertua
+        self._space = threading.Event()       # consumer -> producer yang menunggu
+        self._armed = True                    # consumer siap dibangunkan
+        self.put_count = 0      # producer
+        self.high_water = 0     # producer
+        self.waits = 0          # producer: berapa kali menunggu (never_drop)
+        self.wait_s = 0.0       # producer: total waktu menunggu
+        self.taken = 0          # consumer
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def depth(self):
+        return len(self._items)
+
+    @property
+    def dropped(self):
+        return max(0, self.put_count - self.taken - len(self._items))
+
+    # ----- producer -----
+    def put(self, item, stop=None):
+        """
+        Masukkan item. Return True jika consumer perlu dibangunkan.
+        never_drop + penuh: tunggu sampai ada ruang atau stop.is_set()
+        (item dibuang, return False).
+        """
+        items = self._items
+        if self.policy == NEVER_DROP and len(items) >= self.capacity:
+            t0 = time.perf_counter()
+            self.waits += 1
+            while len(items) >= self.capacity:
+                if stop is not None and stop.is_set():
+                    self.wait_s += time.perf_counter() - t0
+                    return False
+                self._space.clear()
+                if len(items) < self.capacity:
+                    break
+                self._space.wait(WAIT_SLICE_S)
+            self.wait_s += time.perf_counter() - t0
+        items.append(item)
+        self.put_count += 1
+        depth = len(items)
+        if depth > self.high_water:
+            self.high_water = depth
+        if self._armed:
+            self._armed = False
+            return True
+        return False
+
+    async def put_async(self, item, stop=None):
+        """put() untuk producer di event loop asyncio: menunggu ruang tanpa memblokir loop"""
+        items = self._items
+        if self.policy == NEVER_DROP and len(items) >= self.capacity:
+            t0 = time.perf_counter()
+            self.waits += 1
+            while len(items) >= self.capacity:
+                if stop is not None and stop.is_set():
+                    self.wait_s += time.perf_counter() - t0
+                    return False
+                await asyncio.sleep(WAIT_SLICE_S / 10)
+            self.wait_s += time.perf_counter() - t0
+        return self.put(item)   # satu producer: ruang tidak bisa hilang lagi
+
+    # ----- consumer -----
+    def drain(self, max_items=None):
+        """Ambil item (tertua dulu), paling banyak max_items. Consumer dipersenjatai ulang"""
+        self._armed = True
+        items = self._items
+        out = []
+        limit = len(items) if max_items is None else min(max_items, len(items))
+        for _ in range(limit):
+            try:
+                out.append(items.popleft())
+            except IndexError:
+                break
+        self.taken += len(out)
+        if out and self.policy == NEVER_DROP:
+            self._space.set()
+        return out
+
+    def stats(self):
+        return {"policy": self.policy, "capacity": self.capacity, "depth": self.depth,
+                "put": self.put_count, "taken": self.taken, "dropped": self.dropped,
+                "high_water": self.high_water, "waits": self.waits, "wait_s": self.wait_s}
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a stalled consumer behind a handoff queue")
+    parser.add_argument("--policy", choices=POLICIES, default=NEVER_DROP)
+    parser.add_argument("--capacity", type=int, default=64)
+    parser.add_argument("--items", type=int, default=2000, help="items produced")
+    parser.add_argument("--rate", type=float, default=1000.0, help="producer items/s")
+    parser.add_argument("--stall", type=float, default=1.0, help="consumer stall at start (s)")
+    args = parser.parse_args()
+
+    queue = HandoffQueue(args.capacity, args.policy)
+    wake = threading.Event()
+    stop = threading.Event()
+
+    def produce():
+        for i in range(args.items):
+            if queue.put(i, stop):
+                wake.set()
+            time.sleep(1.0 / args.rate)
+        wake.set()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    t0 = time.perf_counter()
+    producer.start()
+    time.sleep(args.stall)
+    received, wakeups = [], 0
+    while producer.is_alive() or queue.depth:
+        if wake.wait(0.1):
+            wake.clear()
+            wakeups += 1
+        received.extend(queue.drain())
+    producer.join()
+    received.extend(queue.drain())
+
+    s = queue.stats()
+    in_order = all(a < b for a, b in zip(received, received[1:]))
+    lossless = received == list(range(args.items))
+    print(f"🔀 {args.policy} (capacity {queue.capacity}): {args.items} produced in "
+          f"{time.perf_counter() - t0:.2f} s, {len(received)} received, {wakeups} wake-ups")
+    print(f"   dropped {s['dropped']} · high water {s['high_water']} · producer waits {s['waits']} "
+          f"({s['wait_s']:.2f} s)")
+    print(f"   in order: {'✅' if in_order else '❌'} · lossless: {'✅' if lossless else '—'}")
+
+
+if __name__ == "__main__":
+    main()
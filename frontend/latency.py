@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - End-to-end latency / throughput instrumentation
+- Each block carries wall-clock stamps (ms): receipt (timestamp column,
+  per sample), parsed, dequeued by the GUI thread, buffered, drawn
+- Stage latencies go into fixed log-spaced histograms (p50 / p95 / p99,
+  O(1) per sample), plus queue depth, samples/s, frame time and the
+  parser's malformed / dropped line counters
+- Receiver handoff queue counters per queue (record / display: depth,
+  dropped, producer waits)
+- Disabled by default: then nothing is stamped or recorded
+- Export to JSON (summary, histograms, per-block records) for offline
+  analysis; this CLI prints an exported file
+
+Usage:
+    python main.py --latency --latency-out data/latency.json
+    python latency.py data/latency.json
+"""
+
+import argparse
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+# Interval yang diukur: (nama, stamp awal, stamp akhir)
+STAGES = (
+    ("batch_parse", "received", "parsed"),    # tunggu batch di receiver + parse
+    ("queue", "parsed", "dequeued"),          # antrean signal Qt -> thread GUI
+    ("ingest", "dequeued", "buffered"),       # journal + buffer + LOD + fitur
+    ("render", "buffered", "drawn"),          # sampai frame pertama yang menggambar
+    ("end_to_end", "received", "drawn"),
+)
+HIST_BINS = np.logspace(-3, 5, 321)   # 1 us .. 100 s (ms), 40 bin per dekade
+PERCENTILES = (50, 95, 99)
+RECENT_BLOCKS = 20000                 # record per blok yang disimpan untuk export
+RATE_WINDOW_S = 5.0
+PENDING_MAX = 4096                    # blok menunggu frame; lebih dari ini dihitung tidak tergambar
+
+
+def now_ms():
+    return time.time() * 1000.0
+
+
+# ===== HISTOGRAM =====
+class LatencyHistogram:
+    """Histogram log (ms) dengan count, min, max dan persentil dari bin"""
+
+    def __init__(self, edges=HIST_BINS):
+        self.edges = edges
+        self.reset()
+
+    def reset(self):
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, values):
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.counts += np.bincount(np.searchsorted(self.edges, values), minlength=len(self.counts))
+        self.n += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def percentile(self, q):
+        """Batas atas bin yang memuat persentil q (resolusi ~6%)"""
+        if not self.n:
+            return None
+        i = int(np.searchsorted(np.cumsum(self.counts), q / 100.0 * self.n))
+        if i >= len(self.edges):
+            return self.max
+        return float(min(self.edges[i], self.max))
+
+    def summary(self):
+        out = {"count": self.n,
+               "mean": self.total / self.n if self.n else None,
+               "min": self.min if self.n else None,
+               "max": self.max if self.n else None}
+        for q in PERCENTILES:
+            out[f"p{q}"] = self.percentile(q)
+        return out
+
+
+# ===== TRACKER =====
+class LatencyTracker:
+    """
+    Pengumpul stamp dan statistik. Dipanggil dari thread receiver
+    (stamp_parsed, blok dikirim) dan thread GUI (sisanya); counter tiap
+    sisi hanya ditulis oleh satu thread.
+
+    Semua method langsung kembali jika enabled False.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.drawing = True       # False: tidak ada frame (jendela tersembunyi), stamps tidak ditahan
+        self.hist = {name: LatencyHistogram() for name, _, _ in STAGES}
+        self.hist["frame"] = LatencyHistogram()
+        self.reset()
+
+    def reset(self):
+        for h in self.hist.values():
+            h.reset()
+        self.emitted = 0          # blok dikirim receiver (thread receiver)
+        self.consumed = 0         # blok diproses GUI
+        self.max_queue = 0
+        self.samples = 0
+        self.frames = 0
+        self.started = time.monotonic()
+        self._pending = []        # stamps blok yang sudah di buffer, belum tergambar
+        self.undrawn = 0          # blok yang tidak pernah tergambar (jendela tersembunyi / cap)
+        self._rate = deque()      # (monotonic, n sampel) untuk samples/s
+        self.records = deque(maxlen=RECENT_BLOCKS)
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = bool(enabled)
+
+    @property
+    def queue_depth(self):
+        return max(0, self.emitted - self.consumed)
+
+    # ----- stamps -----
+    def stamp_parsed(self, block):
+        """Thread receiver: blok selesai di-parse, akan dikirim ke GUI"""
+        if not self.enabled:
+            return
+        block.stamps = {"parsed": now_ms()}
+        self.emitted += 1
+
+    def stamp_dequeued(self, block):
+        """Thread GUI: handler blok mulai jalan"""
+        if not self.enabled or block.stamps is None:
+            return
+        block.stamps["dequeued"] = now_ms()
+        self.consumed += 1
+        self.max_queue = max(self.max_queue, self.queue_depth + 1)
+
+    def stamp_buffered(self, block):
+        """Thread GUI: blok sudah masuk journal / buffer"""
+        if not self.enabled or block.stamps is None:
+            return
+        stamps = block.stamps
+        stamps["buffered"] = now_ms()
+        received = np.asarray(block["timestamp"], dtype=np.float64)
+        received = received[block.valid] if block.valid is not None else received
+        # Stamp replay = waktu rekaman (bisa di depan jam dinding saat speed > 1): batasi ke parse
+        stamps["received"] = np.minimum(received, stamps.get("parsed", np.inf))
+        stamps["queue_depth"] = self.queue_depth
+        n = len(received)
+        self.samples += n
+        t = time.monotonic()
+        self._rate.append((t, n))
+        while self._rate and self._rate[0][0] < t - RATE_WINDOW_S:
+            self._rate.popleft()
+        if not self.drawing:
+            self.undrawn += 1
+            return
+        if len(self._pending) >= PENDING_MAX:
+            del self._pending[:len(self._pending) - PENDING_MAX + 1]
+            self.undrawn += 1
+        self._pending.append(stamps)   # hanya stamps, bukan kolom blok
+
+    def frame_drawn(self, frame_ms):
+        """Thread GUI: satu frame selesai; semua blok pending tergambar di frame ini"""
+        if not self.enabled:
+            return
+        self.frames += 1
+        self.hist["frame"].add(frame_ms)
+        if not self._pending:
+            return
+        drawn = now_ms()
+        for stamps in self._pending:
+            stamps["drawn"] = drawn
+            for name, a, b in STAGES:
+                self.hist[name].add(stamps[b] - stamps[a])
+            received = stamps["received"]
+            self.records.append((
+                float(received.min()) if len(received) else np.nan, stamps["parsed"],
+                stamps["dequeued"], stamps["buffered"], drawn, len(received),
+                stamps["queue_depth"]))
+        self._pending = []
+
+    def set_drawing(self, drawing):
+        """Jendela tersembunyi: blok pending tidak akan tergambar, jangan ditahan"""
+        self.drawing = bool(drawing)
+        if not self.drawing:
+            self.undrawn += len(self._pending)
+            self._pending = []
+
+    # ----- report -----
+    @property
+    def samples_per_s(self):
+        if not self._rate:
+            return 0.0
+        span = max(time.monotonic() - self._rate[0][0], 1e-3)
+        return sum(n for _, n in self._rate) / max(span, 1.0)
+
+    def summary(self, parse_stats=None, malformed=None, handoff=None):
+        out = {name: h.summary() for name, h in self.hist.items()}
+        out["counters"] = {
+            "samples": self.samples,
+            "frames": self.frames,
+            "samples_per_s": self.samples_per_s,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue,
+            "undrawn_blocks": self.undrawn,
+            "uptime_s": time.monotonic() - self.started,
+        }
+        if parse_stats is not None:
+            out["counters"].update({f"parse_{k}": v for k, v in parse_stats.as_dict().items()})
+        if malformed is not None:
+            out["counters"]["malformed_ingested"] = malformed
+        if handoff is not None:
+            # handoff: {nama antrean: HandoffQueue.stats()}. Blok yang dibuang antrean
+            # tampilan tidak pernah di-dequeue: pakai depth antrean itu
+            shown = handoff.get("display")
+            if shown is not None:
+                out["counters"]["queue_depth"] = shown["depth"]
+                out["counters"]["max_queue_depth"] = shown["high_water"]
+            for name, stats in handoff.items():
+                out["counters"].update({f"rx_{name}_{k}": v for k, v in stats.items()})
+        return out
+
+    def overlay_text(self, parse_stats=None, malformed=None, handoff=None):
+        """Teks ringkas untuk overlay debug"""
+        s = self.summary(parse_stats, malformed, handoff)
+
+        def ms(v):
+            return "-" if v is None else (f"{v:.2f}" if v < 10 else f"{v:.0f}")
+
+        lines = [f"{'stage':<11}{'p50':>8}{'p95':>8}{'p99':>8}  ms"]
+        for name in [n for n, _, _ in STAGES] + ["frame"]:
+            h = s[name]
+            lines.append(f"{name:<11}{ms(h['p50']):>8}{ms(h['p95']):>8}{ms(h['p99']):>8}")
+        c = s["counters"]
+        lines.append(f"rate {c['samples_per_s']:.1f} samples/s · queue {c['queue_depth']} "
+                     f"(max {c['max_queue_depth']}) · frames {c['frames']}")
+        if parse_stats is not None:
+            lines.append(f"malformed {c['parse_malformed']} · dropped {c['parse_overflows']} "
+                         f"· ignored {c['parse_ignored']}")
+        for name in handoff or ():
+            p = f"rx_{name}_"
+            lines.append(f"{name} {c[p + 'policy']} {c[p + 'depth']}/{c[p + 'capacity']} "
+                         f"· dropped {c[p + 'dropped']} · waits {c[p + 'waits']} ({c[p + 'wait_s']:.1f} s)")
+        return "\n".join(lines)
+
+    def export(self, path, parse_stats=None, malformed=None, handoff=None):
+        """Tulis ringkasan, histogram dan record per blok (kolom) ke JSON"""
+        fields = ("received", "parsed", "dequeued", "buffered", "drawn", "samples", "queue_depth")
+        records = list(self.records)
+        doc = {
+            "summary": self.summary(parse_stats, malformed, handoff),
+            "histogram_edges_ms": HIST_BINS.tolist(),
+            "histograms": {name: h.counts.tolist() for name, h in self.hist.items()},
+            "blocks": {f: [r[i] for r in records] for i, f in enumerate(fields)},
+        }
+        with open(path, "w") as f:
+            json.dump(doc, f, separators=(",", ":"))
+        return len(records)
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Print an exported latency report")
+    parser.add_argument("json", nargs="+", help="files written by LatencyTracker.export()")
+    args = parser.parse_args()
+
+    for path in args.json:
+        with open(path) as f:
+            doc = json.load(f)
+        s = doc["summary"]
+        print(f"⏱️ {path}: {s['counters']['samples']} samples, {s['counters']['frames']} frames, "
+              f"{len(doc['blocks']['parsed'])} block records")
+        print(f"   {'stage':<11}" + "".join(f"{k:>9}" for k in ("count", "p50", "p95", "p99", "max")))
+        for name in [n for n, _, _ in STAGES] + ["frame"]:
+            h = s[name]
+            print(f"   {name:<11}{h['count']:>9}" + "".join(
+                f"{'-':>9}" if h[k] is None else f"{h[k]:>9.2f}" for k in ("p50", "p95", "p99", "max")))
+        for key, value in s["counters"].items():
+            print(f"   {key}: {value:.6g}" if isinstance(value, float) else f"   {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
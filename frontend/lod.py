@@ -0,0 +1,182 @@
+"""
+Electronic Nose - Level-of-detail (min/max pyramid) for whole-session plots
+- Raw samples kept in a growable columnar array (level 0)
+- Level k stores min/max per bin of factor**k samples, updated incrementally
+- render() returns a bounded number of points for any index range,
+  keeping peaks that plain stride subsampling would drop
+- Timestamps kept next to the raw samples (non-decreasing), so a time
+  window maps to an index range with one binary search
+"""
+
+import math
+
+import numpy as np
+
+from ringbuffer import SENSOR_CHANNELS
+
+DEFAULT_PERIOD_MS = 250.0   # timestamp pengganti jika kolom timestamp tidak ada
+
+
+# ===== MIN/MAX PYRAMID =====
+class MinMaxPyramid:
+    """
+    Piramida min/max multi-resolusi untuk seluruh sesi.
+
+    Level 0 = data mentah. Level k (k >= 1) = min dan max tiap bin berisi
+    factor**k sampel. extend() hanya menghitung ulang bin yang tersentuh
+    sampel baru (bin terakhir yang masih parsial + bin baru), sehingga
+    biaya per sampel ~O(jumlah level).
+
+    Timestamp (ms) disimpan tidak menurun: timestamp yang mundur / NaN
+    diganti timestamp sebelumnya, sehingga index_range() cukup searchsorted.
+    """
+
+    def __init__(self, channels=SENSOR_CHANNELS, factor=4, capacity=4096):
+        if factor < 2:
+            raise ValueError("factor must be >= 2")
+        self.channels = tuple(channels)
+        self._index = {name: i for i, name in enumerate(self.channels)}
+        self.factor = factor
+        self._capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self.n = 0
+        self._raw = np.empty((len(self.channels), self._capacity), dtype=np.float64)
+        self._t = np.empty((1, self._capacity), dtype=np.float64)
+        self._mins = []   # level k disimpan di index k-1
+        self._maxs = []
+        self.generation = getattr(self, "generation", -1) + 1
+
+    @property
+    def version(self):
+        return (self.generation, self.n)
+
+    @property
+    def levels(self):
+        return len(self._mins)
+
+    def __len__(self):
+        return self.n
+
+    # ----- write -----
+    @staticmethod
+    def _grow(arr, needed):
+        if arr.shape[1] >= needed:
+            return arr
+        cap = max(needed, 2 * arr.shape[1], 16)
+        out = np.empty((arr.shape[0], cap), dtype=arr.dtype)
+        out[:, :arr.shape[1]] = arr
+        return out
+
+    def append(self, sample):
+        columns = {name: [sample.get(name) or 0.0] for name in self.channels}
+        if sample.get("timestamp") is not None:
+            columns["timestamp"] = [sample["timestamp"]]
+        self.extend(columns, 1)
+
+    def extend(self, columns, n=None):
+        """Tambah banyak sampel dari dict channel -> array"""
+        if n is None:
+            n = len(next(iter(columns.values()))) if columns else 0
+        if n == 0:
+            return
+        old_n = self.n
+        self._raw = self._grow(self._raw, old_n + n)
+        for name, i in self._index.items():
+            col = columns.get(name)
+            self._raw[i, old_n:old_n + n] = col if col is not None else 0.0
+        self._t = self._grow(self._t, old_n + n)
+        last = self._t[0, old_n - 1] if old_n else -np.inf
+        ts = columns.get("timestamp")
+        if ts is None:
+            start = last + DEFAULT_PERIOD_MS if old_n else 0.0
+            ts = start + np.arange(n) * DEFAULT_PERIOD_MS
+        ts = np.asarray(ts, dtype=np.float64)
+        ts = np.where(np.isfinite(ts), ts, -np.inf)
+        np.maximum.accumulate(np.maximum(ts, last), out=self._t[0, old_n:old_n + n])
+        self.n = old_n + n
+        self._update_levels(old_n)
+
+    def _update_levels(self, start):
+        f = self.factor
+        lo_min = lo_max = self._raw
+        lo_n = self.n
+        k = 0
+        while lo_n > 1:
+            b0 = start // f
+            b1 = -(-lo_n // f)
+            if k == len(self._mins):
+                shape = (len(self.channels), max(b1, 16))
+                self._mins.append(np.empty(shape))
+                self._maxs.append(np.empty(shape))
+            self._mins[k] = mins = self._grow(self._mins[k], b1)
+            self._maxs[k] = maxs = self._grow(self._maxs[k], b1)
+
+            offsets = np.arange(0, lo_n - b0 * f, f)
+            mins[:, b0:b1] = np.minimum.reduceat(lo_min[:, b0 * f:lo_n], offsets, axis=1)
+            maxs[:, b0:b1] = np.maximum.reduceat(lo_max[:, b0 * f:lo_n], offsets, axis=1)
+
+            lo_min, lo_max, lo_n, start = mins, maxs, b1, b0
+            k += 1
+
+    # ----- read -----
+    def raw(self, name):
+        """View data mentah seluruh sesi untuk satu channel"""
+        return self._raw[self._index[name], :self.n]
+
+    @property
+    def timestamps(self):
+        """View timestamp (ms, tidak menurun) seluruh sesi"""
+        return self._t[0, :self.n]
+
+    def index_range(self, t0=None, t1=None):
+        """Rentang index [i0, i1) untuk timestamp t0 <= t <= t1 (binary search, O(log n))"""
+        ts = self._t[0, :self.n]
+        i0 = 0 if t0 is None else int(np.searchsorted(ts, t0, side="left"))
+        i1 = self.n if t1 is None else int(np.searchsorted(ts, t1, side="right"))
+        return i0, max(i0, i1)
+
+    def level_for(self, span, max_points):
+        """Level terkecil yang menampilkan `span` sampel dalam <= max_points titik"""
+        if span <= max_points:
+            return 0
+        bins = max(1, max_points // 2)
+        k = math.ceil(math.log(span / bins, self.factor))
+        return min(max(k, 1), self.levels)
+
+    def render(self, name, i0=0, i1=None, max_points=4000, time=False):
+        """
+        Return (x, y) untuk rentang index [i0, i1) dengan paling banyak
+        ~max_points titik. Di atas level 0, tiap bin menjadi dua titik
+        (min lalu max) sehingga puncak tetap terlihat. time=True: x berupa
+        timestamp (ms) alih-alih index sampel.
+        """
+        n = self.n
+        i1 = n if i1 is None else min(n, int(math.ceil(i1)))
+        i0 = max(0, int(math.floor(i0)))
+        if i1 <= i0:
+            return np.empty(0), np.empty(0)
+        c = self._index[name]
+
+        k = self.level_for(i1 - i0, max_points)
+        if k == 0:
+            x = self._t[0, i0:i1] if time else np.arange(i0, i1, dtype=np.float64)
+            return x, self._raw[c, i0:i1]
+
+        size = self.factor ** k
+        b0 = i0 // size
+        b1 = -(-i1 // size)
+        mins = self._mins[k - 1][c, b0:b1]
+        maxs = self._maxs[k - 1][c, b0:b1]
+
+        starts = np.arange(b0, b1, dtype=np.float64) * size
+        x = np.empty(2 * len(starts))
+        x[0::2] = starts
+        x[1::2] = np.minimum(starts + size / 2.0, n - 1)
+        if time:
+            x = self._t[0, x.astype(np.int64)]
+        y = np.empty(2 * len(starts))
+        y[0::2] = mins
+        y[1::2] = maxs
+        return x, y
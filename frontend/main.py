@@ -9,11 +9,12 @@ Electronic Nose GUI - v7 Professional Dashboard Theme
 
 import sys
 import time
+import argparse
 import os
 import csv
 import json
 import socket
-import requests
+import threading
 from datetime import datetime
 from collections import deque
 from PyQt6 import QtWidgets, QtCore, QtGui
@@ -21,17 +22,46 @@ from PyQt6.QtWidgets import QMessageBox, QProgressDialog
 from PyQt6.QtCore import Qt, pyqtSignal, QObject, QThread
 from PyQt6.QtGui import QFont, QLinearGradient, QColor, QPalette
 import pyqtgraph as pg
+import numpy as np
 
-# ===== EDGE IMPULSE CONFIGURATION =====
-EI_API_URL = "https://ingestion.edgeimpulse.com"
-EI_API_KEY = "ei_4ab099b49f2becd6bb6ce8b3ab59de6c83b6ee70a451aaca"
-EI_PROJECT_ID = "821850"
+from ringbuffer import SENSOR_CHANNELS
+from plot_refresh import TIME_WINDOWS, PlotRefresher
+from render_scheduler import RENDER_MAX_FPS, RenderScheduler
+from acquisition import (
+    FEATURE_SOURCES, TCP_DATA_HOST, TCP_DATA_PORT,
+    AcquisitionEngine, ReplaySource, TCPSource,
+)
+from ei_upload import UploadQueue
+from multi_device import AsyncMultiReceiver, make_engines, parse_device_spec
+from session_recorder import JOURNAL_PREFIX, ExportCancelled, SessionRecorder, export_session_json
+from segmentation import segment_file
+from classifier import LiveClassifier, load_or_train
+from filters import DEFAULT_FILTERS
+from handoff import DROP_OLDEST, NEVER_DROP, POLICIES, HandoffQueue
+from latency import LatencyTracker
+from running_stats import STAT_NAMES
+from sensor_protocol import parse_sensor_data
 
-# ===== BACKEND CONFIGURATION =====
-TCP_DATA_HOST = "127.0.0.1"
-TCP_DATA_PORT = 8083
-TCP_CMD_HOST = "127.0.0.1"
-TCP_CMD_PORT = 8082
+# ===== RECEIVER BATCHING =====
+RX_BATCHED = True            # False = legacy: satu signal per baris SENSOR:
+RX_BATCH_INTERVAL_MS = 50    # kirim blok paling lambat tiap interval ini
+RX_BATCH_MAX = 256           # atau saat jumlah sampel mencapai batas ini
+RX_RECORD_ITEMS = 4096       # antrean rekaman (never_drop): penuh -> receiver menunggu, tidak ada yang hilang
+RX_DISPLAY_ITEMS = 64        # antrean tampilan (buffer / plot / fitur), ~3 s blok 50 ms
+RX_DISPLAY_POLICY = DROP_OLDEST
+RX_DRAIN_MAX = 32            # item tampilan per giliran handler GUI, sisanya di giliran berikutnya
+
+# ===== SESSION STORAGE =====
+DATA_DIR = "data"
+
+# ===== UPLOAD WINDOWS (segmentation.py) =====
+UPLOAD_SPLITS = (
+    ("Whole Session", "session"),
+    ("Per Motor Level", "level"),
+    ("Per FSM Phase", "phase"),
+    ("Sliding 30 s", "sliding"),
+)
+UPLOAD_WINDOW_S = 30.0
 
 # ===== PROFESSIONAL COLOR SCHEME =====
 COLORS = {
@@ -79,175 +109,149 @@ SENSOR_COLORS = {
     "co_gm": "#3b82f6",     # Blue
 }
 
-# ===== TCP RECEIVER THREAD =====
+# ===== STREAM BRIDGE (acquisition source -> Qt signals) =====
+def make_record_queue():
+    return HandoffQueue(RX_RECORD_ITEMS, NEVER_DROP)
+
+
+def make_display_queue(policy=RX_DISPLAY_POLICY, capacity=RX_DISPLAY_ITEMS):
+    return HandoffQueue(capacity, policy)
+
+
 class TCPReceiver(QObject):
-    data_received = pyqtSignal(str)
+    """
+    Jalankan stream source acquisition.py di QThread. Setiap blok masuk dua
+    HandoffQueue: record_queue (never_drop: journal lossless, receiver
+    menunggu jika penuh) dan display_queue (policy: buffer / plot boleh
+    membuang blok saat GUI tertinggal). Mode legacy: baris SENSOR: hanya
+    lewat record_queue. `ready` hanya dikirim saat antrean berubah dari
+    kosong, jadi backlog signal Qt tidak pernah tumbuh walau thread GUI macet.
+    """
+    ready = pyqtSignal()
     status_changed = pyqtSignal(str)
     
+    def __init__(self, source=None, batched=RX_BATCHED, display_queue=None):
+        super().__init__()
+        if source is None:
+            interval = RX_BATCH_INTERVAL_MS / 1000.0 if batched else 0
+            source = TCPSource(TCP_DATA_HOST, TCP_DATA_PORT, interval, RX_BATCH_MAX)
+        self.source = source
+        self.source.on_status = self.status_changed.emit
+        self.batched = batched
+        self.record_queue = make_record_queue()
+        self.display_queue = display_queue if display_queue is not None else make_display_queue()
+        self.latency = None   # LatencyTracker (diset MainWindow), stamp setelah parse
+        self._stop = threading.Event()
+    
+    @property
+    def stats(self):
+        return self.source.stats
+    
+    def stop(self):
+        self._stop.set()
+    
     def run(self):
         try:
-            self.status_changed.emit(f"📡 Connecting to Rust: {TCP_DATA_HOST}:{TCP_DATA_PORT}...")
-            
-            while True:
-                try:
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.connect((TCP_DATA_HOST, TCP_DATA_PORT))
-                    self.status_changed.emit(f"🟢 Connected to Rust: {TCP_DATA_HOST}:{TCP_DATA_PORT}")
-                    
-                    with sock.makefile('r') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line.startswith("SENSOR:"):
-                                self.data_received.emit(line)
-                except ConnectionRefusedError:
-                    self.status_changed.emit(f"⚠️ Cannot connect to Rust. Make sure backend is running on {TCP_DATA_HOST}:{TCP_DATA_PORT}")
-                    time.sleep(2)
-                except Exception as e:
-                    self.status_changed.emit(f"⚠️ Connection error: {e}")
-                    time.sleep(2)
+            if self.batched:
+                for block in self.source.blocks(self._stop):
+                    if self.latency is not None:
+                        self.latency.stamp_parsed(block)
+                    self.push(block.compress())
+            else:
+                for lines, _ in self.source.line_batches(self._stop):
+                    for line in lines:
+                        if line.startswith(b"SENSOR:"):
+                            self.push(line.decode(), display=False)
         except Exception as e:
-            self.status_changed.emit(f"❌ TCP Error: {e}")
+            self.status_changed.emit(f"❌ Stream error: {e}")
+    
+    def push(self, item, display=True):
+        """Thread receiver: rekaman dulu (bisa menunggu), lalu tampilan; bangunkan GUI jika perlu"""
+        wake = self.record_queue.put(item, self._stop)
+        if self._stop.is_set():
+            return
+        if display:
+            wake = self.display_queue.put(item, self._stop) or wake
+        if wake:
+            self.ready.emit()
 
-# ===== PARSE SENSOR DATA =====
-def parse_sensor_data(line: str) -> dict:
-    if not line.startswith("SENSOR:"):
-        return None
+class ReplayReceiver(TCPReceiver):
+    """Putar ulang CSV rekaman lewat pipeline yang sama dengan TCPReceiver"""
     
-    try:
-        data_str = line[7:]
-        parts = data_str.split(',')
-        
-        if len(parts) < 9:
-            return None
-        
-        def parse_f(s):
-            try:
-                return float(s.strip())
-            except:
-                return 0.0
-        
-        def parse_i(s):
-            try:
-                return int(s.strip())
-            except:
-                return 0
-        
-        data = {
-            "no2": parse_f(parts[0]),
-            "eth_gm": parse_f(parts[1]),
-            "voc_gm": parse_f(parts[2]),
-            "co_gm": parse_f(parts[3]),
-            "co_m": parse_f(parts[4]),
-            "eth_m": parse_f(parts[5]),
-            "voc_m": parse_f(parts[6]),
-            "state": parse_i(parts[7]),
-            "level": parse_i(parts[8]),
-            "timestamp": int(time.time() * 1000),
-        }
-        
-        data["c2h50h_gm"] = data["eth_gm"]
-        return data
-    except:
-        return None
+    def __init__(self, csv_path, speed=1.0, loop=False, batched=RX_BATCHED, display_queue=None):
+        super().__init__(ReplaySource(csv_path, speed, loop, RX_BATCH_INTERVAL_MS / 1000.0,
+                                      RX_BATCH_MAX), batched, display_queue)
 
-# ===== EDGE IMPULSE UPLOADER WORKER (FIXED - MULTIPART CSV UPLOAD) =====
-class EdgeImpulseUploader(QObject):
-    upload_progress = pyqtSignal(str)
-    upload_finished = pyqtSignal(bool, str)
+# ===== MULTI-DEVICE BRIDGE (asyncio receiver -> Qt) =====
+class MultiDeviceReceiver(QObject):
+    """
+    Semua rig dalam satu event loop asyncio; batch {device: SensorBlock}
+    lewat record_queue + display_queue seperti TCPReceiver. push() adalah
+    coroutine: menunggu ruang tanpa memblokir event loop (device lain tetap
+    jalan, device berhenti membaca socket jika antriannya penuh).
+    """
+    ready = pyqtSignal()
+    status_changed = pyqtSignal(str)
     
-    def upload_csv(self, csv_file: str, label: str, sample_name: str):
-        """
-        Upload CSV ke Edge Impulse via Ingestion API (multipart/form-data)
-        FIXED: 404 Error - Gunakan ingestion.edgeimpulse.com + label sebagai query param
-        """
+    def __init__(self, devices, display_queue=None):
+        super().__init__()
+        self.source = AsyncMultiReceiver(devices, RX_BATCH_INTERVAL_MS / 1000.0, RX_BATCH_MAX)
+        self.source.on_batch = self.push
+        self.source.on_status = lambda name, msg: self.status_changed.emit(f"[{name}] {msg}")
+        self.record_queue = make_record_queue()
+        self.display_queue = display_queue if display_queue is not None else make_display_queue()
+        self._stop = threading.Event()
+    
+    @property
+    def devices(self):
+        return self.source.devices
+    
+    async def push(self, batch):
+        wake = await self.record_queue.put_async(batch, self._stop)
+        if self._stop.is_set():
+            return
+        wake = await self.display_queue.put_async(batch, self._stop) or wake
+        if wake:
+            self.ready.emit()
+    
+    def stop(self):
+        self._stop.set()
+        self.source.stop()
+    
+    def run(self):
         try:
-            self.upload_progress.emit(f"📖 Reading CSV: {os.path.basename(csv_file)}")
-            
-            with open(csv_file, 'r') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-            
-            if not rows:
-                self.upload_finished.emit(False, "❌ CSV file is empty!")
-                return
-            
-            self.upload_progress.emit(f"🔄 Preparing upload ({len(rows)} samples)...")
-            
-            # FIXED: URL base + endpoint benar (tanpa double path)
-            upload_url = f"{EI_API_URL}/api/training/files"
-            
-            headers = {
-                "x-api-key": EI_API_KEY,
-                "x-label": label,
-                # Content-Type diatur otomatis oleh requests saat pakai 'files'
-            }
-            
-            # Siapkan file untuk multipart
-            file_name = f"{sample_name}.csv"
-            with open(csv_file, 'rb') as f:
-                files = {
-                    "data": (file_name, f, "text/csv")
-                }
-                
-                self.upload_progress.emit(f"📤 Uploading to Edge Impulse...")
-                
-                print(f"\n🔧 Upload Details (FIXED):")
-                print(f"   URL: {upload_url}")
-                print(f"   Label: {label}")
-                print(f"   File: {file_name}")
-                print(f"   Samples: {len(rows)}")
-                print(f"   Content-Type: multipart/form-data")
-                print(f"   Headers: {headers}\n")
-                
-                response = requests.post(
-                    upload_url,
-                    headers=headers,
-                    files=files,
-                    timeout=60  # Naikkan timeout untuk file besar
-                )
-            
-            print(f"   Status Code: {response.status_code}")
-            print(f"   Response: {response.text[:300]}\n")
-            
-            if response.status_code in (200, 201):
-                # Parse response (biasanya JSON dengan 'success': true)
-                try:
-                    resp_json = response.json()
-                    if resp_json.get("success", False):
-                        self.upload_progress.emit("✅ Upload successful!")
-                        message = f"✅ Successfully uploaded to Edge Impulse!\n\n"
-                        message += f"📊 Samples: {len(rows)}\n"
-                        message += f"🏷️  Label: {label}\n"
-                        message += f"📁 Sample Name: {sample_name}\n"
-                        message += f"📋 Format: CSV (Status {response.status_code})\n"
-                        message += f"\n📍 View in Edge Impulse:\n"
-                        message += f"https://studio.edgeimpulse.com/studio/{EI_PROJECT_ID}/data-acquisition"
-                        self.upload_finished.emit(True, message)
-                        return
-                    else:
-                        error_msg = resp_json.get("message", "Upload failed internally")
-                except:
-                    error_msg = "Response not JSON, but status OK"
-                
-                self.upload_finished.emit(False, f"❌ API success but error: {error_msg}")
-            else:
-                error_msg = response.text
-                try:
-                    error_data = response.json()
-                    error_msg = error_data.get("message", error_msg)
-                except:
-                    pass
-                
-                self.upload_finished.emit(False, f"❌ Upload failed (Status {response.status_code}):\n{error_msg}")
-        
-        except FileNotFoundError:
-            self.upload_finished.emit(False, f"❌ File not found: {csv_file}")
-        except requests.exceptions.Timeout:
-            self.upload_finished.emit(False, "❌ Upload timeout - Edge Impulse server lambat")
-        except requests.exceptions.ConnectionError:
-            self.upload_finished.emit(False, "❌ Cannot connect - check internet & API key")
+            self.source.run_forever()
         except Exception as e:
-            self.upload_finished.emit(False, f"❌ Error: {str(e)}")
+            self.status_changed.emit(f"❌ Stream error: {e}")
+
+# ===== SESSION EXPORT WORKER =====
+class SessionExportWorker(QObject):
+    """Export JSON sesi di worker thread (progress + cancel)"""
+    export_progress = pyqtSignal(int, str)
+    export_finished = pyqtSignal(bool, str)
+    
+    def __init__(self, csv_path, json_path, meta):
+        super().__init__()
+        self.csv_path = csv_path
+        self.json_path = json_path
+        self.meta = meta
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def run(self):
+        try:
+            export_session_json(
+                self.csv_path, self.json_path, self.meta,
+                progress=self.export_progress.emit,
+                cancelled=lambda: self._cancelled,
+            )
+            self.export_finished.emit(True, self.json_path)
+        except ExportCancelled:
+            self.export_finished.emit(False, "⏹ Export cancelled")
+        except Exception as e:
+            self.export_finished.emit(False, f"❌ Export error: {e}")
 
 # ===== CUSTOM STATS CARD WIDGET =====
 class StatsCard(QtWidgets.QFrame):
@@ -295,23 +299,36 @@ class StatsCard(QtWidgets.QFrame):
         layout.addWidget(self.value_label)
         
         # Subtitle
-        subtitle_label = QtWidgets.QLabel(subtitle)
-        subtitle_label.setStyleSheet(f"""
+        self.subtitle_label = QtWidgets.QLabel(subtitle)
+        self.subtitle_label.setStyleSheet(f"""
             color: {COLORS['text_light']};
             font-size: 11px;
             font-weight: 500;
         """)
-        layout.addWidget(subtitle_label)
+        layout.addWidget(self.subtitle_label)
     
     def update_value(self, value):
         self.value_label.setText(value)
 
+    def update_subtitle(self, subtitle):
+        self.subtitle_label.setText(subtitle)
+
 # ===== MAIN WINDOW =====
 class MainWindow(QtWidgets.QMainWindow):
     data_signal = pyqtSignal(dict)
     status_signal = pyqtSignal(str)
+    command_sent = pyqtSignal(object, object)     # (engine, CommandResult)
+    command_done = pyqtSignal(object, object)
+    upload_progress = pyqtSignal(object, str)           # (UploadJob, message)
+    upload_retry = pyqtSignal(object, str, object)      # (UploadJob, message, delay / None)
+    upload_finished = pyqtSignal(object, bool, str)
+    classifier_ready = pyqtSignal(object, str)          # (model / None, message)
 
-    def __init__(self):
+    def __init__(self, replay=None, replay_speed=1.0, replay_loop=False, receiver=None,
+                 devices=None, resample_ms=None, filters=DEFAULT_FILTERS, max_fps=RENDER_MAX_FPS,
+                 latency=False, latency_out=None, display_policy=RX_DISPLAY_POLICY,
+                 display_queue=RX_DISPLAY_ITEMS,
+                 features_on="smoothed"):
         super().__init__()
         self.setWindowTitle("Electronic Nose System - Kelompok 5 SPS")
         self.resize(1800, 1000)
@@ -319,13 +336,40 @@ class MainWindow(QtWidgets.QMainWindow):
         # Set clean background
         self.setStyleSheet(f"background: {COLORS['bg_primary']};")
         
-        self.buffers = {
-            "co_m": [], "eth_m": [], "voc_m": [], "no2": [],
-            "c2h50h_gm": [], "voc_gm": [], "co_gm": []
-        }
-        self.maxlen = 200
-        self.csv_rows = []
-        self.sample_count = 0
+        # Stream source: TCP backend, beberapa rig (asyncio), atau replay CSV rekaman
+        if receiver is None:
+            queue = make_display_queue(display_policy, display_queue)
+            if devices:
+                receiver = MultiDeviceReceiver(devices, display_queue=queue)
+            elif replay:
+                receiver = ReplayReceiver(replay, replay_speed, replay_loop, display_queue=queue)
+            else:
+                receiver = TCPReceiver(display_queue=queue)
+        self.receiver = receiver
+        
+        # Instrumentasi latency per tahap (F12 = overlay, Shift+F12 = export)
+        self.latency = LatencyTracker(enabled=latency)
+        self.latency_out = latency_out
+        receiver.latency = self.latency
+        
+        # Inti akuisisi tanpa GUI (acquisition.py): ring buffer, LOD, journal, command.
+        # Mode multi-device: satu engine per rig, journal di data/<device>/
+        # resample_ms: plot / fitur / klasifikasi memakai grid tetap, journal tetap mentah
+        # filters: deret terfilter (median / EMA / baseline) di samping deret mentah;
+        # features_on: fitur per siklus dari deret halus (default), terfilter, atau mentah
+        if not filters or (isinstance(filters, str) and filters.lower() == "none"):
+            filters = None
+        if getattr(receiver, "devices", None):
+            self.engines = make_engines(receiver.devices, DATA_DIR, maxlen=200, lod=True,
+                                        resample_ms=resample_ms, filters=filters, features_on=features_on)
+        else:
+            self.engines = {"": AcquisitionEngine(getattr(receiver, "source", None), DATA_DIR,
+                                                  maxlen=200, lod=True, resample_ms=resample_ms,
+                                                  filters=filters, features_on=features_on)}
+        self.engine = next(iter(self.engines.values()))
+        self.buffers = self.engine.buffers        # window live (timestamp, state, level + 7 channel)
+        self.session_lod = self.engine.lod        # piramida min/max mode "Whole Session"
+        self.recorder = self.engine.recorder      # journal sesi di disk
 
         # Main container
         main_container = QtWidgets.QWidget()
@@ -365,29 +409,121 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tabs.setStyleSheet(self.get_tab_stylesheet())
         self.tabs.addTab(self.create_grid_charts(), "Grid View")
         self.tabs.addTab(self.create_combined_chart(), "Combined View")
+        self.tabs.addTab(self.create_stats_table(), "Statistics")
+        
+        # Refresh engine: satu grup kurva per tab (urutan sama dengan tab)
+        self.plot_refresher = PlotRefresher(self.buffers, lod=self.session_lod)
+        self.plot_refresher.add_group(self.sensor_curves)
+        self.plot_refresher.add_group(self.combined_curves)
+        # Frame hanya dirender jika diminta (data baru / ganti tampilan), maks max_fps
+        self.scheduler = RenderScheduler(self.update_plot, max_fps, self)
+        self.scheduler.on_idle = self.on_render_idle
+        self.tabs.currentChanged.connect(lambda _: self.scheduler.request())
+        
+        # Pilihan mode tampilan: window live / window waktu / seluruh sesi (LOD)
+        self.view_mode = QtWidgets.QComboBox()
+        self.view_mode.addItems([label for label, _ in TIME_WINDOWS])
+        self.view_mode.setStyleSheet(f"""
+            QComboBox {{
+                background: {COLORS['bg_secondary']};
+                color: {COLORS['text_primary']};
+                border: 1px solid {COLORS['border']};
+                border-radius: 6px;
+                padding: 6px 12px;
+                font-size: 12px;
+            }}
+        """)
+        self.view_mode.currentIndexChanged.connect(self.on_view_mode_changed)
+        corner = QtWidgets.QWidget()
+        corner_layout = QtWidgets.QHBoxLayout(corner)
+        corner_layout.setContentsMargins(0, 0, 0, 0)
+        corner_layout.setSpacing(8)
+        
+        # Pilihan rig yang ditampilkan / dikontrol (mode multi-device)
+        if len(self.engines) > 1:
+            self.device_select = QtWidgets.QComboBox()
+            self.device_select.addItems(list(self.engines))
+            self.device_select.setStyleSheet(self.view_mode.styleSheet())
+            self.device_select.currentTextChanged.connect(self.on_device_changed)
+            corner_layout.addWidget(self.device_select)
+        
+        # Pilihan deret: mentah / terfilter (jika filter aktif)
+        self.signal_select = None
+        if self.engine.filtered is not None:
+            self.signal_select = QtWidgets.QComboBox()
+            self.signal_select.addItems(["Raw", "Filtered"])
+            self.signal_select.setToolTip(self.engine.filters.spec)
+            self.signal_select.setStyleSheet(self.view_mode.styleSheet())
+            self.signal_select.currentIndexChanged.connect(lambda _: self.bind_plot_source())
+            corner_layout.addWidget(self.signal_select)
+        corner_layout.addWidget(self.view_mode)
+        self.tabs.setCornerWidget(corner)
+        
+        # Zoom / pan di mode sesi -> render ulang rentang yang terlihat
+        for curve in list(self.sensor_curves.values()) + [self.combined_curves["co_m"]]:
+            curve.getViewBox().sigXRangeChanged.connect(self.on_view_range_changed)
         
         charts_layout.addWidget(self.tabs)
         content_layout.addWidget(charts_container, 1)
         
+        # Overlay debug latency (di atas chart, kanan atas)
+        self.latency_overlay = QtWidgets.QLabel(self.tabs)
+        self.latency_overlay.setStyleSheet("""
+            background: rgba(15, 23, 42, 200);
+            color: #e2e8f0;
+            font-family: Consolas, monospace;
+            font-size: 11px;
+            padding: 8px 10px;
+            border-radius: 6px;
+        """)
+        self.latency_overlay.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.latency_overlay.setVisible(latency)
+        self._overlay_at = 0.0
+        QtGui.QShortcut(QtGui.QKeySequence("F12"), self, activated=self.toggle_latency_overlay)
+        QtGui.QShortcut(QtGui.QKeySequence("Shift+F12"), self, activated=self.export_latency)
+        
         main_layout.addWidget(content_container, 1)
 
         # Signals
         self.data_signal.connect(self.on_data_update)
         self.status_signal.connect(self.on_status_update)
+        self.command_sent.connect(self.on_command_sent)
+        self.command_done.connect(self.on_command_done)
+        
+        # Command channel persisten per engine (thread sender sendiri, ack dari stream)
+        for engine in self.engines.values():
+            engine.on_status = self.status_signal.emit
+            engine.commands.on_sent = lambda r, e=engine: self.command_sent.emit(e, r)
+            engine.commands.on_result = lambda r, e=engine: self.command_done.emit(e, r)
+        
+        # Antrian upload Edge Impulse (spool di disk, lanjut dari run sebelumnya)
+        self.upload_dialogs = {}   # job id -> (progress, csv_path, json_path)
+        self.uploads = UploadQueue(spool_dir=os.path.join(DATA_DIR, ".upload_spool"))
+        self.uploads.on_progress = self.upload_progress.emit
+        self.uploads.on_retry = self.upload_retry.emit
+        self.uploads.on_finished = self.upload_finished.emit
+        self.upload_progress.connect(self.on_upload_progress)
+        self.upload_retry.connect(self.on_upload_retry)
+        self.upload_finished.connect(self.on_upload_finished)
+        self.uploads.start()
+
+        # Klasifikasi lokal: model dimuat / dilatih di background thread
+        self.live_classifier = None
+        self.classifier_ready.connect(self.on_classifier_ready)
+        threading.Thread(target=self.load_classifier, name="ClassifierLoader", daemon=True).start()
 
-        # TCP Receiver
-        self.receiver = TCPReceiver()
+        # Receiver thread -> record / display HandoffQueue -> engine di thread GUI
         self.receiver_thread = QThread()
         self.receiver.moveToThread(self.receiver_thread)
         self.receiver_thread.started.connect(self.receiver.run)
-        self.receiver.data_received.connect(self.handle_sensor_data)
+        self.receiver.ready.connect(self.on_rx_ready)
         self.receiver.status_changed.connect(self.status_signal.emit)
         self.receiver_thread.start()
 
-        # Update timer
-        self.timer = QtCore.QTimer()
-        self.timer.timeout.connect(self.update_plot)
-        self.timer.start(80)
+        # Tawarkan recovery sesi yang terputus (crash / tidak disimpan)
+        QtCore.QTimer.singleShot(0, self.recover_interrupted_sessions)
+
+        self.scheduler.request()
 
     def create_sidebar(self):
         """Create professional sidebar"""
@@ -460,6 +596,16 @@ class MainWindow(QtWidgets.QMainWindow):
         
         layout.addStretch()
         
+        # Statistik render (fps, frame dirender / request dilewati)
+        self.render_label = QtWidgets.QLabel("")
+        self.render_label.setStyleSheet(f"""
+            font-size: 11px;
+            color: {COLORS['text_light']};
+            padding: 8px;
+        """)
+        layout.addWidget(self.render_label)
+        self._render_label_at = 0.0
+        
         # Status indicator
         self.status_label = QtWidgets.QLabel("Initializing...")
         self.status_label.setStyleSheet(f"""
@@ -517,6 +663,22 @@ class MainWindow(QtWidgets.QMainWindow):
         )
         layout.addWidget(self.save_card)
         
+        self.prediction_card = StatsCard(
+            "Prediction",
+            "—",
+            "Loading model...",
+            COLORS['success']
+        )
+        layout.addWidget(self.prediction_card)
+        
+        self.drift_card = StatsCard(
+            "Signal Drift (60 s)",
+            "—",
+            "Waiting for data",
+            COLORS['warning']
+        )
+        layout.addWidget(self.drift_card)
+        
         return container
 
     def create_control_panel(self):
@@ -563,6 +725,32 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ei_label = self.create_sidebar_input("e.g., contohLabel")
         layout.addWidget(self.ei_label)
         
+        # Upload Windows (satu sesi -> banyak sampel training)
+        split_label = QtWidgets.QLabel("Upload Windows")
+        split_label.setStyleSheet(f"""
+            color: rgba(255, 255, 255, 0.9);
+            font-size: 12px;
+            font-weight: 500;
+        """)
+        layout.addWidget(split_label)
+        
+        self.upload_split = QtWidgets.QComboBox()
+        for text, mode in UPLOAD_SPLITS:
+            self.upload_split.addItem(text, mode)
+        self.upload_split.setStyleSheet(f"""
+            QComboBox {{
+                background: rgba(255, 255, 255, 0.1);
+                border: 1px solid rgba(255, 255, 255, 0.2);
+                border-radius: 6px;
+                padding: 10px 12px;
+                font-size: 12px;
+                color: white;
+                font-weight: 500;
+            }}
+        """)
+        self.upload_split.setMinimumHeight(38)
+        layout.addWidget(self.upload_split)
+        
         layout.addSpacing(10)
         
         # Buttons
@@ -778,7 +966,7 @@ class MainWindow(QtWidgets.QMainWindow):
         
         # Clear axis labels
         plot.setLabel('left', 'Value', color=COLORS['text_secondary'], size='10pt')
-        plot.setLabel('bottom', 'Samples', color=COLORS['text_secondary'], size='10pt')
+        plot.setLabel('bottom', 'Time (s)', color=COLORS['text_secondary'], size='10pt')
         
         plot.setMinimumHeight(180)
         
@@ -838,7 +1026,7 @@ class MainWindow(QtWidgets.QMainWindow):
         
         # Clear axis labels
         self.combined_plot.setLabel('left', 'Value', color=COLORS['text_secondary'], size='11pt')
-        self.combined_plot.setLabel('bottom', 'Samples', color=COLORS['text_secondary'], size='11pt')
+        self.combined_plot.setLabel('bottom', 'Time (s)', color=COLORS['text_secondary'], size='11pt')
         
         self.combined_plot.setMinimumHeight(400)
         
@@ -862,7 +1050,7 @@ class MainWindow(QtWidgets.QMainWindow):
         }
         
         self.combined_curves = {}
-        for key in self.buffers.keys():
+        for key in SENSOR_CHANNELS:
             self.combined_curves[key] = self.combined_plot.plot(
                 pen=pg.mkPen(SENSOR_COLORS[key], width=2),
                 name=names[key]
@@ -871,12 +1059,65 @@ class MainWindow(QtWidgets.QMainWindow):
         layout.addWidget(self.combined_plot)
         return container
 
+    def create_stats_table(self):
+        """Tabel statistik berjalan per channel (scope: sesi, rolling, fase FSM)"""
+        container = QtWidgets.QWidget()
+        container.setStyleSheet(f"""
+            background: {COLORS['bg_card']};
+            border-radius: 8px;
+            border: 1px solid {COLORS['border']};
+        """)
+        
+        layout = QtWidgets.QVBoxLayout(container)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+        
+        header = QtWidgets.QHBoxLayout()
+        title = QtWidgets.QLabel("Running Statistics")
+        title.setStyleSheet(f"""
+            font-size: 16px;
+            font-weight: 600;
+            color: {COLORS['text_primary']};
+            border: none;
+        """)
+        header.addWidget(title)
+        header.addStretch()
+        self.stats_scope = QtWidgets.QComboBox()
+        self.stats_scope.addItems(self.engine.running_stats.scopes())
+        self.stats_scope.currentTextChanged.connect(lambda _: self.update_running_stats(force=True))
+        header.addWidget(self.stats_scope)
+        layout.addLayout(header)
+        
+        self.stats_table = QtWidgets.QTableWidget(len(SENSOR_CHANNELS), len(STAT_NAMES))
+        self.stats_table.setHorizontalHeaderLabels(list(STAT_NAMES))
+        self.stats_table.setVerticalHeaderLabels(list(SENSOR_CHANNELS))
+        self.stats_table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.stats_table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Stretch)
+        self.stats_table.setStyleSheet(f"color: {COLORS['text_primary']}; font-size: 12px;")
+        for row in range(len(SENSOR_CHANNELS)):
+            for col in range(len(STAT_NAMES)):
+                item = QtWidgets.QTableWidgetItem("—")
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.stats_table.setItem(row, col, item)
+        layout.addWidget(self.stats_table)
+        self._stats_key = None
+        return container
+
     def handle_sensor_data(self, line):
         """Handle incoming sensor data"""
         data = parse_sensor_data(line)
         if data:
             self.data_signal.emit(data)
 
+    def on_view_mode_changed(self, index):
+        """Index TIME_WINDOWS: Live Window, Last 30 s / 5 min / 1 h, Whole Session"""
+        self.plot_refresher.set_window(TIME_WINDOWS[index][1])
+        self.scheduler.request()
+
+    def on_view_range_changed(self, *args):
+        if self.plot_refresher.session_mode:
+            self.scheduler.request()
+
     def on_status_update(self, message):
         """Update status display"""
         self.status_label.setText(message)
@@ -903,71 +1144,273 @@ class MainWindow(QtWidgets.QMainWindow):
                 border: 1px solid {COLORS['warning']}20;
             """)
 
+    @property
+    def sample_count(self):
+        return self.engine.sample_count
+
+    @property
+    def malformed_count(self):
+        return self.engine.malformed_count
+
     def on_data_update(self, data):
         """Update data buffers and UI"""
-        now = data.get("timestamp", int(time.time()*1000))
-        row = {
-            "timestamp": now,
-            "co_m": data.get("co_m"),
-            "eth_m": data.get("eth_m"),
-            "voc_m": data.get("voc_m"),
-            "no2": data.get("no2"),
-            "c2h50h_gm": data.get("c2h50h_gm"),
-            "voc_gm": data.get("voc_gm"),
-            "co_gm": data.get("co_gm"),
-        }
-        self.csv_rows.append(row)
-        self.sample_count += 1
-        
-        # Update stats card
+        self.engine.ingest_sample(data)
         self.samples_card.update_value(str(self.sample_count))
+        self.update_prediction()
+        self.scheduler.request()
 
-        # Update buffers
-        for key in self.buffers:
-            val = data.get(key, 0.0)
-            try:
-                val_num = float(val) if val is not None else 0.0
-            except:
-                val_num = 0.0
-            self.buffers[key].append(val_num)
-            if len(self.buffers[key]) > self.maxlen:
-                self.buffers[key].pop(0)
+    def on_rx_ready(self):
+        """
+        Kuras antrean receiver. Rekaman: semua item sekaligus (journal,
+        counter, ack, LOD, fitur, statistik; lossless). Tampilan: paling
+        banyak RX_DRAIN_MAX item per giliran (ring buffer + plot); saat GUI
+        tertinggal policy display_queue yang membuang blok, bukan rekaman.
+        Kartu, prediksi dan frame diperbarui sekali per giliran.
+        """
+        rx = self.receiver
+        # Ambil item tampilan dulu: receiver memasukkan ke record_queue lebih dulu,
+        # jadi semua item ini pasti ikut terkuras (dan terekam) di bawah
+        shown_items = rx.display_queue.drain(RX_DRAIN_MAX)
+        recorded = 0
+        for item in rx.record_queue.drain():
+            if isinstance(item, str):
+                self.handle_sensor_data(item)     # legacy per-baris: rekam + tampil per sampel
+            elif isinstance(item, dict):
+                for name, block in item.items():
+                    recorded += self.engines[name].record(block) is not None
+            else:
+                recorded += self.engine.record(item) is not None
+        shown = 0
+        for item in shown_items:
+            if isinstance(item, dict):
+                shown += self.view_device_batch(item)
+            else:
+                shown += self.view_block(item)
+        if recorded or shown:
+            self.samples_card.update_value(str(self.sample_count))
+        if shown:
+            self.update_prediction()
+            self.scheduler.request()
+        if rx.record_queue.depth or rx.display_queue.depth:
+            QtCore.QTimer.singleShot(0, self.on_rx_ready)
 
-    def update_plot(self):
-        """Update all plots"""
-        if hasattr(self, 'sensor_curves'):
-            for key, curve in self.sensor_curves.items():
-                y = self.buffers[key]
-                if y:
-                    x = list(range(len(y)))
-                    curve.setData(x, y)
-        
-        if hasattr(self, 'combined_curves'):
-            for key, curve in self.combined_curves.items():
-                y = self.buffers[key]
-                if y:
-                    x = list(range(len(y)))
-                    curve.setData(x, y)
+    def view_block(self, block):
+        """Jalur tampilan satu SensorBlock yang sudah direkam. Return jumlah sampel"""
+        self.latency.stamp_dequeued(block)
+        n = self.engine.update_views(block)
+        if n:
+            self.latency.stamp_buffered(block)
+        return n
 
-    def send_command(self, cmd):
-        """Send command to backend"""
+    def view_device_batch(self, batch):
+        """Jalur tampilan batch multi-device {device: SensorBlock}. Return sampel rig yang tampil"""
+        shown = 0
+        for name, block in batch.items():
+            n = self.engines[name].update_views(block)
+            if self.engines[name] is self.engine:
+                shown += n
+        return shown
+
+    def on_block_update(self, block):
+        """Ingest satu blok sampel (rekam + tampil) dalam satu panggilan"""
+        block = self.engine.record(block)
+        if block is not None and self.view_block(block):
+            self.samples_card.update_value(str(self.sample_count))
+            self.update_prediction()
+            self.scheduler.request()
+
+    def on_device_changed(self, name):
+        """Tampilkan / kontrol rig lain (data rig lain tetap direkam)"""
+        self.engine = self.engines[name]
+        self.buffers = self.engine.buffers
+        self.session_lod = self.engine.lod
+        self.recorder = self.engine.recorder
+        self.bind_plot_source()
+        self.samples_card.update_value(str(self.sample_count))
+        self.reset_prediction()
+        self.update_prediction()
+
+    def bind_plot_source(self):
+        """Arahkan plot ke deret mentah atau terfilter dari engine aktif"""
+        if self.signal_select is not None and self.signal_select.currentIndex() == 1:
+            buffers, lod = self.engine.filtered, self.engine.filtered_lod
+        else:
+            buffers, lod = self.buffers, self.session_lod
+        self.plot_refresher.buffers = buffers
+        self.plot_refresher.lod = lod
+        self.plot_refresher.invalidate()
+        self.scheduler.request()
+
+    # ===== LOCAL CLASSIFIER =====
+    def load_classifier(self):
+        """Background thread: muat model atau latih dari sesi yang terekam"""
         try:
-            with socket.socket() as s:
-                s.connect((TCP_CMD_HOST, TCP_CMD_PORT))
-                s.sendall(f"{cmd}\n".encode())
-            return True
+            model = load_or_train()
+            message = f"{model.model.upper()} · {len(model.classes)} classes"
         except Exception as e:
-            print(f"Command error: {e}")
-            return False
+            model, message = None, f"No model ({e})"
+        self.classifier_ready.emit(model, message)
+
+    def on_classifier_ready(self, model, message):
+        self.live_classifier = LiveClassifier(model) if model is not None else None
+        self.prediction_card.update_subtitle(message)
+        self.update_prediction()
+
+    def reset_prediction(self):
+        if self.live_classifier is not None:
+            self.live_classifier.reset()
+            self.prediction_card.update_value("—")
+
+    def update_prediction(self):
+        """Inferensi pada window terakhir ring buffer (hanya jika ada data baru)"""
+        if self.live_classifier is None:
+            return
+        result = self.live_classifier.update(self.buffers)
+        if result is None:
+            return
+        label, confidence = result
+        self.prediction_card.update_value(label.title())
+        self.prediction_card.update_subtitle(
+            f"confidence {confidence:.0%} · {self.live_classifier.last_ms:.2f} ms")
+
+    def update_running_stats(self, force=False):
+        """Kartu drift + tabel statistik (hanya jika statistik berubah, tanpa scan histori)"""
+        stats = self.engine.running_stats
+        table_visible = self.tabs.currentWidget() is self.stats_table.parentWidget()
+        key = (id(stats), stats.version, table_visible)
+        if key == self._stats_key and not force:
+            return
+        self._stats_key = key
+
+        rolling = stats.get(stats.scopes()[1]) if stats.windows_s else stats.session
+        if rolling is not None and rolling.n > 1:
+            rel = np.abs(rolling.drift) / (np.abs(rolling.mean) + 1e-9)
+            i = int(np.argmax(rel))
+            self.drift_card.update_value(f"{rolling.drift[i]:+.3g}/min")
+            self.drift_card.update_subtitle(
+                f"{stats.channels[i]} · {rolling.mean[i]:.3g} ± {rolling.std[i]:.2g}")
+        else:
+            self.drift_card.update_value("—")
+            self.drift_card.update_subtitle("Waiting for data")
+
+        if not table_visible:
+            return
+        scopes = stats.scopes()
+        if [self.stats_scope.itemText(i) for i in range(self.stats_scope.count())] != scopes:
+            current = self.stats_scope.currentText()
+            self.stats_scope.blockSignals(True)
+            self.stats_scope.clear()
+            self.stats_scope.addItems(scopes)
+            self.stats_scope.setCurrentIndex(scopes.index(current) if current in scopes else 0)
+            self.stats_scope.blockSignals(False)
+        moments = stats.get(self.stats_scope.currentText())
+        values = moments.table() if moments is not None else np.full(
+            (len(stats.channels), len(STAT_NAMES)), np.nan)
+        for row, line in enumerate(values):
+            for col, v in enumerate(line):
+                text = "—" if not np.isfinite(v) else (f"{int(v)}" if col == 0 else f"{v:.4g}")
+                self.stats_table.item(row, col).setText(text)
+
+    def update_plot(self):
+        """Satu frame: kurva pada tab yang terlihat (hanya jika ada data baru) + statistik"""
+        t0 = time.perf_counter()
+        self.plot_refresher.refresh(self.tabs.currentIndex())
+        self.update_running_stats()
+        now = time.perf_counter()
+        self.latency.frame_drawn((now - t0) * 1000.0)
+        if now - self._render_label_at >= 1.0:
+            self.update_render_label()
+        if self.latency_overlay.isVisible() and now - self._overlay_at >= 1.0:
+            self._overlay_at = now
+            self.update_latency_overlay()
+
+    def update_render_label(self):
+        """fps / frame / skipped + counter antrean receiver di header"""
+        self._render_label_at = time.perf_counter()
+        sched = self.scheduler
+        text = f"{sched.fps} fps · {sched.frames_rendered} frames · {sched.frames_skipped} skipped"
+        display, record = self.receiver.display_queue, self.receiver.record_queue
+        if display.dropped or record.waits:
+            text += f" · display dropped {display.dropped} · record waits {record.waits}"
+        self.render_label.setText(text)
+
+    def on_render_idle(self):
+        """Scheduler idle 1 s: tampilkan 0 fps (tidak ada frame yang memperbarui label)"""
+        self.update_render_label()
+        if self.latency_overlay.isVisible():
+            self.update_latency_overlay()
+
+    # ===== LATENCY INSTRUMENTATION =====
+    def _latency_sources(self):
+        handoff = {"record": self.receiver.record_queue.stats(), "display": self.receiver.display_queue.stats()}
+        return getattr(self.receiver, "stats", None), self.engine.malformed_count, handoff
+
+    def update_latency_overlay(self):
+        self.latency_overlay.setText(self.latency.overlay_text(*self._latency_sources()))
+        self.latency_overlay.adjustSize()
+        self.latency_overlay.move(self.tabs.width() - self.latency_overlay.width() - 12, 48)
+        self.latency_overlay.raise_()
+
+    def toggle_latency_overlay(self):
+        """F12: tampilkan overlay + aktifkan pengukuran (mati = tanpa overhead)"""
+        show = not self.latency_overlay.isVisible()
+        self.latency.set_enabled(show or bool(self.latency_out))
+        self.latency_overlay.setVisible(show)
+        if show:
+            self.update_latency_overlay()
+
+    def export_latency(self, path=None):
+        """Shift+F12: tulis laporan latency (JSON) untuk analisis offline"""
+        if not self.latency.enabled:
+            self.status_label.setText("⚠️ Latency tracking is off (F12)")
+            return None
+        path = path or os.path.join(DATA_DIR, f"latency_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        blocks = self.latency.export(path, *self._latency_sources())
+        self.status_label.setText(f"⏱️ Latency report: {path} ({blocks} blocks)")
+        return path
+
+    def changeEvent(self, event):
+        """Minimize / restore: hentikan atau lanjutkan render"""
+        if event.type() == QtCore.QEvent.Type.WindowStateChange:
+            self.set_render_visible(self.isVisible() and not self.isMinimized())
+        super().changeEvent(event)
+
+    def showEvent(self, event):
+        self.set_render_visible(not self.isMinimized())
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.set_render_visible(False)
+        super().hideEvent(event)
+
+    def set_render_visible(self, visible):
+        self.scheduler.set_visible(visible)
+        self.latency.set_drawing(visible)
+
+    def send_command(self, cmd):
+        """Antrikan command ke backend (non-blocking). Return CommandResult"""
+        return self.engine.commands.send(cmd)
 
     def start_sampling(self):
         """Start sampling"""
-        if self.send_command("START_SAMPLING"):
-            self.csv_rows.clear()
-            self.sample_count = 0
+        self.send_command("START_SAMPLING")
+        self.status_label.setText("⏳ Sending START_SAMPLING...")
+
+    def stop_sampling(self):
+        """Stop sampling"""
+        self.send_command("STOP_SAMPLING")
+        self.status_label.setText("⏳ Sending STOP_SAMPLING...")
+
+    def on_command_sent(self, engine, result):
+        """Command sudah tertulis ke socket (ack FSM menyusul)"""
+        if result.cmd == "START_SAMPLING":
+            engine.begin_session()
+            if engine is not self.engine:
+                return
             self.samples_card.update_value("0")
-            for k in self.buffers:
-                self.buffers[k].clear()
+            self.reset_prediction()
+            self.scheduler.request()
             self.status_label.setText("Sampling active...")
             self.status_label.setStyleSheet(f"""
                 font-size: 12px;
@@ -979,12 +1422,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 border: 1px solid {COLORS['success']}20;
             """)
             self.save_card.update_value("⏳")
-        else:
-            QMessageBox.warning(self, "Error", f"❌ Failed to send command!\nMake sure Rust is running on {TCP_CMD_HOST}:{TCP_CMD_PORT}")
-
-    def stop_sampling(self):
-        """Stop sampling"""
-        if self.send_command("STOP_SAMPLING"):
+        elif result.cmd == "STOP_SAMPLING" and engine is self.engine:
             self.status_label.setText("Sampling stopped")
             self.status_label.setStyleSheet(f"""
                 font-size: 12px;
@@ -996,8 +1434,17 @@ class MainWindow(QtWidgets.QMainWindow):
                 border: 1px solid {COLORS['info']}20;
             """)
             self.save_card.update_value("✓")
-        else:
-            QMessageBox.warning(self, "Error", "❌ Failed to send command!")
+
+    def on_command_done(self, engine, result):
+        """Ack FSM diterima, timeout, atau command gagal dikirim"""
+        if result.sent_at is None:
+            QMessageBox.warning(self, "Error", f"❌ Failed to send command!\nMake sure Rust is running on {engine.cmd_host}:{engine.cmd_port}")
+        elif engine is not self.engine:
+            return
+        elif result.error:
+            self.status_label.setText(f"⚠️ {result.cmd}: {result.error}")
+        elif result.rtt_ms is not None:
+            self.status_label.setText(f"{self.status_label.text()} (FSM ack {result.rtt_ms:.0f} ms)")
 
     def clear_data(self):
         """Clear all data"""
@@ -1007,20 +1454,23 @@ class MainWindow(QtWidgets.QMainWindow):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.csv_rows.clear()
-            self.sample_count = 0
+            self.engine.clear()
             self.samples_card.update_value("0")
-            for k in self.buffers:
-                self.buffers[k].clear()
             self.save_card.update_value("⏳")
+            self.reset_prediction()
+            self.scheduler.request()
 
     def save_all_and_upload(self):
-        """Save to CSV + JSON + Upload to Edge Impulse"""
+        """Save to CSV + JSON + Upload to Edge Impulse (export di worker thread)"""
         
-        if not self.csv_rows:
+        if not self.recorder.rows:
             QMessageBox.warning(self, "Warning", "⚠️ No data to save!")
             return
         
+        if getattr(self, "export_thread", None) is not None:
+            QMessageBox.warning(self, "Busy", "⏳ Previous save is still running")
+            return
+        
         ei_label = self.ei_label.text().strip()
         if not ei_label:
             QMessageBox.warning(self, "Missing Label", "❌ Please enter Edge Impulse label")
@@ -1028,99 +1478,218 @@ class MainWindow(QtWidgets.QMainWindow):
         
         sample_name = self.sample_name.text().strip() or "Unknown"
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs("data", exist_ok=True)
-        
-        csv_path = f"data/{sample_name}_{ts}.csv"
-        json_path = f"data/{sample_name}_{ts}.json"
         
         try:
-            # Save CSV
+            # Save CSV: journal sudah di disk, cukup finalize + rename
             self.save_card.update_value("💾")
-            QtCore.QCoreApplication.processEvents()
-            
-            with open(csv_path, "w", newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=self.csv_rows[0].keys())
-                writer.writeheader()
-                writer.writerows(self.csv_rows)
-            
-            # Save JSON
-            json_data = {
-                "sample_name": sample_name,
-                "ei_label": ei_label,
-                "timestamp": ts,
-                "total_samples": len(self.csv_rows),
-                "data": self.csv_rows
-            }
-            
-            with open(json_path, "w") as f:
-                json.dump(json_data, f, indent=2)
-            
-            # Show progress dialog
-            progress = QProgressDialog("Uploading to Edge Impulse...", None, 0, 0, self)
-            progress.setWindowTitle("Upload")
-            progress.setCancelButton(None)
-            progress.show()
-            QtCore.QCoreApplication.processEvents()
-            
-            self.save_card.update_value("📤")
-            
-            # Create uploader worker
-            uploader = EdgeImpulseUploader()
-            uploader_thread = QThread()
-            uploader.moveToThread(uploader_thread)
-            
-            def on_progress(msg):
-                progress.setLabelText(msg)
-                QtCore.QCoreApplication.processEvents()
-            
-            def on_finished(success, message):
-                progress.close()
-                uploader_thread.quit()
-                uploader_thread.wait()
-                
-                if success:
-                    self.save_card.update_value("✓")
-                    msg = f"✅ All files saved and uploaded!\n\n"
-                    msg += f"📁 CSV: {csv_path}\n"
-                    msg += f"📁 JSON: {json_path}\n\n"
-                    msg += message
-                    QMessageBox.information(self, "Success", msg)
-                    self.clear_data()
-                    self.sample_name.clear()
-                    self.ei_label.clear()
-                else:
-                    self.save_card.update_value("✗")
-                    msg = f"Files saved locally but upload failed:\n\n"
-                    msg += f"📁 CSV: {csv_path}\n"
-                    msg += f"📁 JSON: {json_path}\n\n"
-                    msg += message
-                    QMessageBox.critical(self, "Upload Failed", msg)
-            
-            uploader.upload_progress.connect(on_progress)
-            uploader.upload_finished.connect(on_finished)
-            
-            uploader_thread.started.connect(
-                lambda: uploader.upload_csv(csv_path, ei_label, sample_name)
-            )
-            uploader_thread.start()
-        
+            csv_path, total_samples = self.engine.save(sample_name, ts)
+            json_path = csv_path[:-len(".csv")] + ".json"
         except Exception as e:
             QMessageBox.critical(self, "Error", f"❌ {str(e)}")
             self.save_card.update_value("✗")
+            return
+        
+        # Progress dialog (non-modal, GUI tetap plotting data live)
+        progress = QProgressDialog("Exporting JSON...", "Cancel", 0, 100, self)
+        progress.setWindowTitle("Save & Upload")
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.show()
+        
+        # Export JSON di worker thread
+        worker = SessionExportWorker(csv_path, json_path, {
+            "sample_name": sample_name,
+            "ei_label": ei_label,
+            "timestamp": ts,
+            "total_samples": total_samples,
+        })
+        thread = QThread()
+        worker.moveToThread(thread)
+        self.export_worker, self.export_thread = worker, thread
+        
+        def on_progress(pct, msg):
+            progress.setValue(pct)
+            progress.setLabelText(msg)
+        
+        def on_finished(success, message):
+            thread.quit()
+            thread.wait()
+            self.export_worker = self.export_thread = None
+            
+            if success:
+                self.start_upload(progress, csv_path, json_path, ei_label, sample_name)
+            else:
+                progress.close()
+                self.save_card.update_value("✗")
+                msg = f"CSV saved but JSON export stopped:\n\n"
+                msg += f"📁 CSV: {csv_path}\n\n"
+                msg += message
+                QMessageBox.warning(self, "Export", msg)
+        
+        progress.canceled.connect(worker.cancel, Qt.ConnectionType.DirectConnection)
+        worker.export_progress.connect(on_progress)
+        worker.export_finished.connect(on_finished)
+        thread.started.connect(worker.run)
+        thread.start()
+
+    def start_upload(self, progress, csv_path, json_path, ei_label, sample_name):
+        """Potong sesi menjadi window lalu antrikan ke upload queue (retry + spool offline)"""
+        progress.canceled.disconnect()
+        progress.setCancelButton(None)
+        progress.setRange(0, 0)
+        progress.setLabelText("Uploading to Edge Impulse...")
+        self.save_card.update_value("📤")
+        
+        mode = self.upload_split.currentData()
+        segments_root = os.path.join(DATA_DIR, "segments")
+        windows = segment_file(csv_path, mode, segments_root, window_s=UPLOAD_WINDOW_S)
+        if not windows:
+            # Sesi tanpa info FSM (state/level) -> upload utuh
+            mode = "session"
+            windows = segment_file(csv_path, mode, segments_root)
+        
+        upload = {"progress": progress, "csv_path": csv_path, "json_path": json_path,
+                  "mode": mode, "total": len(windows), "jobs": set(), "done": 0,
+                  "uploaded": 0, "queued": [], "failed": [], "message": ""}
+        for path, seg in windows:
+            name = sample_name if mode == "session" else f"{sample_name}.{os.path.basename(path)[:-4]}"
+            job = self.uploads.submit(path, ei_label, name)
+            upload["jobs"].add(job.id)
+            self.upload_dialogs[job.id] = upload
+
+    def on_upload_progress(self, job, message):
+        upload = self.upload_dialogs.get(job.id)
+        if upload is None:
+            return
+        if upload["total"] > 1:
+            message = f"📤 Uploading {upload['mode']} windows ({upload['done']}/{upload['total']} done)..."
+        upload["progress"].setLabelText(message)
+
+    def on_upload_retry(self, job, message, delay):
+        """Upload gagal sementara (offline / 5xx): job tetap di spool"""
+        when = f"retrying in {delay:.0f}s" if delay is not None else "will retry on next start"
+        upload = self.upload_dialogs.pop(job.id, None)
+        if upload is None:
+            self.status_label.setText(f"⏳ Upload {job.sample_name}: {when}")
+            return
+        upload["queued"].append(f"{job.sample_name}: {message.splitlines()[0]} ({when})")
+        self._upload_job_done(upload, job)
+
+    def on_upload_finished(self, job, success, message):
+        upload = self.upload_dialogs.pop(job.id, None)
+        if upload is None:
+            # Upload dari spool (sesi offline sebelumnya)
+            icon = "✅" if success else "❌"
+            self.status_label.setText(f"{icon} Upload {job.sample_name}: {message.splitlines()[0]}")
+            return
+        if success:
+            upload["uploaded"] += 1
+            upload["message"] = message
+        else:
+            upload["failed"].append(f"{job.sample_name}: {message}")
+        self._upload_job_done(upload, job)
+
+    def _upload_job_done(self, upload, job):
+        """Satu window selesai / diantrikan ulang; dialog ditutup saat semua selesai"""
+        upload["jobs"].discard(job.id)
+        upload["done"] += 1
+        if upload["jobs"]:
+            self.on_upload_progress(job, "")
+            return
+        upload["progress"].close()
+        files = f"📁 CSV: {upload['csv_path']}\n"
+        files += f"📁 JSON: {upload['json_path']}\n\n"
+        if upload["total"] > 1:
+            files += f"✂️ {upload['total']} windows ({upload['mode']}): "
+            files += f"{upload['uploaded']} uploaded, {len(upload['queued'])} queued, "
+            files += f"{len(upload['failed'])} failed\n\n"
+        
+        if upload["failed"]:
+            self.save_card.update_value("✗")
+            msg = f"Files saved locally but upload failed:\n\n" + files
+            msg += "\n".join(upload["failed"][:5])
+            QMessageBox.critical(self, "Upload Failed", msg)
+        elif upload["queued"]:
+            self.save_card.update_value("⏳")
+            msg = f"Files saved locally, upload queued:\n\n" + files
+            msg += "\n".join(upload["queued"][:5])
+            QMessageBox.warning(self, "Upload Queued", msg)
+        else:
+            self.save_card.update_value("✓")
+            msg = f"✅ All files saved and uploaded!\n\n" + files
+            msg += upload["message"]
+            QMessageBox.information(self, "Success", msg)
+            self.clear_data()
+            self.sample_name.clear()
+            self.ei_label.clear()
+
+    def recover_interrupted_sessions(self):
+        """Recover journal sesi yang tertinggal dari run sebelumnya"""
+        active = {engine.recorder.path for engine in self.engines.values()}
+        directories = sorted({engine.data_dir for engine in self.engines.values()})
+        for journal in [j for d in directories for j in SessionRecorder.find_interrupted(d)]:
+            if journal in active:
+                continue
+            reply = QMessageBox.question(
+                self, 'Recover Session',
+                f'♻️ Found an unsaved session:\n{os.path.basename(journal)}\n\nRecover it?',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                stamp = os.path.basename(journal)[len(JOURNAL_PREFIX):-len(".csv")]
+                dest = SessionRecorder.recover(
+                    journal, os.path.join(os.path.dirname(journal), f"recovered_{stamp}.csv"))
+                QMessageBox.information(self, "Recovered", f"✅ Session recovered:\n📁 {dest}")
+            else:
+                os.remove(journal)
 
     def closeEvent(self, event):
         """Clean up on close"""
+        for engine in self.engines.values():
+            engine.close()
+        self.uploads.stop(wait=False)
+        if hasattr(self.receiver, "stop"):
+            self.receiver.stop()
         self.receiver_thread.quit()
-        self.receiver_thread.wait()
-        self.timer.stop()
+        self.receiver_thread.wait(3000)
+        self.scheduler.stop()
+        if self.latency_out:
+            self.export_latency(self.latency_out)
         event.accept()
 
 
 if __name__ == "__main__":
-    app = QtWidgets.QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Electronic Nose GUI")
+    parser.add_argument("--replay", metavar="CSV", help="replay a recorded session instead of TCP")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (0 = max)")
+    parser.add_argument("--loop", action="store_true", help="loop the replay file")
+    parser.add_argument("--device", action="append", metavar="NAME=HOST:PORT[:CMD]",
+                        help="connect to several rigs at once (repeatable)")
+    parser.add_argument("--resample-ms", type=float, metavar="MS",
+                        help="plot / classify on a fixed-rate grid (e.g. 250)")
+    parser.add_argument("--filters", default=DEFAULT_FILTERS, metavar="SPEC",
+                        help=f"filtered view, e.g. {DEFAULT_FILTERS!r} ('none' = raw only)")
+    parser.add_argument("--features-on", choices=FEATURE_SOURCES, default="smoothed",
+                        help="series for per-cycle features (smoothed = filters without the baseline stage)")
+    parser.add_argument("--max-fps", type=float, default=RENDER_MAX_FPS,
+                        help="render at most this many frames per second (idle = 0)")
+    parser.add_argument("--latency", action="store_true", help="show the latency overlay (F12)")
+    parser.add_argument("--latency-out", metavar="JSON", help="write the latency report on exit")
+    parser.add_argument("--display-policy", choices=POLICIES, default=RX_DISPLAY_POLICY,
+                        help="what the plots / features skip when the GUI falls behind (recording is always lossless)")
+    parser.add_argument("--display-queue", type=int, default=RX_DISPLAY_ITEMS, metavar="N",
+                        help="display queue capacity in blocks")
+    args, qt_args = parser.parse_known_args()
+    
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')
     app.setFont(QtGui.QFont("Segoe UI", 10))
     
-    window = MainWindow()
+    devices = [parse_device_spec(spec) for spec in args.device or []]
+    window = MainWindow(args.replay, args.speed, args.loop, devices=devices,
+                        resample_ms=args.resample_ms, filters=args.filters, max_fps=args.max_fps,
+                        latency=args.latency or bool(args.latency_out), latency_out=args.latency_out,
+                        display_policy=args.display_policy, display_queue=args.display_queue,
+                        features_on=args.features_on)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
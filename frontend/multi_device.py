@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - asyncio multi-device acquisition
+- N concurrent backend connections in one event loop (one thread)
+- Non-blocking reconnect with exponential backoff + full jitter per device
+- All devices' samples delivered as one batch {device: SensorBlock} per interval
+- Per-device AcquisitionEngine (ring buffer + session journal + commands)
+
+Device spec: NAME=HOST:PORT[:CMD_PORT]  (CMD_PORT default = PORT - 1)
+
+Usage:
+    python multi_device.py --device rig1=192.168.1.10:8083 --device rig2=192.168.1.11:8083 --duration 600
+"""
+
+import argparse
+import asyncio
+import inspect
+import os
+import random
+import signal
+import threading
+import time
+from datetime import datetime
+
+from acquisition import AcquisitionEngine
+from sensor_protocol import LineFramer, ParseStats, ReceiveClock, parse_sensor_lines
+
+BACKOFF_MAX_EXP = 20    # 2**20 * base jauh di atas backoff_max; cegah overflow float
+
+
+# ===== DEVICE SPEC =====
+class Device:
+    __slots__ = ("name", "host", "port", "cmd_port")
+
+    def __init__(self, name, host, port, cmd_port=None):
+        self.name = name
+        self.host = host
+        self.port = int(port)
+        self.cmd_port = int(cmd_port) if cmd_port else self.port - 1
+
+    def __repr__(self):
+        return f"{self.name}={self.host}:{self.port}:{self.cmd_port}"
+
+
+def parse_device_spec(spec):
+    """'rig1=10.0.0.5:8083[:8082]' -> Device (nama default = host:port)"""
+    name, sep, addr = spec.partition("=")
+    if not sep:
+        name, addr = "", spec
+    parts = addr.split(":")
+    if len(parts) not in (2, 3) or not parts[0]:
+        raise ValueError(f"Invalid device spec: {spec!r} (expected NAME=HOST:PORT[:CMD_PORT])")
+    host, port = parts[0], parts[1]
+    return Device(name or f"{host}:{port}", host, port, parts[2] if len(parts) == 3 else None)
+
+
+# ===== ASYNC RECEIVER =====
+class AsyncMultiReceiver:
+    """
+    Satu event loop asyncio untuk semua device.
+
+    Setiap device punya coroutine baca sendiri; baris dikumpulkan per device
+    dan satu coroutine flusher mem-parse semuanya tiap `batch_interval`
+    (atau lebih cepat jika total antrian >= batch_max), lalu memanggil
+    on_batch({name: SensorBlock}) sekali. on_batch boleh coroutine function:
+    flusher menunggunya, dan selama itu device berhenti membaca socket jika
+    antrian baris mencapai max_pending_rows (backpressure TCP, loop tidak
+    diblokir). Gagal konek -> tunggu
+    uniform(0, min(backoff_max, backoff_base * 2**attempt)) tanpa blocking
+    device lain.
+    """
+
+    def __init__(self, devices, batch_interval=0.05, batch_max=256,
+                 backoff_base=0.5, backoff_max=30.0, connect_timeout=5.0, max_pending_rows=None):
+        self.devices = list(devices)
+        names = [d.name for d in self.devices]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate device names: {names}")
+        self.batch_interval = batch_interval
+        self.batch_max = max(1, batch_max)
+        self.max_pending_rows = max_pending_rows or 16 * self.batch_max
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connect_timeout = connect_timeout
+        self.stats = {d.name: ParseStats() for d in self.devices}
+        self.connected = {d.name: False for d in self.devices}
+        self.reconnects = {d.name: 0 for d in self.devices}
+        self.on_batch = None   # callable({name: SensorBlock}) atau coroutine function
+        self.on_status = None  # callable(name, message)
+        self._pending = {d.name: ([], []) for d in self.devices}
+        self._pending_rows = 0
+        self._loop = None
+        self._stop = None
+        self._wake = None
+        self._drained = None   # di-set flusher setelah antrian baris dikosongkan
+        self._thread = None
+
+    def _status(self, name, message):
+        if self.on_status is not None:
+            self.on_status(name, message)
+
+    def backoff_delay(self, attempt):
+        """Full jitter; eksponen dibatasi agar rig offline berjam-jam tidak overflow"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** min(attempt, BACKOFF_MAX_EXP)))
+
+    # ----- coroutines -----
+    async def _device(self, dev):
+        addr = f"{dev.host}:{dev.port}"
+        attempt = 0
+        self._status(dev.name, f"📡 Connecting to Rust: {addr}...")
+        while not self._stop.is_set():
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(dev.host, dev.port), self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                self._status(dev.name, f"⚠️ Cannot connect to {addr} ({e or 'timeout'}), "
+                                       f"retry in {delay:.1f}s")
+                await self._sleep(delay)
+                continue
+
+            attempt = 0
+            self.connected[dev.name] = True
+            self._status(dev.name, f"🟢 Connected to Rust: {addr}")
+            framer = LineFramer(stats=self.stats[dev.name])
+            clock = ReceiveClock()
+            lines, stamps = self._pending[dev.name]
+            try:
+                while not self._stop.is_set():
+                    data = await reader.read(65536)
+                    if not data:
+                        break
+                    new = framer.feed(data)
+                    if new:
+                        lines.extend(new)
+                        stamps.extend(clock.stamps(len(new)))
+                        self._pending_rows += len(new)
+                        if self._pending_rows >= self.batch_max:
+                            self._wake.set()
+                        if self._pending_rows >= self.max_pending_rows:
+                            self._drained.clear()
+                            await self._drained.wait()   # consumer tertinggal: berhenti baca
+            except OSError as e:
+                self._status(dev.name, f"⚠️ Connection error: {e}")
+            finally:
+                self.connected[dev.name] = False
+                writer.close()
+            if not self._stop.is_set():
+                self.reconnects[dev.name] += 1
+                delay = self.backoff_delay(0)
+                self._status(dev.name, f"🔌 Disconnected from {addr}, reconnecting in {delay:.1f}s")
+                await self._sleep(delay)
+
+    async def _sleep(self, delay):
+        try:
+            await asyncio.wait_for(self._stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _flusher(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.batch_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self._deliver(self.flush())
+        await self._deliver(self.flush())
+        self._drained.set()
+
+    async def _deliver(self, pending):
+        if inspect.isawaitable(pending):
+            await pending
+
+    def flush(self):
+        """Parse antrian semua device dan kirim satu batch. Return hasil on_batch (bisa awaitable)"""
+        if not self._pending_rows:
+            return
+        batch = {}
+        for name, (lines, stamps) in self._pending.items():
+            if not lines:
+                continue
+            block = parse_sensor_lines(lines, stamps, stats=self.stats[name])
+            del lines[:], stamps[:]
+            if len(block):
+                batch[name] = block
+        self._pending_rows = 0
+        if self._drained is not None:
+            self._drained.set()
+        if batch and self.on_batch is not None:
+            return self.on_batch(batch)
+        return None
+
+    async def run(self):
+        """Jalankan semua device sampai stop()"""
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._drained = asyncio.Event()
+        tasks = [asyncio.create_task(self._device(d)) for d in self.devices]
+        tasks.append(asyncio.create_task(self._flusher()))
+        await self._stop.wait()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ----- thread helpers -----
+    def run_forever(self):
+        """Blocking: event loop di thread pemanggil"""
+        asyncio.run(self.run())
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name="AsyncMultiReceiver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Thread-safe: hentikan semua koneksi"""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+# ===== PER-DEVICE ENGINES =====
+def make_engines(devices, data_dir="data", maxlen=200, lod=False, resample_ms=None, filters=None,
+                 features_on="smoothed"):
+    """Satu AcquisitionEngine per device, journal di data_dir/<device>/"""
+    return {
+        d.name: AcquisitionEngine(None, os.path.join(data_dir, d.name.replace(":", "_")),
+                                  maxlen=maxlen, lod=lod, cmd_host=d.host, cmd_port=d.cmd_port,
+                                  resample_ms=resample_ms, filters=filters, features_on=features_on)
+        for d in devices
+    }
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Record several E-Nose rigs from one process")
+    parser.add_argument("--device", action="append", required=True, metavar="NAME=HOST:PORT[:CMD]")
+    parser.add_argument("--name", default="Unknown", help="sample name (file prefix)")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--start", action="store_true", help="send START_SAMPLING to every rig first")
+    parser.add_argument("--duration", type=float, default=0, help="stop after N seconds (0 = Ctrl+C)")
+    args = parser.parse_args()
+
+    devices = [parse_device_spec(s) for s in args.device]
+    engines = make_engines(devices, args.data_dir)
+    receiver = AsyncMultiReceiver(devices)
+    receiver.on_status = lambda name, msg: print(f"[{name}] {msg}")
+    for name, engine in engines.items():
+        engine.on_status = lambda msg, name=name: print(f"[{name}] {msg}")
+
+    lock = threading.Lock()
+
+    def on_batch(batch):
+        with lock:
+            for name, block in batch.items():
+                engines[name].ingest(block)
+
+    receiver.on_batch = on_batch
+    done = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: done.set())
+
+    for name, engine in engines.items():
+        if args.start and not engine.start_sampling():
+            print(f"[{name}] ❌ Failed to send START_SAMPLING")
+        if not engine.recorder.active:
+            engine.recorder.start()
+
+    receiver.start()
+    deadline = time.monotonic() + args.duration if args.duration > 0 else None
+    while not done.is_set():
+        if deadline is not None:
+            done.wait(max(0.0, min(5.0, deadline - time.monotonic())))
+        else:
+            done.wait(5.0)
+        with lock:
+            print("📊 " + " | ".join(f"{n}: {e.sample_count}" for n, e in engines.items()))
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+    receiver.stop()
+
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    for name, engine in engines.items():
+        if args.start:
+            engine.stop_sampling()
+        if engine.recorder.rows:
+            path, rows = engine.save(args.name, stamp)
+            print(f"[{name}] 💾 Saved {rows} samples -> {path}")
+        else:
+            engine.clear()
+            print(f"[{name}] ⚠️ No data recorded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Electronic Nose - Dirty-tracked plot refresh
+- Only curves on the visible tab are updated
+- Curves whose data did not change since the last frame are skipped
+- x axis = real time (seconds since session start) from the timestamp column,
+  converted once per buffer version / render range and shared by all curves
+- Time windows (last 30 s / 5 min / 1 h / whole session) rendered from a
+  MinMaxPyramid: window -> index range by binary search, bounded points
+"""
+
+import math
+
+import numpy as np
+
+# (label, detik): None = window live ring buffer, inf = seluruh sesi
+TIME_WINDOWS = (
+    ("Live Window", None),
+    ("Last 30 s", 30.0),
+    ("Last 5 min", 300.0),
+    ("Last 1 h", 3600.0),
+    ("Whole Session", math.inf),
+)
+
+
+# ===== PLOT REFRESHER =====
+class PlotRefresher:
+    """
+    Mengelola setData untuk beberapa grup kurva (satu grup per tab).
+
+    Setiap kurva mengingat versi buffer terakhir yang sudah digambar;
+    jika versi buffer belum berubah, kurva dilewati sehingga biaya redraw
+    saat stream idle hampir nol.
+    """
+
+    def __init__(self, buffers, lod=None, lod_max_points=4000):
+        self.buffers = buffers
+        self.lod = lod                 # MinMaxPyramid untuk window waktu / sesi penuh
+        self.lod_max_points = lod_max_points
+        self.window_s = None           # None = ring buffer, detik / inf = dari LOD
+        self.groups = []     # index = index tab, isi = {key: curve}
+        self._drawn = {}     # id(curve) -> versi buffer yang sudah digambar
+        self._x = {}         # kunci (versi, origin, rentang) -> x (detik), dipakai ulang antar kurva / frame
+        self.curves_drawn = 0
+        self.curves_skipped = 0
+
+    def add_group(self, curves):
+        """Daftarkan grup kurva {key: curve}. Return index grup"""
+        self.groups.append(curves)
+        return len(self.groups) - 1
+
+    @property
+    def session_mode(self):
+        """True jika kurva dirender dari LOD (window waktu atau seluruh sesi)"""
+        return self.window_s is not None
+
+    def set_session_mode(self, enabled):
+        """True = tampilkan seluruh sesi dari piramida LOD, False = window live"""
+        self.set_window(math.inf if enabled else None)
+
+    def set_window(self, seconds):
+        """Window waktu terakhir `seconds` (inf = seluruh sesi, None = ring buffer live)"""
+        if self.lod is None:
+            seconds = None
+        if seconds == self.window_s:
+            return
+        self.window_s = seconds
+        self.invalidate()
+        for group in self.groups:
+            for curve in group.values():
+                vb = curve.getViewBox()
+                if vb is not None:
+                    vb.enableAutoRange()
+
+    def invalidate(self):
+        """Paksa semua kurva digambar ulang pada refresh berikutnya"""
+        self._drawn.clear()
+        self._x.clear()
+
+    def _seconds(self, key, ts, origin):
+        """ts (ms) -> detik sejak origin; array yang sama selama `key` tidak berubah"""
+        key = key + (origin,)
+        x = self._x.get(key)
+        if x is None:
+            if len(self._x) >= 16:
+                self._x.clear()   # versi lama tidak akan dipakai lagi
+            x = self._x[key] = (ts - origin) / 1000.0
+        return x
+
+    def origin(self):
+        """Timestamp (ms) awal sesi untuk sumbu x (detik sejak mulai)"""
+        if self.lod is not None and self.lod.n:
+            return self.lod.timestamps[0]
+        if len(self.buffers):
+            return self.buffers.view("timestamp")[0]
+        return 0.0
+
+    def refresh(self, group):
+        """Update kurva pada grup `group`. Return jumlah kurva yang di-setData"""
+        if group < 0 or group >= len(self.groups):
+            return 0
+        if self.session_mode:
+            return self._refresh_session(group)
+        buffers = self.buffers
+        version = buffers.version
+        x = None
+        drawn = 0
+        for key, curve in self.groups[group].items():
+            if self._drawn.get(id(curve)) == version:
+                self.curves_skipped += 1
+                continue
+            if x is None:
+                x = self._seconds((id(buffers), version), buffers.view("timestamp"), self.origin())
+            curve.setData(x, buffers.view(key), skipFiniteCheck=True)
+            self._drawn[id(curve)] = version
+            drawn += 1
+        self.curves_drawn += drawn
+        return drawn
+
+    def _visible_range(self, curve):
+        """Rentang waktu (detik sejak awal) yang terlihat (None = ikut window / autorange)"""
+        vb = curve.getViewBox()
+        if vb is None or vb.autoRangeEnabled()[0]:
+            return None
+        x0, x1 = vb.viewRange()[0]
+        pad = (x1 - x0) * 0.5  # sedikit di luar layar supaya pan tidak kosong
+        return (x0 - pad, x1 + pad)
+
+    def window_range(self):
+        """Rentang index LOD untuk window aktif: binary search pada timestamp"""
+        lod = self.lod
+        if not lod.n or self.window_s is None or math.isinf(self.window_s):
+            return 0, lod.n
+        return lod.index_range(lod.timestamps[-1] - self.window_s * 1000.0, None)
+
+    def _refresh_session(self, group):
+        lod = self.lod
+        origin = self.origin()
+        base = None
+        drawn = 0
+        for key, curve in self.groups[group].items():
+            rng = self._visible_range(curve)
+            state = (lod.version, rng, self.window_s)
+            if self._drawn.get(id(curve)) == state:
+                self.curves_skipped += 1
+                continue
+            if rng is not None:
+                i0, i1 = lod.index_range(origin + rng[0] * 1000.0, origin + rng[1] * 1000.0)
+            else:
+                if base is None:
+                    base = self.window_range()
+                i0, i1 = base
+            x, y = lod.render(key, i0, i1, self.lod_max_points, time=True)
+            x = self._seconds((id(lod), lod.version, i0, i1, self.lod_max_points), x, origin)
+            curve.setData(x, y, skipFiniteCheck=True)
+            self._drawn[id(curve)] = state
+            drawn += 1
+        self.curves_drawn += drawn
+        return drawn
@@ -0,0 +1,109 @@
+"""
+Electronic Nose - Adaptive render scheduler
+- Replaces the fixed 80 ms refresh timer: a frame is scheduled only when
+  something requested it (new block, view / tab change, clear)
+- Frame rate follows the incoming block rate, capped at max_fps; bursts
+  of requests inside one frame interval are coalesced into one frame
+- No frames while the window is hidden or minimized; one catch-up frame
+  when it becomes visible again
+- Counters: frames rendered, requests skipped (coalesced / hidden), fps;
+  on_idle() fires once 1 s after the last frame so status can show 0 fps
+"""
+
+import time
+from collections import deque
+
+from PyQt6 import QtCore
+
+RENDER_MAX_FPS = 25.0
+IDLE_AFTER_MS = 1050       # > jendela fps 1 s, supaya fps terbaca 0
+
+
+# ===== SCHEDULER =====
+class RenderScheduler(QtCore.QObject):
+    """
+    request() menandai tampilan kotor dan menjadwalkan satu frame
+    (single-shot timer) paling cepat 1/max_fps setelah frame sebelumnya.
+    Saat idle tidak ada timer yang berjalan sama sekali.
+    """
+
+    def __init__(self, render, max_fps=RENDER_MAX_FPS, parent=None):
+        super().__init__(parent)
+        self.render = render
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._frame)
+        self.on_idle = None           # callable(): 1 s tanpa frame (fps sudah turun ke 0)
+        self._idle_timer = QtCore.QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(IDLE_AFTER_MS)
+        self._idle_timer.timeout.connect(self._idle)
+        self.set_max_fps(max_fps)
+        self.visible = True
+        self.dirty = False
+        self.requests = 0
+        self.frames_rendered = 0
+        self.frames_skipped = 0       # request yang tidak menghasilkan frame sendiri
+        self.frame_ms = 0.0           # durasi render frame terakhir
+        self._last = float("-inf")
+        self._frame_times = deque(maxlen=256)
+
+    def set_max_fps(self, fps):
+        self.max_fps = max(0.1, float(fps))
+        self.interval = 1.0 / self.max_fps
+
+    def request(self):
+        """Minta satu frame (aman dipanggil berkali-kali per blok)"""
+        self.requests += 1
+        self.dirty = True
+        if not self.visible or self._timer.isActive():
+            self.frames_skipped += 1
+            return
+        delay = self._last + self.interval - time.perf_counter()
+        self._timer.start(int(max(0.0, delay) * 1000.0 + 0.5))
+
+    def set_visible(self, visible):
+        """Jendela tampil / tersembunyi (minimize): berhenti render saat tidak terlihat"""
+        visible = bool(visible)
+        if visible == self.visible:
+            return
+        self.visible = visible
+        if not visible:
+            self._timer.stop()
+        elif self.dirty:
+            self.dirty = False
+            self.requests -= 1
+            self.request()
+
+    def stop(self):
+        self._timer.stop()
+        self._idle_timer.stop()
+
+    def _frame(self):
+        if not self.dirty or not self.visible:
+            return
+        self.dirty = False
+        t0 = time.perf_counter()
+        self.render()
+        now = time.perf_counter()
+        self.frame_ms = (now - t0) * 1000.0
+        self._last = now
+        self.frames_rendered += 1
+        self._frame_times.append(now)
+        self._idle_timer.start()
+
+    def _idle(self):
+        if self.on_idle is not None:
+            self.on_idle()
+
+    @property
+    def fps(self):
+        """Frame per detik selama 1 s terakhir (0 saat idle)"""
+        cutoff = time.perf_counter() - 1.0
+        return sum(1 for t in self._frame_times if t >= cutoff)
+
+    def stats(self):
+        return {"requests": self.requests, "rendered": self.frames_rendered,
+                "skipped": self.frames_skipped, "fps": self.fps, "frame_ms": self.frame_ms,
+                "max_fps": self.max_fps, "visible": self.visible}
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Offline replay of recorded sessions
+- Loads session CSVs (frontend/data, data_CSV_dan_JSON, EI exports, journals)
+- Re-emits them as SENSOR: lines using the original inter-sample timing
+  at 1x, Nx or max speed
+- Per-line stamps = the recorded timestamps shifted to the replay start,
+  so the spacing seen by the pipeline is the recorded one at any speed
+- Can serve the stream on TCP (default 8083) as a stand-in for the Rust backend
+
+Usage:
+    python replay.py "data/bawang merah 2_20251125_152528.csv" --speed 4
+    python replay.py session.csv --speed 0 --loop      # 0 = max speed
+"""
+
+import argparse
+import csv
+import socket
+import time
+
+import numpy as np
+
+from ringbuffer import SENSOR_CHANNELS
+from sensor_protocol import format_sensor_lines
+
+REPLAY_HOST = "127.0.0.1"
+REPLAY_PORT = 8083
+REPLAY_PERIOD_MS = 250.0   # jarak antar putaran loop jika file hanya satu sampel
+
+
+# ===== LOADING =====
+def load_session_csv(path):
+    """
+    Baca CSV sesi menjadi dict kolom (np.float64).
+    Kolom waktu boleh bernama 'ts' atau 'timestamp'; state/level opsional.
+    """
+    with open(path, newline="") as f:
+        text = f.read()
+    head, _, body = text.replace("\r", "").partition("\n")
+    header = [h.strip() for h in head.split(",")]
+    body = body.strip("\n")
+    try:
+        # Jalur cepat: satu split + satu konversi untuk seluruh file
+        cells = np.array(body.replace("\n", ",").split(","), dtype=np.float64) if body else np.empty(0)
+        table = cells.reshape(-1, len(header))
+    except ValueError:
+        # Sel kosong / baris kosong / jumlah kolom tidak konsisten
+        rows = [[c or "nan" for c in r] for r in csv.reader(body.split("\n")) if r]
+        table = np.array(rows, dtype=np.float64).reshape(len(rows), len(header))
+
+    columns = {}
+    for i, name in enumerate(header):
+        columns["timestamp" if name == "ts" else name] = table[:, i]
+    if "timestamp" not in columns:
+        columns["timestamp"] = np.arange(len(table), dtype=np.float64) * 250.0
+    for name in SENSOR_CHANNELS + ("state", "level"):
+        columns.setdefault(name, np.zeros(len(table)))
+    return columns
+
+
+# ===== SCHEDULING =====
+def iter_line_batches(columns, speed=1.0, batch_interval=0.05, batch_max=256, loop=False):
+    """
+    Generator batch baris SENSOR: (list bytes) sesuai timing asli.
+
+    speed > 0 : jarak antar sampel = selisih timestamp asli / speed
+    speed <= 0: secepat mungkin (batch_max baris per batch)
+    Batch dikirim paling cepat tiap batch_interval (coalescing seperti receiver).
+    """
+    lines = format_sensor_lines(columns)
+    n = len(lines)
+    if not n:
+        return
+    ts = np.asarray(columns["timestamp"], dtype=np.float64)
+    # Timestamp duplikat / mundur -> jarak 0
+    due = np.maximum.accumulate((ts - ts[0]) / 1000.0)
+    if speed > 0:
+        due = due / speed
+
+    while True:
+        t0 = time.monotonic()
+        i = 0
+        while i < n:
+            if speed <= 0:
+                j = min(n, i + batch_max)
+            else:
+                now = time.monotonic() - t0
+                if due[i] > now:
+                    time.sleep(due[i] - now)
+                    now = time.monotonic() - t0
+                j = min(int(np.searchsorted(due, now, side="right")), i + batch_max)
+                j = max(j, i + 1)
+            yield lines[i:j]
+            i = j
+            if speed > 0 and i < n:
+                time.sleep(batch_interval)
+        if not loop:
+            return
+
+
+def iter_stamped_batches(columns, speed=1.0, batch_interval=0.05, batch_max=256, loop=False,
+                         start_ms=None):
+    """
+    Seperti iter_line_batches, tetapi menghasilkan (lines, stamps): stamp
+    per baris = timestamp asli digeser ke start_ms (default waktu mulai
+    replay). Jarak antar sampel sama dengan rekaman berapapun speed-nya;
+    pada loop tiap putaran menyambung setelah putaran sebelumnya.
+    """
+    ts = np.asarray(columns["timestamp"], dtype=np.float64)
+    n = len(ts)
+    if not n:
+        return
+    start_ms = time.time() * 1000.0 if start_ms is None else start_ms
+    stamps = start_ms + (ts - ts[0])
+    steps = np.diff(ts)
+    steps = steps[np.isfinite(steps) & (steps > 0)]
+    lap = np.nanmax(ts) - ts[0] + (np.median(steps) if len(steps) else REPLAY_PERIOD_MS)
+    i = 0
+    for lines in iter_line_batches(columns, speed, batch_interval, batch_max, loop):
+        idx = i + np.arange(len(lines))
+        yield lines, stamps[idx % n] + (idx // n) * lap
+        i += len(lines)
+
+
+# ===== TCP SERVER (stand-in for Rust backend :8083) =====
+def serve_tcp(columns, host=REPLAY_HOST, port=REPLAY_PORT, speed=1.0, loop=False, log=print):
+    """Layani satu client GUI sekaligus, kirim stream SENSOR: seperti backend"""
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind((host, port))
+    srv.listen(1)
+    log(f"📼 Replay server on {host}:{port} ({len(columns['timestamp'])} samples, speed={speed or 'max'})")
+    try:
+        while True:
+            conn, addr = srv.accept()
+            log(f"🟢 Client connected: {addr[0]}:{addr[1]}")
+            sent = 0
+            try:
+                with conn:
+                    for batch in iter_line_batches(columns, speed=speed, loop=loop):
+                        conn.sendall(b"\n".join(batch) + b"\n")
+                        sent += len(batch)
+                    log(f"✅ Replay finished ({sent} samples), holding connection open")
+                    # Seperti backend: koneksi tetap terbuka sampai client menutup
+                    while conn.recv(1024):
+                        pass
+                log("🔌 Client disconnected")
+            except OSError as e:
+                log(f"⚠️ Client disconnected after {sent} samples: {e}")
+    finally:
+        srv.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded E-Nose session over TCP")
+    parser.add_argument("csv", help="session CSV file")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = realtime, N = N x faster, 0 = max")
+    parser.add_argument("--host", default=REPLAY_HOST)
+    parser.add_argument("--port", type=int, default=REPLAY_PORT)
+    parser.add_argument("--loop", action="store_true", help="repeat the file forever")
+    args = parser.parse_args()
+    try:
+        serve_tcp(load_session_csv(args.csv), args.host, args.port, args.speed, args.loop)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
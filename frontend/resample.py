@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Fixed-rate resampling and timestamp alignment
+- Irregular receive timestamps -> uniform grid (multiples of period_ms)
+- Duplicate timestamps averaged into one sample, out-of-order and NaN
+  rows dropped, grid points inside long holes flagged in a `gap` column
+- Interpolation: linear, previous (zero-order hold) or nearest;
+  state / level always use previous
+- One vectorized core for offline (whole file) and streaming (per block,
+  carried state); streaming output == offline output for the same data
+
+Note: the wire format carries no device clock, so live timestamps are
+the receive times. Lines of one TCP read get distinct stamps
+(sensor_protocol.ReceiveClock), so only true duplicates are averaged;
+resampling removes the remaining jitter.
+
+Usage:
+    python resample.py "../data_CSV_dan_JSON/bawang merah 2_3.csv" --period-ms 250
+    python resample.py data/*.csv --method previous --out data/resampled
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from replay import load_session_csv
+from ringbuffer import SENSOR_CHANNELS
+
+RESAMPLE_PERIOD_MS = 250.0   # Arduino kirim tiap 250 ms
+RESAMPLE_METHODS = ("linear", "previous", "nearest")
+GAP_FACTOR = 4.0             # default gap_ms = GAP_FACTOR x period
+CATEGORICAL_FIELDS = ("state", "level")
+MAX_GRID_POINTS = 5_000_000   # pengaman: file augmentasi dengan timestamp acak
+
+
+# ===== CORE =====
+def interpolate(ts, values, grid, method="linear"):
+    """
+    Nilai pada titik grid dari sampel (ts naik tegas, values (n, k)).
+    Return (out (len(grid), k), prev_index, span) - span = jarak sampel
+    pengapit untuk deteksi gap.
+    """
+    n = len(ts)
+    i = np.clip(np.searchsorted(ts, grid, side="right") - 1, 0, n - 1)
+    j = np.minimum(i + 1, n - 1)
+    t0 = ts[i]
+    t1 = ts[j]
+    span = t1 - t0
+    if method == "previous":
+        out = values[i]
+    elif method == "nearest":
+        out = np.where(((grid - t0) <= (t1 - grid))[:, None], values[i], values[j])
+    elif method == "linear":
+        w = np.divide(grid - t0, span, out=np.zeros_like(grid), where=span > 0)
+        out = values[i] + w[:, None] * (values[j] - values[i])
+    else:
+        raise ValueError(f"Unknown method: {method!r} (expected one of {RESAMPLE_METHODS})")
+    return out, i, span
+
+
+class StreamingResampler:
+    """
+    Resampler per blok dengan state yang dibawa antar blok.
+
+    process(block) mengembalikan dict kolom (timestamp, channel, state,
+    level, gap) untuk titik grid yang sudah pasti: grid <= timestamp sampel
+    kedua terakhir (sampel terakhir masih bisa mendapat duplikat di blok
+    berikutnya). flush() / process(..., final=True) mengeluarkan titik grid
+    sisa hingga sampel terakhir. State yang dibawa hanya dua sampel
+    terakhir (jumlah + cacah untuk rata-rata duplikat) dan waktu grid
+    berikutnya, jadi memori konstan.
+    """
+
+    def __init__(self, period_ms=RESAMPLE_PERIOD_MS, method="linear", gap_ms=None,
+                 channels=SENSOR_CHANNELS, max_points=MAX_GRID_POINTS):
+        if method not in RESAMPLE_METHODS:
+            raise ValueError(f"Unknown method: {method!r} (expected one of {RESAMPLE_METHODS})")
+        self.period = float(period_ms)
+        self.method = method
+        self.gap_ms = float(gap_ms) if gap_ms else GAP_FACTOR * self.period
+        self.channels = tuple(channels)
+        self.max_points = max_points
+        self.reset()
+
+    def reset(self):
+        self._t = None          # timestamp 2 sampel terakhir (carry)
+        self._x = None          # jumlah nilai channel (duplikat) 2 sampel terakhir
+        self._c = None          # cacah duplikat
+        self._m = None          # state / level 2 sampel terakhir
+        self._next = None       # titik grid berikutnya yang belum dikeluarkan
+        self.stats = {"input": 0, "duplicates": 0, "out_of_order": 0, "invalid": 0,
+                      "output": 0, "gaps": 0}
+
+    def _empty(self):
+        out = {"timestamp": np.empty(0)}
+        for name in self.channels + CATEGORICAL_FIELDS:
+            out[name] = np.empty(0)
+        out["gap"] = np.empty(0, dtype=bool)
+        return out
+
+    def process(self, block, final=False):
+        """Resample satu SensorBlock / dict kolom. Return dict kolom grid"""
+        ts = np.asarray(block["timestamp"], dtype=np.float64)
+        n = len(ts)
+        self.stats["input"] += n
+        x = np.column_stack([np.asarray(block[ch], dtype=np.float64) for ch in self.channels]) \
+            if n else np.empty((0, len(self.channels)))
+        m = np.column_stack([np.asarray(block[f], dtype=np.float64) if f in block else np.zeros(n)
+                             for f in CATEGORICAL_FIELDS]) if n else np.empty((0, 2))
+
+        ok = np.isfinite(ts) & np.isfinite(x).all(axis=1)
+        self.stats["invalid"] += int(n - ok.sum())
+        ts, x, m = ts[ok], x[ok], m[ok]
+
+        # Sambung dengan sampel carry, buang yang mundur, rata-rata duplikat
+        c = np.ones(len(ts))
+        if self._t is not None:
+            ts = np.concatenate([self._t, ts])
+            x = np.vstack([self._x, x])
+            c = np.concatenate([self._c, c])
+            m = np.vstack([self._m, m])
+        if not len(ts):
+            return self._empty()
+        forward = ts >= np.maximum.accumulate(ts)
+        self.stats["out_of_order"] += int(len(ts) - forward.sum())
+        ts, x, c, m = ts[forward], x[forward], c[forward], m[forward]
+        first = np.flatnonzero(np.r_[True, ts[1:] != ts[:-1]])
+        if len(first) < len(ts):
+            self.stats["duplicates"] += len(ts) - len(first)
+            size = np.diff(np.r_[first, len(ts)])
+            sums, counts = x[first], c[first]
+            # Jumlah berurutan per grup (sama persis dengan jumlah bertahap antar blok)
+            for k in range(1, int(size.max())):
+                sel = size > k
+                sums[sel] += x[first[sel] + k]
+                counts[sel] += c[first[sel] + k]
+            ts, x, c, m = ts[first], sums, counts, m[first + size - 1]
+
+        self._t, self._x, self._c, self._m = ts[-2:], x[-2:], c[-2:], m[-2:]
+        x = x / c[:, None]
+        if self._next is None:
+            self._next = np.ceil(ts[0] / self.period) * self.period
+
+        # Titik grid yang sudah pasti
+        if final:
+            limit = ts[-1]
+        elif len(ts) >= 2:
+            limit = ts[-2]
+        else:
+            return self._empty()
+        span = limit - self._next
+        count = int(np.floor(span / self.period)) + 1 if span >= 0 else 0
+        if count > self.max_points:
+            raise ValueError(f"{count} grid points: timestamps span too long / not usable")
+        if not count:
+            return self._empty()
+        grid = self._next + np.arange(count) * self.period
+        self._next = grid[-1] + self.period
+
+        values, i, spans = interpolate(ts, x, grid, self.method)
+        meta, _, _ = interpolate(ts, m, grid, "previous")
+        gap = (spans > self.gap_ms) & (grid > ts[i])
+        self.stats["output"] += count
+        self.stats["gaps"] += int(gap.sum())
+
+        out = {"timestamp": grid}
+        for k, name in enumerate(self.channels):
+            out[name] = values[:, k]
+        for k, name in enumerate(CATEGORICAL_FIELDS):
+            out[name] = meta[:, k]
+        out["gap"] = gap
+        return out
+
+    def flush(self):
+        """Keluarkan titik grid sisa sampai sampel terakhir (akhir sesi)"""
+        if self._t is None:
+            return self._empty()
+        return self.process({"timestamp": np.empty(0),
+                             **{ch: np.empty(0) for ch in self.channels}}, final=True)
+
+
+# ===== OFFLINE =====
+def resample(columns, period_ms=RESAMPLE_PERIOD_MS, method="linear", gap_ms=None,
+             channels=SENSOR_CHANNELS, sort=True):
+    """
+    Resample satu sesi utuh (dict kolom). Dengan sort=True sampel diurutkan
+    dulu (stable) sehingga file gabungan yang tidak urut tetap terpakai.
+    Return (dict kolom, stats)
+    """
+    if sort:
+        order = np.argsort(np.asarray(columns["timestamp"], dtype=np.float64), kind="stable")
+        columns = {name: np.asarray(col)[order] for name, col in columns.items()}
+    resampler = StreamingResampler(period_ms, method, gap_ms, channels)
+    out = resampler.process(columns, final=True)
+    return out, resampler.stats
+
+
+def write_resampled(columns, path, channels=SENSOR_CHANNELS):
+    """Tulis hasil resample sebagai CSV sesi (+ kolom state, level, gap)"""
+    fields = ("timestamp",) + tuple(channels) + CATEGORICAL_FIELDS + ("gap",)
+    table = np.column_stack([np.asarray(columns[f], dtype=np.float64) for f in fields])
+    row = "%d" + ",%.6g" * len(channels) + ",%d,%d,%d"
+    with open(path, "w", newline="") as f:
+        f.write(",".join(fields) + "\n")
+        if len(table):
+            f.write("\n".join([row] * len(table)) % tuple(table.ravel().tolist()) + "\n")
+    return len(table)
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Resample E-Nose sessions to a fixed rate")
+    parser.add_argument("csv", nargs="+", help="session CSV files")
+    parser.add_argument("--period-ms", type=float, default=RESAMPLE_PERIOD_MS)
+    parser.add_argument("--method", choices=RESAMPLE_METHODS, default="linear")
+    parser.add_argument("--gap-ms", type=float, help=f"default {GAP_FACTOR:g} x period")
+    parser.add_argument("--out", help="write <out>/<name>.csv")
+    args = parser.parse_args()
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    for path in args.csv:
+        try:
+            out, stats = resample(load_session_csv(path), args.period_ms, args.method, args.gap_ms)
+        except ValueError as e:
+            print(f"❌ {os.path.basename(path)}: {e}")
+            continue
+        print(f"⏱️ {os.path.basename(path)}: {stats['input']} -> {stats['output']} samples "
+              f"(dup={stats['duplicates']} out_of_order={stats['out_of_order']} "
+              f"invalid={stats['invalid']} gap={stats['gaps']})")
+        if args.out:
+            write_resampled(out, os.path.join(args.out, os.path.basename(path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Electronic Nose - Columnar ring buffer for live sensor channels
+- Preallocated float64 storage, one row per field
+- O(1) append, contiguous ordered views (no copy) for plotting
+- maxlen can be changed at runtime
+"""
+
+import numpy as np
+
+# ===== FIELD LAYOUT =====
+SENSOR_CHANNELS = ("co_m", "eth_m", "voc_m", "no2", "c2h50h_gm", "voc_gm", "co_gm")
+META_FIELDS = ("timestamp", "state", "level")
+BUFFER_FIELDS = META_FIELDS + SENSOR_CHANNELS
+
+
+# ===== RING BUFFER =====
+class SensorRingBuffer:
+    """
+    Ring buffer yang menyimpan semua field dalam satu array 2D (field x waktu).
+
+    Setiap sampel ditulis dua kali (posisi i dan i + maxlen), sehingga
+    sampel terakhir selalu berurutan dalam satu slice kontigu. Hasilnya
+    `view()` tidak pernah menyalin data dan `append()` tetap O(1).
+    """
+
+    def __init__(self, maxlen=200, fields=BUFFER_FIELDS):
+        self.fields = tuple(fields)
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        self._alloc(int(maxlen))
+        self.total = 0       # jumlah sampel yang pernah masuk (untuk dirty tracking)
+        self.generation = 0  # naik saat clear / resize (data lama tidak berlaku)
+
+    def _alloc(self, maxlen):
+        if maxlen < 1:
+            raise ValueError("maxlen must be >= 1")
+        self._maxlen = maxlen
+        self._data = np.zeros((len(self.fields), 2 * maxlen), dtype=np.float64)
+        self._head = 0  # posisi tulis berikutnya, 0 <= head < maxlen
+        self._size = 0
+
+    # ----- capacity -----
+    @property
+    def maxlen(self):
+        return self._maxlen
+
+    @maxlen.setter
+    def maxlen(self, value):
+        self.set_maxlen(value)
+
+    def set_maxlen(self, maxlen):
+        """Ubah kapasitas, pertahankan sampel terbaru yang masih muat"""
+        maxlen = int(maxlen)
+        if maxlen == self._maxlen:
+            return
+        keep = min(self._size, maxlen)
+        tail = self._data[:, self._end - keep:self._end].copy()
+        total = self.total
+        self._alloc(maxlen)
+        if keep:
+            self._write(tail)
+        self.total = total
+        self.generation += 1
+
+    def __len__(self):
+        return self._size
+
+    def keys(self):
+        return self.fields
+
+    @property
+    def _end(self):
+        return self._head + self._maxlen
+
+    # ----- write -----
+    def append(self, sample):
+        """Tambah satu sampel (dict field -> nilai). Field yang hilang/None -> 0.0"""
+        col = self._head
+        data = self._data
+        for i, name in enumerate(self.fields):
+            val = sample.get(name)
+            try:
+                val = float(val) if val is not None else 0.0
+            except (TypeError, ValueError):
+                val = 0.0
+            data[i, col] = val
+            data[i, col + self._maxlen] = val
+        self._advance(1)
+
+    def append_row(self, values):
+        """Tambah satu sampel dari urutan nilai sesuai `self.fields`"""
+        col = self._head
+        self._data[:, col] = values
+        self._data[:, col + self._maxlen] = values
+        self._advance(1)
+
+    def extend(self, columns, n=None):
+        """Tambah banyak sampel sekaligus dari dict field -> array (kolom)"""
+        if n is None:
+            n = len(next(iter(columns.values()))) if columns else 0
+        if n == 0:
+            return
+        block = np.zeros((len(self.fields), n), dtype=np.float64)
+        for name, i in self._index.items():
+            col = columns.get(name)
+            if col is not None:
+                block[i] = col
+        self._write(block)
+
+    def _write(self, block):
+        n = block.shape[1]
+        m = self._maxlen
+        skipped = 0
+        if n > m:
+            skipped = n - m
+            block = block[:, skipped:]
+            n = m
+        h = self._head
+        first = min(n, m - h)
+        self._data[:, h:h + first] = block[:, :first]
+        self._data[:, h + m:h + m + first] = block[:, :first]
+        rest = n - first
+        if rest:
+            self._data[:, :rest] = block[:, first:]
+            self._data[:, m:m + rest] = block[:, first:]
+        self.total += skipped
+        self._advance(n)
+
+    def _advance(self, n):
+        self._head = (self._head + n) % self._maxlen
+        self._size = min(self._size + n, self._maxlen)
+        self.total += n
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+        self.total = 0
+        self.generation += 1
+
+    @property
+    def version(self):
+        """Berubah setiap kali isi buffer berubah (append/extend/clear/resize)"""
+        return (self.generation, self.total)
+
+    # ----- read -----
+    def view(self, name):
+        """Slice berurutan (lama -> baru) untuk satu field, tanpa copy"""
+        end = self._end
+        return self._data[self._index[name], end - self._size:end]
+
+    def views(self, names=None):
+        return {name: self.view(name) for name in (names or self.fields)}
+
+    def latest(self, name):
+        if not self._size:
+            return None
+        return self._data[self._index[name], self._end - 1]
+
+    def __getitem__(self, name):
+        return self.view(name)
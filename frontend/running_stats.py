@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Incremental running statistics (Welford / Chan)
+- Per channel: count, mean, variance / std, min, max and drift (least
+  squares slope vs time, per minute)
+- Scopes: whole session, rolling time windows (default 60 s and 5 min)
+  and one accumulator per FSM phase
+- Each block is reduced once with NumPy and merged into the accumulators
+  with Chan's parallel form of Welford's update: O(1) state and O(1) work
+  per sample, no history is ever rescanned
+- Rolling windows are kept as fixed time buckets (default 5 s), so the
+  window edge has bucket granularity
+
+Usage:
+    python running_stats.py "data/bawang merah 2_20251125_152528.csv"
+    python running_stats.py data/*.csv --scope PRE_COND --scope "60 s"
+"""
+
+import argparse
+import os
+from collections import deque
+
+import numpy as np
+
+from replay import load_session_csv
+from ringbuffer import SENSOR_CHANNELS
+from sensor_protocol import FSM_STATES
+
+ROLLING_WINDOWS_S = (60, 300)
+BUCKET_S = 5.0
+STAT_NAMES = ("n", "mean", "std", "min", "max", "drift_per_min")
+
+
+# ===== ACCUMULATOR =====
+class Moments:
+    """
+    Momen per channel satu scope: mean + M2 (Welford), min / max, dan
+    co-moment waktu-nilai untuk drift. Dua Moments digabung dengan merge().
+    """
+
+    __slots__ = ("n", "mean", "m2", "min", "max", "t_mean", "t_m2", "c_tx")
+
+    def __init__(self, k=len(SENSOR_CHANNELS)):
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+        self.t_mean = 0.0
+        self.t_m2 = 0.0
+        self.c_tx = np.zeros(k)
+
+    @classmethod
+    def from_block(cls, t, x):
+        """Momen satu blok: t (n,) ms, x (n, k) - semua nilai valid"""
+        m = cls(x.shape[1])
+        n = len(x)
+        if not n:
+            return m
+        m.n = n
+        m.mean = x.mean(axis=0)
+        dx = x - m.mean
+        m.m2 = (dx * dx).sum(axis=0)
+        m.min = x.min(axis=0)
+        m.max = x.max(axis=0)
+        m.t_mean = float(t.mean())
+        dt = t - m.t_mean
+        m.t_m2 = float(dt @ dt)
+        m.c_tx = dt @ dx
+        return m
+
+    def merge(self, other):
+        """Gabungkan momen lain ke self (Chan et al.). Return self"""
+        if not other.n:
+            return self
+        if not self.n:
+            for name in self.__slots__:
+                value = getattr(other, name)
+                setattr(self, name, value.copy() if isinstance(value, np.ndarray) else value)
+            return self
+        n = self.n + other.n
+        w = self.n * other.n / n
+        d = other.mean - self.mean
+        dt = other.t_mean - self.t_mean
+        self.mean = self.mean + d * (other.n / n)
+        self.m2 = self.m2 + other.m2 + d * d * w
+        self.c_tx = self.c_tx + other.c_tx + dt * d * w
+        self.t_mean += dt * (other.n / n)
+        self.t_m2 += other.t_m2 + dt * dt * w
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.n = n
+        return self
+
+    def copy(self):
+        return Moments(len(self.mean)).merge(self)
+
+    @property
+    def var(self):
+        """Varian sampel (ddof=1)"""
+        return self.m2 / (self.n - 1) if self.n > 1 else np.zeros_like(self.m2)
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    @property
+    def drift(self):
+        """Kemiringan regresi linier nilai vs waktu, per menit"""
+        if self.t_m2 <= 0:
+            return np.zeros_like(self.c_tx)
+        return self.c_tx / self.t_m2 * 60000.0
+
+    def table(self):
+        """(k, len(STAT_NAMES)) untuk tampilan tabel"""
+        k = len(self.mean)
+        if not self.n:
+            return np.full((k, len(STAT_NAMES)), np.nan)
+        return np.column_stack([np.full(k, float(self.n)), self.mean, self.std,
+                                self.min, self.max, self.drift])
+
+
+class RollingMoments:
+    """Momen jendela waktu `window_s` terakhir dari bucket `bucket_s` detik"""
+
+    def __init__(self, window_s, bucket_s=BUCKET_S, k=len(SENSOR_CHANNELS)):
+        self.window_s = float(window_s)
+        self.bucket_ms = float(bucket_s) * 1000.0
+        self.k = k
+        self.n_buckets = max(1, int(np.ceil(self.window_s * 1000.0 / self.bucket_ms)))
+        self.reset()
+
+    def reset(self):
+        self._buckets = deque()   # (bucket id, Moments), id naik
+        self._merged = None       # cache hasil merge, dibuang saat ada update
+
+    def update(self, t, x, whole=None):
+        """whole: Moments blok ini jika sudah dihitung (dipakai ulang bila blok satu bucket)"""
+        if not len(x):
+            return
+        ids = np.floor(t / self.bucket_ms).astype(np.int64)
+        if self._buckets:
+            ids = np.maximum(ids, self._buckets[-1][0])   # timestamp mundur -> bucket terakhir
+        np.maximum.accumulate(ids, out=ids)
+        bounds = [0] + (np.flatnonzero(ids[1:] != ids[:-1]) + 1).tolist() + [len(ids)]
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            bid = int(ids[a])
+            m = whole if whole is not None and b - a == len(ids) else Moments.from_block(t[a:b], x[a:b])
+            if self._buckets and self._buckets[-1][0] == bid:
+                self._buckets[-1][1].merge(m)
+            else:
+                self._buckets.append((bid, m.copy()))
+        newest = self._buckets[-1][0]
+        while self._buckets[0][0] <= newest - self.n_buckets:
+            self._buckets.popleft()
+        self._merged = None
+
+    def moments(self):
+        if self._merged is None:
+            merged = Moments(self.k)
+            for _, m in self._buckets:
+                merged.merge(m)
+            self._merged = merged
+        return self._merged
+
+
+# ===== ENGINE =====
+class RunningStats:
+    """
+    Statistik berjalan semua scope. update(block) menerima SensorBlock /
+    dict kolom; baris dengan nilai tidak valid dilewati. `version` naik
+    setiap ada perubahan (dipakai GUI untuk refresh hanya jika perlu).
+    """
+
+    def __init__(self, channels=SENSOR_CHANNELS, windows_s=ROLLING_WINDOWS_S, bucket_s=BUCKET_S):
+        self.channels = tuple(channels)
+        self.windows_s = tuple(windows_s)
+        self.bucket_s = bucket_s
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        k = len(self.channels)
+        self.session = Moments(k)
+        self.phases = {}                      # index state FSM -> Moments
+        self.rolling = {w: RollingMoments(w, self.bucket_s, k) for w in self.windows_s}
+        self.skipped = 0
+        self.version += 1
+
+    def update(self, block):
+        t = np.asarray(block["timestamp"], dtype=np.float64)
+        n = len(t)
+        if not n:
+            return
+        x = np.column_stack([np.asarray(block[ch], dtype=np.float64) for ch in self.channels])
+        state = np.asarray(block["state"], dtype=np.float64) if "state" in block else np.zeros(n)
+        ok = np.isfinite(t) & np.isfinite(x).all(axis=1) & np.isfinite(state)
+        if not ok.all():
+            self.skipped += int(n - ok.sum())
+            t, x, state = t[ok], x[ok], state[ok]
+            if not len(t):
+                return
+        whole = Moments.from_block(t, x)
+        self.session.merge(whole)
+        state = state.astype(np.int64)
+        phases = [state[0]] if state[0] == state[-1] and (state == state[0]).all() else np.unique(state)
+        for s in phases:
+            m = whole if len(phases) == 1 else Moments.from_block(t[state == s], x[state == s])
+            if int(s) in self.phases:
+                self.phases[int(s)].merge(m)
+            else:
+                self.phases[int(s)] = m.copy()
+        for rolling in self.rolling.values():
+            rolling.update(t, x, whole)
+        self.version += 1
+
+    @staticmethod
+    def window_name(window_s):
+        return f"{window_s / 60:g} min" if window_s >= 120 else f"{window_s:g} s"
+
+    def scopes(self):
+        """Nama scope yang tersedia: Session, jendela rolling, fase FSM yang pernah terlihat"""
+        names = ["Session"] + [self.window_name(w) for w in self.windows_s]
+        return names + [FSM_STATES[s] if 0 <= s < len(FSM_STATES) else f"state {s}"
+                        for s in sorted(self.phases)]
+
+    def get(self, scope="Session"):
+        """Moments untuk satu scope (None jika scope belum ada)"""
+        if scope == "Session":
+            return self.session
+        for w, rolling in self.rolling.items():
+            if scope == self.window_name(w):
+                return rolling.moments()
+        for s, m in self.phases.items():
+            if scope == (FSM_STATES[s] if 0 <= s < len(FSM_STATES) else f"state {s}"):
+                return m
+        return None
+
+
+def session_stats(columns, channels=SENSOR_CHANNELS, windows_s=ROLLING_WINDOWS_S):
+    """Statistik satu sesi utuh (dict kolom)"""
+    stats = RunningStats(channels, windows_s)
+    stats.update(columns)
+    return stats
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Running statistics of E-Nose sessions")
+    parser.add_argument("csv", nargs="+", help="session CSV files")
+    parser.add_argument("--scope", action="append", help="Session, '60 s', '5 min', PRE_COND, ... (repeatable)")
+    args = parser.parse_args()
+
+    for path in args.csv:
+        stats = session_stats(load_session_csv(path))
+        print(f"📈 {os.path.basename(path)}: {stats.session.n} samples, scopes={stats.scopes()}")
+        for scope in args.scope or ["Session"]:
+            m = stats.get(scope)
+            if m is None:
+                print(f"   {scope}: -")
+                continue
+            print(f"   [{scope}] {'channel':<10}" + "".join(f"{s:>14}" for s in STAT_NAMES))
+            for ch, row in zip(stats.channels, m.table()):
+                print(f"   [{scope}] {ch:<10}" + "".join(f"{v:>14.4g}" for v in row))
+
+
+if __name__ == "__main__":
+    main()
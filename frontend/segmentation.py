@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Electronic Nose - Session segmentation into training windows
+- Vectorized boundary detection on the FSM state / level columns
+- Modes: whole session, per motor level, per FSM phase, fixed sliding window
+- Each window is written as its own CSV (sensor columns only, EI layout)
+  and can be queued for Edge Impulse upload
+
+Usage:
+    python segmentation.py "data/bawang merah 2_20251125_152528.csv" --mode level
+    python segmentation.py data/*.csv --mode sliding --window-s 30 --step-s 10 --upload
+"""
+
+import argparse
+import csv
+import os
+
+import numpy as np
+
+from replay import load_session_csv
+from sensor_protocol import FSM_STATES
+from session_recorder import SENSOR_CSV_FIELDS, parse_session_filename
+
+SEGMENT_MODES = ("session", "level", "phase", "sliding")
+SEGMENT_DIR = os.path.join("data", "segments")
+SAMPLE_PERIOD_MS = 250.0   # Arduino kirim tiap 250 ms
+
+# Fase yang membawa respons aroma (PRE_COND = baseline, IDLE/DONE = tidak aktif)
+ACTIVE_STATES = tuple(FSM_STATES.index(s) for s in ("RAMP_UP", "HOLD", "PURGE", "RECOVERY"))
+
+
+# ===== SEGMENT =====
+class Segment:
+    """Rentang index [start, stop) pada kolom sesi"""
+
+    __slots__ = ("start", "stop", "state", "level", "tag")
+
+    def __init__(self, start, stop, tag, state=None, level=None):
+        self.start = int(start)
+        self.stop = int(stop)
+        self.tag = tag
+        self.state = state
+        self.level = level
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __repr__(self):
+        return f"<Segment {self.tag} [{self.start}:{self.stop}]>"
+
+
+def _runs(key):
+    """(starts, stops) dari run nilai yang sama secara berurutan"""
+    n = len(key)
+    if not n:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    edges = np.flatnonzero(key[1:] != key[:-1]) + 1
+    return np.r_[0, edges], np.r_[edges, n]
+
+
+def _fsm_columns(columns):
+    state = np.nan_to_num(np.asarray(columns["state"], dtype=np.float64), nan=-1).astype(np.int64)
+    level = np.nan_to_num(np.asarray(columns["level"], dtype=np.float64), nan=-1).astype(np.int64)
+    return state, level
+
+
+# ===== BOUNDARY DETECTION =====
+def segment_phases(columns, states=ACTIVE_STATES, min_samples=1):
+    """Satu segment per run (state, level) yang sama, hanya state di `states`"""
+    state, level = _fsm_columns(columns)
+    starts, stops = _runs(state * 16 + level)
+    keep = np.isin(state[starts], states) & (stops - starts >= min_samples)
+    return [
+        Segment(a, b, f"L{level[a] + 1}_{FSM_STATES[state[a]]}", int(state[a]), int(level[a]))
+        for a, b in zip(starts[keep], stops[keep])
+    ]
+
+
+def segment_levels(columns, states=ACTIVE_STATES, min_samples=1):
+    """Satu segment per level motor (gabungan fase `states` berurutan)"""
+    state, level = _fsm_columns(columns)
+    key = np.where(np.isin(state, states), level, -1)
+    starts, stops = _runs(key)
+    keep = (key[starts] >= 0) & (stops - starts >= min_samples)
+    return [Segment(a, b, f"L{key[a] + 1}", level=int(key[a]))
+            for a, b in zip(starts[keep], stops[keep])]
+
+
+def sliding_windows(columns, window, step=None, states=None):
+    """
+    Window panjang tetap `window` sampel tiap `step` sampel. Jika `states`
+    diberikan, window yang memuat sampel di luar `states` dibuang.
+    """
+    n = len(columns["timestamp"])
+    step = step or window
+    if window <= 0 or n < window:
+        return []
+    starts = np.arange(0, n - window + 1, step)
+    if states is not None:
+        state, _ = _fsm_columns(columns)
+        outside = np.r_[0, np.cumsum(~np.isin(state, states))]
+        starts = starts[outside[starts + window] == outside[starts]]
+    return [Segment(a, a + window, f"W{i:03d}") for i, a in enumerate(starts)]
+
+
+def samples_for(columns, seconds):
+    """Konversi durasi ke jumlah sampel dari median jarak timestamp"""
+    ts = np.asarray(columns["timestamp"], dtype=np.float64)
+    dt = np.median(np.diff(ts)) if len(ts) > 1 else 0.0
+    if not np.isfinite(dt) or dt <= 0:
+        dt = SAMPLE_PERIOD_MS
+    return max(1, int(round(seconds * 1000.0 / dt)))
+
+
+def segment_session(columns, mode="level", window_s=30.0, step_s=None, min_samples=4,
+                    states=ACTIVE_STATES):
+    """Dispatcher untuk SEGMENT_MODES"""
+    n = len(columns["timestamp"])
+    if mode == "session":
+        return [Segment(0, n, "full")] if n else []
+    if mode == "level":
+        return segment_levels(columns, states, min_samples)
+    if mode == "phase":
+        return segment_phases(columns, states, min_samples)
+    if mode == "sliding":
+        window = samples_for(columns, window_s)
+        step = samples_for(columns, step_s) if step_s else window
+        has_fsm = bool(np.any(np.asarray(columns["state"]) > 0))
+        return sliding_windows(columns, window, step, states if has_fsm else None)
+    raise ValueError(f"Unknown segment mode: {mode!r} (expected one of {SEGMENT_MODES})")
+
+
+# ===== OUTPUT =====
+def write_segments(columns, segments, out_dir, fields=SENSOR_CSV_FIELDS):
+    """
+    Tulis setiap segment sebagai <out_dir>/<tag>.csv (tag ganda diberi
+    akhiran _2, _3, ... misalnya siklus FSM kedua). Return list (path, segment).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cols = [np.asarray(columns[f], dtype=np.float64) for f in fields]
+    seen = {}
+    written = []
+    for seg in segments:
+        count = seen[seg.tag] = seen.get(seg.tag, 0) + 1
+        name = seg.tag if count == 1 else f"{seg.tag}_{count}"
+        path = os.path.join(out_dir, f"{name}.csv")
+        part = [c[seg.start:seg.stop] for c in cols]
+        part[0] = part[0].astype(np.int64)  # timestamp
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            writer.writerows(zip(*[c.tolist() for c in part]))
+        written.append((path, seg))
+    return written
+
+
+def segment_file(csv_path, mode="level", out_root=SEGMENT_DIR, **kwargs):
+    """Segmentasi satu file sesi ke <out_root>/<nama sesi>/. Return list (path, segment)"""
+    columns = load_session_csv(csv_path)
+    segments = segment_session(columns, mode, **kwargs)
+    session = os.path.splitext(os.path.basename(csv_path))[0]
+    return write_segments(columns, segments, os.path.join(out_root, f"{session}.{mode}"))
+
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Cut E-Nose sessions into training windows")
+    parser.add_argument("csv", nargs="+", help="session CSV files")
+    parser.add_argument("--mode", choices=SEGMENT_MODES, default="level")
+    parser.add_argument("--window-s", type=float, default=30.0, help="sliding window length")
+    parser.add_argument("--step-s", type=float, help="sliding window step (default = window)")
+    parser.add_argument("--min-samples", type=int, default=4)
+    parser.add_argument("--out", default=SEGMENT_DIR)
+    parser.add_argument("--upload", action="store_true", help="queue windows for Edge Impulse")
+    parser.add_argument("--label", help="upload label (default: parsed from file name)")
+    args = parser.parse_args()
+
+    uploads = None
+    if args.upload:
+        from ei_upload import UploadQueue
+        uploads = UploadQueue(workers=4)
+        uploads.on_finished = lambda job, ok, msg: print(
+            f"{'✅' if ok else '❌'} {job.sample_name}" + ("" if ok else f": {msg}"))
+
+    for path in args.csv:
+        written = segment_file(path, args.mode, args.out, window_s=args.window_s,
+                               step_s=args.step_s, min_samples=args.min_samples)
+        info = parse_session_filename(path)
+        print(f"✂️ {os.path.basename(path)}: {len(written)} windows ({args.mode})")
+        for seg_path, seg in written:
+            if uploads is not None:
+                name = os.path.splitext(os.path.basename(seg_path))[0]
+                uploads.submit(seg_path, args.label or info["label"], f"{info['sample_name']}.{name}")
+
+    if uploads is not None:
+        uploads.start()
+        uploads.join()
+        uploads.stop(wait=False)
+        print(f"📊 uploaded={uploads.uploaded} failed={uploads.failed} parked={len(uploads.parked)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Electronic Nose - SENSOR: protocol helpers
+- Byte-level line framing on a reusable bytearray (recv_into)
+- Bulk vectorized parser: many SENSOR: records -> NumPy columns
+- Per-record validity mask + malformed-line counters
+- Columnar sample blocks shared by receiver, GUI and tools
+- Per-line receive stamps (lines of one recv spread over the read interval)
+- Formatter (columns -> SENSOR: lines) for replay / test streams
+
+Format (Arduino -> Rust -> GUI):
+    SENSOR:no2,eth,voc,co,co_mics,eth_mics,voc_mics,state,level
+"""
+
+import time
+
+import numpy as np
+
+from ringbuffer import BUFFER_FIELDS
+
+PREFIX = b"SENSOR:"
+
+# Urutan field pada baris SENSOR: (eth GM = c2h50h_gm)
+PROTOCOL_FIELDS = (
+    "no2", "c2h50h_gm", "voc_gm", "co_gm",
+    "co_m", "eth_m", "voc_m",
+    "state", "level",
+)
+N_PROTOCOL_FIELDS = len(PROTOCOL_FIELDS)
+
+INT_FIELDS = ("timestamp", "state", "level")
+
+SAMPLE_PERIOD_MS = 250.0   # Arduino kirim satu baris SENSOR: tiap 250 ms
+
+# State FSM Arduino (nilai kolom state)
+FSM_STATES = ("IDLE", "PRE_COND", "RAMP_UP", "HOLD", "PURGE", "RECOVERY", "DONE")
+
+
+# ===== COLUMNAR SAMPLE BLOCK =====
+class SensorBlock:
+    """Blok sampel dalam bentuk kolom: field -> np.ndarray (panjang sama)"""
+
+    __slots__ = ("columns", "n", "valid", "malformed", "stamps", "view")
+
+    def __init__(self, columns, n=None, valid=None, malformed=0):
+        self.columns = columns
+        if n is None:
+            n = len(next(iter(columns.values()))) if columns else 0
+        self.n = n
+        self.valid = valid          # bool mask per record (None = semua valid)
+        self.malformed = malformed  # jumlah record rusak di blok ini
+        self.stamps = None          # stamp latency per tahap (latency.py, jika aktif)
+        self.view = None            # deret tampilan dari jalur rekaman (AcquisitionEngine.record)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def compress(self):
+        """Blok baru berisi hanya record yang valid"""
+        if self.valid is None or self.valid.all():
+            return self
+        mask = self.valid
+        columns = {name: col[mask] for name, col in self.columns.items()}
+        block = SensorBlock(columns, int(mask.sum()), None, self.malformed)
+        block.stamps = self.stamps
+        block.view = self.view
+        return block
+
+    def rows(self, fields=None):
+        """Iterasi per-baris sebagai dict (untuk CSV/JSON)"""
+        fields = [f for f in (fields or self.columns) if f in self.columns]
+        cols = [self.columns[f].tolist() for f in fields]
+        casts = [f in INT_FIELDS for f in fields]
+        for values in zip(*cols):
+            yield {
+                f: (int(v) if cast else v)
+                for f, v, cast in zip(fields, values, casts)
+            }
+
+
+def block_from_samples(samples, fields=BUFFER_FIELDS):
+    """Ubah list dict hasil parse_sensor_data menjadi SensorBlock"""
+    n = len(samples)
+    columns = {
+        name: np.fromiter((s.get(name, 0.0) for s in samples), dtype=np.float64, count=n)
+        for name in fields
+    }
+    return SensorBlock(columns, n)
+
+
+# ===== PARSE STATISTICS =====
+class ParseStats:
+    """Counter kumulatif untuk parser / framer"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lines = 0       # semua baris yang di-frame
+        self.records = 0     # baris SENSOR: valid
+        self.malformed = 0   # baris SENSOR: yang gagal di-parse
+        self.ignored = 0     # baris non-SENSOR (bukan kosong)
+        self.overflows = 0   # baris terlalu panjang yang dibuang framer
+
+    def as_dict(self):
+        return {
+            "lines": self.lines,
+            "records": self.records,
+            "malformed": self.malformed,
+            "ignored": self.ignored,
+            "overflows": self.overflows,
+        }
+
+
+# ===== LINE FRAMER =====
+class LineFramer:
+    """
+    Framing baris '\\n' di atas satu bytearray yang dipakai ulang.
+
+    recv_from() membaca langsung ke buffer dengan recv_into (tanpa alokasi
+    per-chunk), pop_lines() mengembalikan semua baris lengkap dan menggeser
+    sisa baris yang belum lengkap ke awal buffer.
+    """
+
+    def __init__(self, capacity=65536, stats=None):
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._fill = 0
+        self.stats = stats if stats is not None else ParseStats()
+
+    def _make_room(self):
+        if self._fill == len(self._buf):
+            # Buffer penuh tanpa newline: baris rusak/terlalu panjang, buang
+            self._fill = 0
+            self.stats.overflows += 1
+
+    def recv_from(self, sock):
+        """Baca dari socket ke buffer. Return jumlah byte (0 = koneksi tutup)"""
+        self._make_room()
+        n = sock.recv_into(self._view[self._fill:])
+        self._fill += n
+        return n
+
+    def feed(self, data):
+        """Masukkan bytes secara manual (replay / test). Return list baris lengkap"""
+        lines = []
+        data = memoryview(data)
+        while len(data):
+            self._make_room()
+            k = min(len(data), len(self._buf) - self._fill)
+            self._view[self._fill:self._fill + k] = data[:k]
+            self._fill += k
+            data = data[k:]
+            lines.extend(self.pop_lines())
+        return lines
+
+    def pop_lines(self):
+        """Ambil semua baris lengkap (bytes, sudah di-strip)"""
+        end = self._buf.rfind(b"\n", 0, self._fill)
+        if end < 0:
+            return []
+        lines = bytes(self._view[:end]).split(b"\n")
+        rest = self._fill - end - 1
+        if rest:
+            self._buf[:rest] = self._buf[end + 1:self._fill]
+        self._fill = rest
+        self.stats.lines += len(lines)
+        return [line.strip() for line in lines]
+
+    def clear(self):
+        self._fill = 0
+
+
+# ===== RECEIVE STAMPS =====
+class ReceiveClock:
+    """
+    Stamp terima per baris untuk satu koneksi. Baris dari satu recv tidak
+    diberi waktu yang sama (resampler akan merata-ratakannya sebagai
+    duplikat): k baris disebar rata dari stamp baris sebelumnya sampai
+    waktu terima, paling jauh k * period_ms ke belakang (burst setelah
+    jeda panjang tetap berjarak periode Arduino). Baris terakhir = waktu
+    terima, stamp naik tegas selama jarak >= 1 ms.
+    """
+
+    def __init__(self, period_ms=SAMPLE_PERIOD_MS):
+        self.period_ms = float(period_ms)
+        self.last = -np.inf
+
+    def reset(self):
+        self.last = -np.inf
+
+    def stamps(self, k, now=None):
+        """Array k stamp (ms) untuk baris yang diterima pada `now` (default sekarang)"""
+        now = time.time() * 1000.0 if now is None else now
+        start = min(max(self.last, now - k * self.period_ms), now)
+        stamps = start + (now - start) * np.arange(1, k + 1) / k
+        if k:
+            self.last = now
+        return stamps
+
+
+# ===== BULK PARSER =====
+def _parse_records(payloads):
+    """Lambat tapi aman: parse per record, return (values, valid)"""
+    n = len(payloads)
+    values = np.full((n, N_PROTOCOL_FIELDS), np.nan)
+    valid = np.zeros(n, dtype=bool)
+    for i, payload in enumerate(payloads):
+        parts = payload.split(b",")
+        if len(parts) < N_PROTOCOL_FIELDS:
+            continue
+        try:
+            values[i] = [float(p) for p in parts[:N_PROTOCOL_FIELDS]]
+        except ValueError:
+            continue
+        valid[i] = True
+    return values, valid
+
+
+def parse_sensor_lines(lines, timestamps=None, stats=None):
+    """
+    Parse banyak baris SENSOR: sekaligus menjadi satu SensorBlock.
+
+    lines      : list bytes/str (tanpa newline)
+    timestamps : None (waktu sekarang), skalar ms, atau array per-baris
+    Record rusak tetap ada di blok dengan valid=False dan nilai NaN.
+    """
+    if lines and isinstance(lines[0], str):
+        lines = [line.encode() for line in lines]
+
+    idx = [i for i, line in enumerate(lines) if line.startswith(PREFIX)]
+    payloads = [lines[i][len(PREFIX):] for i in idx]
+    n = len(payloads)
+
+    if stats is not None:
+        stats.ignored += sum(1 for line in lines if line and not line.startswith(PREFIX))
+
+    values = np.full((n, N_PROTOCOL_FIELDS), np.nan)
+    valid = np.zeros(n, dtype=bool)
+
+    # Record dengan field kurang dari 9 langsung invalid
+    counts = np.fromiter((p.count(b",") for p in payloads), dtype=np.int64, count=n)
+    ok = np.flatnonzero(counts >= N_PROTOCOL_FIELDS - 1)
+    if len(ok):
+        subset = [
+            payloads[i] if counts[i] == N_PROTOCOL_FIELDS - 1
+            else b",".join(payloads[i].split(b",")[:N_PROTOCOL_FIELDS])
+            for i in ok
+        ]
+        # Fast path: satu join + satu konversi untuk seluruh blok
+        try:
+            tokens = np.array(b",".join(subset).split(b","))
+            values[ok] = tokens.astype(np.float64).reshape(len(ok), N_PROTOCOL_FIELDS)
+            valid[ok] = True
+        except ValueError:
+            values[ok], valid[ok] = _parse_records(subset)
+
+    finite = np.isfinite(values).all(axis=1)
+    bad = valid & ~finite
+    if bad.any():
+        values[bad] = np.nan
+        valid &= finite
+
+    if timestamps is None:
+        ts = np.full(n, time.time() * 1000.0)
+    elif np.ndim(timestamps) == 0:
+        ts = np.full(n, float(timestamps))
+    else:
+        ts = np.asarray(timestamps, dtype=np.float64)[idx]
+
+    columns = {"timestamp": np.floor(ts)}
+    values = values.T
+    for j, name in enumerate(PROTOCOL_FIELDS):
+        columns[name] = np.ascontiguousarray(values[j])
+
+    malformed = int(n - valid.sum())
+    if stats is not None:
+        stats.records += n - malformed
+        stats.malformed += malformed
+    return SensorBlock(columns, n, valid, malformed)
+
+
+def parse_sensor_data(line: str) -> dict:
+    """Parse satu baris SENSOR: menjadi dict (None jika rusak)"""
+    if not line.startswith("SENSOR:"):
+        return None
+    block = parse_sensor_lines([line.strip()])
+    if not block.valid[0]:
+        return None
+    data = {name: block[name][0].item() for name in PROTOCOL_FIELDS}
+    data["state"] = int(data["state"])
+    data["level"] = int(data["level"])
+    data["timestamp"] = int(block["timestamp"][0])
+    return data
+
+
+# ===== FORMATTER =====
+def format_sensor_lines(columns, n=None):
+    """
+    Kebalikan parse_sensor_lines: kolom -> list baris SENSOR: (bytes, tanpa
+    newline). Nilai sensor ditulis dengan repr terpendek yang round-trip
+    (nilai rekaman tidak kehilangan digit; bacaan Arduino 3 desimal tetap
+    tertulis sama), state/level integer. Field yang tidak ada ditulis 0.
+    """
+    if n is None:
+        n = len(next(iter(columns.values()))) if columns else 0
+    zeros = np.zeros(n)
+    cols = [np.asarray(columns.get(name, zeros), dtype=np.float64) for name in PROTOCOL_FIELDS]
+    table = np.column_stack(cols) if n else np.empty((0, N_PROTOCOL_FIELDS))
+    fmt = b"SENSOR:" + b",".join([b"%r"] * 7 + [b"%d", b"%d"])
+    return [fmt % tuple(row) for row in table.tolist()]
@@ -0,0 +1,321 @@
+"""
+Electronic Nose - Streaming session recorder
+- Rows are appended to an on-disk CSV journal by a background thread
+- Batched flush + periodic fsync, bounded in-memory backlog
+- Interrupted sessions (journal left behind) can be recovered at startup
+- Save = finalize + rename, no re-serialization of the whole history
+"""
+
+import csv
+import glob
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Kolom sensor untuk upload / EI, ditambah state + level FSM untuk segmentasi
+SENSOR_CSV_FIELDS = ("timestamp", "co_m", "eth_m", "voc_m", "no2", "c2h50h_gm", "voc_gm", "co_gm")
+CSV_FIELDS = SENSOR_CSV_FIELDS + ("state", "level")
+INT_FIELDS = ("timestamp", "state", "level")
+JOURNAL_PREFIX = ".journal_"
+
+# "<sample name>_<YYYYmmdd_HHMMSS>.csv", sample name = "<label> <replicate>"
+_STAMP_RE = re.compile(r"^(?:ei_)?(?P<name>.+?)(?:_(?P<stamp>\d{8}_\d{6}))?$")
+_REPLICATE_RE = re.compile(r"^(?P<label>.*?[^\d_])\s*(?P<replicate>\d+(?:_\d+)?)$")
+
+
+def parse_session_filename(path):
+    """
+    Pecah nama file sesi menjadi sample name, label, replicate dan stamp:
+        "bawang merah 2_20251125_152528.csv" -> label "bawang merah", replicate "2"
+        "bawang bombai 1_2.csv"              -> label "bawang bombai", replicate "1_2"
+    Label dinormalisasi (huruf kecil, spasi tunggal).
+    """
+    base = os.path.splitext(os.path.basename(path))[0]
+    m = _STAMP_RE.match(base)
+    name = m.group("name").strip()
+    m2 = _REPLICATE_RE.match(name)
+    label = m2.group("label") if m2 else name
+    return {
+        "sample_name": name,
+        "label": " ".join(label.lower().split()),
+        "replicate": m2.group("replicate") if m2 else "",
+        "stamp": m.group("stamp") or "",
+    }
+
+
+# ===== SESSION RECORDER =====
+class SessionRecorder:
+    """
+    Menulis sampel sesi ke file journal secara bertahap.
+
+    append()/append_block() hanya menaruh data di antrian (O(1) di thread
+    GUI); thread writer menulis antrian ke disk tiap `flush_interval` dan
+    fsync tiap `fsync_interval`. Jika antrian melebihi `max_pending`
+    baris, producer menulis sendiri secara sinkron (tidak ada data hilang,
+    RAM tetap terbatas).
+    """
+
+    def __init__(self, directory="data", fields=CSV_FIELDS, flush_interval=0.5,
+                 fsync_interval=5.0, max_pending=8192):
+        self.directory = directory
+        self.fields = tuple(fields)
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_pending = max_pending
+
+        self.path = None
+        self.rows = 0
+        self.started_at = None
+        self._file = None
+        self._writer = None
+        self._pending = []
+        self._pending_rows = 0
+        self._last_fsync = 0.0
+        self._lock = threading.Lock()        # antrian
+        self._io_lock = threading.Lock()     # file
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+        self._running = False
+
+    @property
+    def active(self):
+        return self._file is not None
+
+    # ----- lifecycle -----
+    def start(self):
+        """Mulai journal baru (journal aktif sebelumnya dibuang)"""
+        if self.active:
+            self.discard()
+        os.makedirs(self.directory, exist_ok=True)
+        self.started_at = datetime.now()
+        stamp = self.started_at.strftime("%Y%m%d_%H%M%S_%f")
+        self.path = os.path.join(self.directory, f"{JOURNAL_PREFIX}{stamp}.csv")
+        self._file = open(self.path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.fields)
+        self._file.flush()
+        self.rows = 0
+        self._last_fsync = time.monotonic()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="SessionRecorder", daemon=True)
+        self._thread.start()
+
+    def _stop(self):
+        if self._thread is not None:
+            with self._lock:
+                self._running = False
+                self._wake.notify()
+            self._thread.join()
+            self._thread = None
+        self._flush(fsync=True)
+
+    def close(self):
+        """Flush + tutup, journal tetap ada (bisa di-recover saat startup)"""
+        if not self.active:
+            return
+        self._stop()
+        self._file.close()
+        self._file = None
+        self._writer = None
+
+    def finalize(self, dest_path):
+        """Tutup journal lalu rename menjadi file CSV final. Return dest_path"""
+        if not self.active:
+            raise RuntimeError("No active session")
+        self.close()
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        os.replace(self.path, dest_path)
+        self.path = None
+        self.rows = 0
+        return dest_path
+
+    def discard(self):
+        """Hentikan dan hapus journal aktif"""
+        if self.active:
+            self.close()
+        with self._lock:
+            self._pending = []
+            self._pending_rows = 0
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+        self.rows = 0
+
+    # ----- producer side -----
+    def append(self, row):
+        """Tambah satu baris (dict)"""
+        if not self.active:
+            self.start()
+        self._enqueue([tuple(row.get(f) for f in self.fields)], 1)
+
+    def append_block(self, block):
+        """Tambah SensorBlock (kolom), tanpa konversi per-baris di thread pemanggil"""
+        n = len(block)
+        if not n:
+            return
+        if not self.active:
+            self.start()
+        self._enqueue({f: block[f] for f in self.fields}, n)
+
+    def _enqueue(self, chunk, n):
+        with self._lock:
+            self._pending.append(chunk)
+            self._pending_rows += n
+            self.rows += n
+            overflow = self._pending_rows >= self.max_pending
+        if overflow:
+            self._flush()
+
+    # ----- writer side -----
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._running:
+                    self._wake.wait(self.flush_interval)
+                running = self._running
+            self._flush()
+            if not running:
+                return
+
+    def _flush(self, fsync=False):
+        # io_lock dipegang sebelum mengambil antrian supaya urutan chunk terjaga
+        with self._io_lock:
+            with self._lock:
+                chunks, self._pending = self._pending, []
+                self._pending_rows = 0
+            if self._file is None:
+                return
+            for chunk in chunks:
+                if isinstance(chunk, dict):
+                    cols = [
+                        chunk[f].astype(np.int64).tolist() if f in INT_FIELDS else chunk[f].tolist()
+                        for f in self.fields
+                    ]
+                    self._writer.writerows(zip(*cols))
+                else:
+                    self._writer.writerows(chunk)
+            if chunks:
+                self._file.flush()
+            now = time.monotonic()
+            if fsync or now - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+
+    # ----- recovery -----
+    @staticmethod
+    def find_interrupted(directory="data"):
+        """Journal yang tertinggal dari sesi sebelumnya (crash / tidak disimpan)"""
+        return sorted(glob.glob(os.path.join(directory, f"{JOURNAL_PREFIX}*.csv")))
+
+    @staticmethod
+    def recover(journal_path, dest_path):
+        """Potong baris terakhir yang tidak lengkap lalu rename ke dest_path"""
+        with open(journal_path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size:
+                f.seek(max(0, size - 65536))
+                tail = f.read()
+                if not tail.endswith(b"\n"):
+                    cut = tail.rfind(b"\n")
+                    f.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+        os.replace(journal_path, dest_path)
+        return dest_path
+
+
+# ===== JSON EXPORT =====
+class ExportCancelled(Exception):
+    pass
+
+
+def _json_values(col, as_int=False):
+    """Isi array JSON (tanpa kurung) untuk satu chunk kolom; NaN / inf -> null"""
+    ok = np.isfinite(col)
+    values = col.astype(np.int64).tolist() if as_int and ok.all() else col.tolist()
+    if not ok.all():
+        if as_int:
+            values = [int(v) for v in np.where(ok, col, 0).astype(np.int64).tolist()]
+        for j in np.flatnonzero(~ok).tolist():
+            values[j] = None
+    return json.dumps(values, separators=(",", ":"))[1:-1]
+
+
+def export_session_json(csv_path, json_path, meta, progress=None, cancelled=None,
+                        indent=None, chunk_rows=20000):
+    """
+    Tulis JSON sesi dalam layout kolom dari file CSV final:
+        {meta..., "columns": [...], "data": {"timestamp": [...], "co_m": [...], ...}}
+
+    progress(percent, message) dipanggil berkala; jika cancelled() True,
+    export dihentikan, file JSON parsial dihapus dan ExportCancelled dilempar.
+    Tanpa indent secara default (compact).
+    """
+    def report(pct, msg):
+        if progress is not None:
+            progress(int(pct), msg)
+
+    def check():
+        if cancelled is not None and cancelled():
+            raise ExportCancelled()
+
+    total_bytes = max(1, os.path.getsize(csv_path))
+    read_bytes = 0
+
+    def counted(lines):
+        nonlocal read_bytes
+        for line in lines:
+            read_bytes += len(line)
+            yield line
+
+    chunks = []
+    with open(csv_path, newline="") as src:
+        reader = csv.reader(counted(src))
+        header = next(reader, None) or []
+        while True:
+            check()
+            rows = list(itertools.islice(reader, chunk_rows))
+            if not rows:
+                break
+            cells = np.array(rows)
+            cells[cells == ""] = "nan"
+            chunks.append(cells.astype(np.float64).reshape(len(rows), len(header)))
+            report(60 * read_bytes / total_bytes, f"📖 Reading {os.path.basename(csv_path)}...")
+    table = np.concatenate(chunks) if chunks else np.empty((0, len(header)))
+
+    # Ditulis bertahap per chunk kolom (progress + cancel), bukan satu json.dump
+    # besar: tidak ada salinan list Python dari seluruh sesi di memori.
+    sep = (",", ":") if indent is None else (",", ": ")
+    pad = "" if indent is None else "\n" + " " * indent
+    doc = dict(meta)
+    doc["columns"] = header
+    n = len(table)
+    total_cells = max(1, n * len(header))
+    done = 0
+    try:
+        with open(json_path, "w") as dst:
+            dst.write("{")
+            for key, value in doc.items():
+                dst.write(f"{pad}{json.dumps(key)}{sep[1]}{json.dumps(value, separators=sep)}{sep[0]}")
+            dst.write(f"{pad}{json.dumps('data')}{sep[1]}{{")
+            for i, name in enumerate(header):
+                dst.write(f"{sep[0] if i else ''}{pad}{json.dumps(name)}{sep[1]}[")
+                for a in range(0, n, chunk_rows):
+                    check()
+                    if a:
+                        dst.write(",")
+                    dst.write(_json_values(table[a:a + chunk_rows, i], name in INT_FIELDS))
+                    done += min(chunk_rows, n - a)
+                    report(60 + 35 * done / total_cells, f"💾 Writing {name}...")
+                dst.write("]")
+            dst.write(f"}}{pad[:1]}}}")
+    except ExportCancelled:
+        os.remove(json_path)
+        raise
+    report(100, "✅ Export done")
+    return len(table)
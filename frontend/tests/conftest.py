@@ -0,0 +1,32 @@
+"""
+Fixture bersama untuk test modul frontend (modul flat, diimpor dari frontend/)
+- Data uji = sesi rekaman asli dari data_CSV_dan_JSON (ts + 7 kanal, tanpa state)
+"""
+
+import csv
+import os
+import sys
+
+import numpy as np
+import pytest
+
+FRONTEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRONTEND)
+
+DATA_DIR = os.path.join(os.path.dirname(FRONTEND), "data_CSV_dan_JSON")
+RECORDING = "bawang bombai 1_2.csv"    # kadens ~250 ms, beberapa jeda reconnect > 10 s
+CHANNELS = ("no2", "c2h50h_gm", "voc_gm", "co_gm", "co_m", "eth_m", "voc_m")  # urutan SENSOR:
+
+
+def load_recording(name=RECORDING):
+    """CSV rekaman -> dict kolom float64 (kolom ts dinamai timestamp)"""
+    with open(os.path.join(DATA_DIR, name), newline="") as f:
+        reader = csv.reader(f)
+        header = ["timestamp" if h == "ts" else h for h in next(reader)]
+        table = np.array([row for row in reader if row], dtype=np.float64)
+    return {name: table[:, i].copy() for i, name in enumerate(header)}
+
+
+@pytest.fixture
+def recording():
+    return load_recording()
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+
+from acquisition import AcquisitionEngine, ReplaySource
+from conftest import CHANNELS, DATA_DIR, RECORDING
+from replay import load_session_csv
+
+
+def _engine(tmp_path, **kwargs):
+    source = ReplaySource(os.path.join(DATA_DIR, RECORDING), **kwargs)
+    engine = AcquisitionEngine(source, str(tmp_path))
+    engine.recorder.start()
+    return engine
+
+
+def test_headless_replay_records_original_spacing(tmp_path):
+    engine = _engine(tmp_path, speed=0)
+    engine.start()
+    assert engine.wait(30) and not engine.is_running()
+    engine.stop()
+    path, rows = engine.save("replay", stamp="test")
+    original = load_session_csv(os.path.join(DATA_DIR, RECORDING))
+    saved = load_session_csv(path)
+    assert rows == engine.sample_count == len(original["timestamp"])
+    np.testing.assert_array_equal(np.diff(saved["timestamp"]), np.diff(original["timestamp"]))
+    for ch in CHANNELS:
+        np.testing.assert_array_equal(saved[ch], original[ch])
+    engine.close()
+
+
+def test_request_stop_ends_looping_replay(tmp_path):
+    engine = _engine(tmp_path, speed=50, loop=True)
+    assert not engine.is_running()
+    engine.start()
+    assert not engine.wait(0.3) and engine.is_running()
+    engine.request_stop()
+    assert engine.wait(5) and not engine.is_running()
+    engine.stop()
+    assert engine.sample_count > 0
+    engine.close()
+
+
+def test_dropped_display_blocks_keep_session_accumulators(tmp_path):
+    engine = AcquisitionEngine(ReplaySource(os.path.join(DATA_DIR, RECORDING), speed=0, batch_max=8),
+                               str(tmp_path), lod=True, resample_ms=250, filters="median:5,ema:0.3")
+    engine.recorder.start()
+    shown = []
+    engine.add_listener(shown.append)
+    for i, block in enumerate(engine.blocks()):
+        valid = engine.record(block)
+        if valid is not None and i % 4 == 0:   # antrean tampilan drop_oldest: 3 dari 4 blok dibuang
+            engine.update_views(valid)
+    original = load_session_csv(os.path.join(DATA_DIR, RECORDING))
+    n = len(original["timestamp"])
+    grid = engine.lod.n
+    assert engine.sample_count == engine.recorder.rows == n
+    assert engine.running_stats.get("Session").n == grid == engine.filtered_lod.n
+    assert grid >= (original["timestamp"][-1] - original["timestamp"][0]) // 250 - 1
+    assert 0 < sum(len(b) for b in shown) < n
+    engine.close()
@@ -0,0 +1,49 @@
+import os
+import shutil
+
+import numpy as np
+
+from classifier import TRAIN_LABELS, load_or_train, load_training_set, training_files
+from conftest import DATA_DIR
+
+
+def _copy(tmp_path, names):
+    """Salin rekaman terkurasi ke tmp_path dengan nama file seperti yang ditulis GUI"""
+    sources = ("bawang merah 2_2.csv", "daun bawang 4_2.csv")
+    for i, name in enumerate(names):
+        shutil.copy(os.path.join(DATA_DIR, sources[i % 2]), tmp_path / name)
+    return str(tmp_path)
+
+
+def test_curated_dataset_has_four_labels():
+    files = training_files([DATA_DIR])
+    assert len(files) == 16
+    labels = [label for _, label in files]
+    assert sorted(set(labels)) == sorted(TRAIN_LABELS)
+    assert all(labels.count(label) == 4 for label in TRAIN_LABELS)
+
+
+def test_journals_and_free_text_names_skipped(tmp_path):
+    data = _copy(tmp_path, ["bawang merah 2_20251125_152528.csv",
+                            "Daun Bawang 4_20251125_170617.csv",
+                            "recovered_20251125_171000.csv",
+                            "Unknown_20251125_172000.csv",
+                            "tes sensor baru_20251126_090000.csv",
+                            ".journal_20251126_091500.csv"])
+    files = training_files([data])
+    assert [(os.path.basename(p), label) for p, label in files] == [
+        ("Daun Bawang 4_20251125_170617.csv", "daun bawang"),
+        ("bawang merah 2_20251125_152528.csv", "bawang merah")]
+    assert len(training_files([data], labels=None)) == 3          # label bebas ikut jika diminta
+    assert training_files([data], labels=("bawang merah",))[0][1] == "bawang merah"
+
+
+def test_load_or_train_uses_only_selected_files(tmp_path):
+    data = _copy(tmp_path, ["bawang merah 2_2.csv", "daun bawang 4_2.csv", "recovered_1.csv"])
+    X, y, groups, files = load_training_set([data])
+    assert len(files) == 2 and set(y) == {"bawang merah", "daun bawang"}
+    assert len(np.unique(groups)) == 2 and len(X) == len(y)
+    model_path = str(tmp_path / "model.npz")
+    clf = load_or_train([data], model_path)
+    assert os.path.exists(model_path)
+    assert set(clf.predict(X[::50])) <= {"bawang merah", "daun bawang"}
@@ -0,0 +1,60 @@
+import socket
+import time
+
+import pytest
+
+from command_channel import CommandChannel
+from conftest import CHANNELS
+from sensor_protocol import FSM_STATES, parse_sensor_lines
+
+
+@pytest.fixture
+def channel():
+    """CommandChannel ke listener lokal (pengganti backend :8082)"""
+    server = socket.create_server(("127.0.0.1", 0))
+    channel = CommandChannel("127.0.0.1", server.getsockname()[1], ack_timeout=2.0)
+    yield channel
+    channel.stop()
+    server.close()
+
+
+def _block(recording, states, start):
+    """Sampel rekaman asli dengan state FSM tertentu, diterima mulai `start` (ms)"""
+    lines = [("SENSOR:" + ",".join(f"{recording[ch][i]:.3f}" for ch in CHANNELS)
+              + f",{FSM_STATES.index(s)},0").encode() for i, s in enumerate(states)]
+    return parse_sensor_lines(lines, [start + 250.0 * i for i in range(len(lines))])
+
+
+def test_start_acked_by_first_sampling_state(channel, recording):
+    channel.observe(_block(recording, ["IDLE"], time.time() * 1000.0 - 250.0))
+    result = channel.send("START_SAMPLING")
+    assert result.wait_sent(2.0) and not result.noop
+    # sampel PRE_COND tidak sampai (reconnect): RAMP_UP tetap mengonfirmasi START
+    channel.observe(_block(recording, ["IDLE", "RAMP_UP", "RAMP_UP"], result.sent_at + 10.0))
+    assert result.wait(0) and result.acked_at == pytest.approx(result.sent_at + 260.0, abs=1.0)
+    assert channel.acked == 1 and not channel.pending
+
+
+def test_start_while_sampling_completes_immediately(channel, recording):
+    channel.observe(_block(recording, ["HOLD"], time.time() * 1000.0))
+    result = channel.send("START_SAMPLING")
+    assert result.wait(1.0) and result.noop and result.error is None
+    assert not channel.pending
+
+
+def test_start_from_done_waits_for_new_cycle(channel, recording):
+    channel.observe(_block(recording, ["DONE"], time.time() * 1000.0))
+    result = channel.send("START_SAMPLING")
+    assert result.wait_sent(2.0) and not result.noop
+    channel.observe(_block(recording, ["DONE", "PRE_COND"], result.sent_at + 1.0))
+    assert result.wait(0) and channel.acked == 1
+
+
+def test_stop_times_out_without_idle(channel, recording):
+    channel.observe(_block(recording, ["HOLD"], time.time() * 1000.0))
+    channel.ack_timeout = 0.2
+    result = channel.send("STOP_SAMPLING")
+    assert result.wait_sent(2.0)
+    channel.observe(_block(recording, ["HOLD", "PURGE"], result.sent_at))
+    assert not result.wait(2.0) and "no FSM ack" in result.error
+    assert channel.failed == 1
@@ -0,0 +1,74 @@
+import csv
+import os
+
+import numpy as np
+
+from conftest import DATA_DIR, RECORDING
+from features import (FEATURE_NAMES, HOLD, PRE_COND, RAMP_UP, FeatureExtractor, export_features,
+                      extract_session, feature_columns)
+from ringbuffer import SENSOR_CHANNELS
+from sensor_protocol import FSM_STATES
+
+# (state, jumlah sampel) satu siklus firmware pada kadens 250 ms
+CYCLE = (("PRE_COND", 60), ("RAMP_UP", 20), ("HOLD", 80), ("PURGE", 50), ("RECOVERY", 40))
+
+
+def test_legacy_recording_is_one_cycle(recording):
+    (cycle,) = extract_session(recording)
+    n = len(recording["timestamp"])
+    x = np.column_stack([recording[ch] for ch in SENSOR_CHANNELS])
+    values = dict(zip(FEATURE_NAMES, cycle.values))
+    baseline = x[:n // 10].mean(axis=0)
+    np.testing.assert_allclose(values["baseline"], baseline)
+    np.testing.assert_allclose(values["peak"], x[n // 10:].max(axis=0) - baseline)
+    assert cycle.samples == n - n // 10 and cycle.level == 0
+    assert cycle.vector.shape == (len(feature_columns()),)
+
+
+def test_legacy_file_too_short(tmp_path):
+    for rows in (0, 1):
+        path = tmp_path / f"bawang merah 2_{rows}.csv"
+        with open(os.path.join(DATA_DIR, RECORDING)) as src:
+            path.write_text("".join(src.readline() for _ in range(rows + 1)))
+        columns = {"timestamp": np.arange(rows, dtype=np.float64)}
+        assert extract_session(columns) == []
+        out = tmp_path / "features.csv"
+        assert export_features([str(path)], str(out)) == 0
+        assert out.read_text().startswith("file,label,")
+
+
+def test_fsm_cycles_on_recorded_signal(recording):
+    state, level = [], []
+    for lv in (0, 1):
+        for name, count in CYCLE:
+            state += [FSM_STATES.index(name)] * count
+            level += [lv] * count
+    n = len(state)
+    columns = {k: v[:n] for k, v in recording.items()}
+    columns["state"], columns["level"] = np.array(state, float), np.array(level, float)
+    seen = []
+    extractor = FeatureExtractor(on_cycle=seen.append)
+    for a in range(0, n, 3):                     # ~3 sampel per batch receiver
+        extractor.update({k: v[a:a + 3] for k, v in columns.items()})
+    extractor.flush()
+    assert [c.level for c in seen] == [0, 1] and seen == extractor.cycles
+    (first, _) = seen
+    x = np.column_stack([columns[ch][:250] for ch in SENSOR_CHANNELS])
+    st = columns["state"][:250]
+    values = dict(zip(FEATURE_NAMES, first.values))
+    baseline = x[st == PRE_COND].mean(axis=0)
+    active = (st == RAMP_UP) | (st == HOLD)
+    np.testing.assert_allclose(values["baseline"], baseline)
+    np.testing.assert_allclose(values["peak"], x[active].max(axis=0) - baseline)
+    t = columns["timestamp"][:250]
+    ta, ya = t[active] / 1000.0, x[active] - baseline
+    auc = (0.5 * (ya[1:] + ya[:-1]) * np.diff(ta)[:, None]).sum(axis=0)
+    np.testing.assert_allclose(values["auc"], auc)
+
+
+def test_export_labels_curated_recording(tmp_path):
+    out = tmp_path / "features.csv"
+    assert export_features([os.path.join(DATA_DIR, RECORDING)], str(out)) == 1
+    with open(out, newline="") as f:
+        (row,) = list(csv.DictReader(f))
+    assert (row["file"], row["label"], row["replicate"], row["level"]) == (RECORDING, "bawang bombai", "1_2", "1")
@@ -0,0 +1,81 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIR, RECORDING
+from features import export_features, extract_session, feature_columns
+from filters import DEFAULT_FILTERS, PRE_COND, FilterChain, filter_session, parse_filters
+from replay import load_session_csv
+from ringbuffer import SENSOR_CHANNELS
+
+SPECS = (DEFAULT_FILTERS, "median:7,ema:0.05", "ema:0.9,baseline:RECOVERY", "median:1", "none")
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_live_blocks_equal_offline(recording, spec):
+    # GUI memfilter per batch receiver, export memfilter seluruh file: hasil harus identik
+    columns = {k: v.copy() for k, v in recording.items()}
+    columns["state"] = np.where(np.arange(len(columns["timestamp"])) < 120, PRE_COND, 3.0)
+    columns["co_m"][[0, 1, 200, 201, 202]] = np.nan      # record rusak di awal / tengah
+    columns["no2"][333] = np.inf
+    offline = filter_session(columns, spec)
+    chain = FilterChain(spec)
+    n = len(columns["timestamp"])
+    cuts = [0, 1, 2, 5] + list(range(8, n, 3)) + [n]
+    parts = [chain.process({k: v[a:b] for k, v in columns.items()}) for a, b in zip(cuts, cuts[1:])]
+    for ch in SENSOR_CHANNELS:
+        np.testing.assert_array_equal(np.concatenate([p[ch] for p in parts]), offline[ch])
+        assert np.isfinite(offline[ch]).all()
+    assert chain.samples == n
+
+
+def test_smoothed_tap_is_output_before_baseline(recording):
+    recording["state"] = np.where(np.arange(len(recording["timestamp"])) < 60, PRE_COND, 3.0)
+    chain = FilterChain(DEFAULT_FILTERS)
+    filtered, smoothed = chain.process(recording, smoothed=True)
+    smooth_only = filter_session(recording, "median:5,ema:0.3")
+    for ch in SENSOR_CHANNELS:
+        np.testing.assert_array_equal(smoothed[ch], smooth_only[ch])
+        assert not np.array_equal(filtered[ch], smoothed[ch])
+    out, smooth = FilterChain("median:5").process(recording, smoothed=True)
+    assert out is smooth   # tanpa stage baseline kedua keluaran sama
+
+
+def test_ema_matches_recurrence(recording):
+    y = FilterChain("ema:0.1").process(recording)
+    for ch in ("co_m", "no2"):
+        x = recording[ch]
+        ref = np.empty_like(x)
+        ref[0] = x[0]
+        for i in range(1, len(x)):
+            ref[i] = ref[i - 1] + 0.1 * (x[i] - ref[i - 1])
+        np.testing.assert_allclose(y[ch], ref, rtol=1e-9, atol=1e-12)
+
+
+def test_baseline_zeroes_pre_cond_mean(recording):
+    columns = dict(recording)
+    columns["state"] = np.where(np.arange(len(recording["timestamp"])) < 60, PRE_COND, 3.0)
+    out = filter_session(columns, "baseline")
+    for ch in SENSOR_CHANNELS:
+        assert out[ch][59] == pytest.approx(recording[ch][59] - recording[ch][:60].mean())
+
+
+def test_export_features_uses_smoothed_series(tmp_path):
+    path = os.path.join(DATA_DIR, RECORDING)
+    out = tmp_path / "features.csv"
+    assert export_features([path], str(out), filters=DEFAULT_FILTERS) == 1
+    with open(out, newline="") as f:
+        (row,) = list(csv.DictReader(f))
+    (cycle,) = extract_session(filter_session(load_session_csv(path), "median:5,ema:0.3"))
+    got = np.array([float(row[name]) for name in feature_columns()])
+    np.testing.assert_allclose(got, cycle.vector, rtol=1e-5, atol=1e-9, equal_nan=True)
+
+
+def test_parse_filters_rejects_unknown():
+    assert [s.spec for s in parse_filters("median:3, ema:0.5 ,baseline")] == ["median:3", "ema:0.5", "baseline"]
+    with pytest.raises(ValueError):
+        parse_filters("lowpass:3")
+    with pytest.raises(ValueError):
+        parse_filters("ema:0")
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from handoff import COALESCE_LATEST, DROP_OLDEST, NEVER_DROP, HandoffQueue
+
+
+def _counters_consistent(q):
+    s = q.stats()
+    assert s["put"] == s["taken"] + s["dropped"] + s["depth"]
+    return s
+
+
+def test_drop_oldest_keeps_newest_and_counts_drops():
+    q = HandoffQueue(capacity=8, policy=DROP_OLDEST)
+    wakes = [q.put(i) for i in range(20)]
+    assert wakes == [True] + [False] * 19     # satu wake-up sampai consumer drain
+    s = _counters_consistent(q)
+    assert (s["put"], s["dropped"], s["depth"], s["high_water"]) == (20, 12, 8, 8)
+    assert q.drain(max_items=3) == [12, 13, 14]
+    assert q.put(20) is True                  # drain mempersenjatai ulang
+    assert q.drain() == [15, 16, 17, 18, 19, 20]
+    s = _counters_consistent(q)
+    assert (s["taken"], s["dropped"], s["waits"]) == (9, 12, 0)
+
+
+def test_coalesce_latest_keeps_only_last():
+    q = HandoffQueue(capacity=64, policy=COALESCE_LATEST)
+    assert q.capacity == 1
+    for i in range(5):
+        q.put(i)
+    assert q.drain() == [4]
+    assert _counters_consistent(q)["dropped"] == 4
+
+
+def test_never_drop_is_lossless_with_stalled_consumer():
+    q = HandoffQueue(capacity=4, policy=NEVER_DROP)
+    items = 300
+    wake, received = threading.Event(), []
+
+    def produce():
+        for i in range(items):
+            if q.put(i):
+                wake.set()
+        wake.set()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    time.sleep(0.1)                          # consumer macet: producer harus menunggu
+    while producer.is_alive() or q.depth:
+        wake.wait(0.05)
+        wake.clear()
+        received += q.drain()
+    producer.join()
+    s = _counters_consistent(q)
+    assert received == list(range(items))
+    assert s["dropped"] == 0 and s["high_water"] == 4 and s["waits"] >= 1 and s["wait_s"] > 0
+
+
+def test_never_drop_put_gives_up_on_stop():
+    q = HandoffQueue(capacity=2, policy=NEVER_DROP)
+    stop = threading.Event()
+    q.put(0), q.put(1)
+    stop.set()
+    assert q.put(2, stop) is False
+    assert q.drain() == [0, 1]
+    assert q.put_count == 2
+
+
+def test_put_async_waits_without_blocking_loop():
+    q = HandoffQueue(capacity=2, policy=NEVER_DROP)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        async def consumer():
+            await asyncio.sleep(0.05)
+            return q.drain()
+
+        task = asyncio.create_task(ticker())
+        drained = asyncio.create_task(consumer())
+        for i in range(3):
+            await q.put_async(i)
+        task.cancel()
+        return ticks, await drained
+
+    ticks, drained = asyncio.run(scenario())
+    assert drained == [0, 1] and q.drain() == [2]
+    assert ticks > 5 and q.waits == 1
+    _counters_consistent(q)
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        HandoffQueue(policy="drop_newest")
@@ -0,0 +1,47 @@
+import numpy as np
+
+from conftest import CHANNELS
+from lod import MinMaxPyramid
+
+
+def _bin_minmax(x, size):
+    pad = -len(x) % size
+    lo = np.r_[x, np.full(pad, np.inf)].reshape(-1, size).min(axis=1)
+    hi = np.r_[x, np.full(pad, -np.inf)].reshape(-1, size).max(axis=1)
+    return lo, hi
+
+
+def _fed_per_batch(recording, capacity=64):
+    """Isi piramida seperti receiver: satu extend per batch 50 ms (1-2 sampel) + satu burst"""
+    lod = MinMaxPyramid(capacity=capacity)
+    n = len(recording["timestamp"])
+    cuts = list(range(0, 1200, 2)) + list(range(1200, n, 1))
+    for a, b in zip(cuts, cuts[1:] + [n]):
+        lod.extend({k: v[a:b] for k, v in recording.items()})
+    return lod
+
+
+def test_render_keeps_recorded_peaks_within_budget(recording):
+    lod = _fed_per_batch(recording)
+    n = len(recording["timestamp"])
+    assert lod.n == n
+    for ch in CHANNELS:
+        x = recording[ch]
+        xs, ys = lod.render(ch, max_points=200)
+        assert len(ys) <= 200 + 2 * lod.factor
+        assert ys.max() == x.max() and ys.min() == x.min()
+        lo, hi = _bin_minmax(x, lod.factor ** lod.level_for(n, 200))
+        np.testing.assert_array_equal(ys[0::2], lo)
+        np.testing.assert_array_equal(ys[1::2], hi)
+
+
+def test_render_subrange_and_level_zero(recording):
+    lod = _fed_per_batch(recording)
+    x = recording["eth_m"]
+    xs, ys = lod.render("eth_m", 500, 700, max_points=4000)
+    np.testing.assert_array_equal(xs, np.arange(500, 700))
+    np.testing.assert_array_equal(ys, x[500:700])
+    xs, ys = lod.render("eth_m", 1000, 2000, max_points=100)
+    # bin di tepi rentang boleh memuat sampel tetangga, puncak di dalam rentang tidak hilang
+    assert ys.max() >= x[1000:2000].max() and ys.min() <= x[1000:2000].min()
+    assert xs[0] <= 1000 < 2000 <= xs[-1] + lod.factor ** lod.level_for(1000, 100)
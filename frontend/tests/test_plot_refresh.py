@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+
+from lod import MinMaxPyramid
+from plot_refresh import PlotRefresher
+from ringbuffer import SensorRingBuffer
+
+
+class FakeCurve:
+    """Pengganti PlotDataItem: simpan argumen setData terakhir"""
+
+    def __init__(self):
+        self.x = self.y = None
+        self.calls = 0
+
+    def setData(self, x, y, **kwargs):
+        self.x, self.y = x, y
+        self.calls += 1
+
+    def getViewBox(self):
+        return None
+
+
+def _refresher(recording, maxlen=200):
+    buffers = SensorRingBuffer(maxlen=maxlen)
+    lod = MinMaxPyramid()
+    buffers.extend(recording)
+    lod.extend(recording)
+    refresher = PlotRefresher(buffers, lod, lod_max_points=400)
+    curves = {ch: FakeCurve() for ch in ("co_m", "no2", "voc_gm")}
+    refresher.add_group(curves)
+    return refresher, curves
+
+
+def test_live_x_shared_by_curves_and_frames(recording):
+    refresher, curves = _refresher(recording)
+    assert refresher.refresh(0) == 3
+    x = curves["co_m"].x
+    assert all(c.x is x for c in curves.values())
+    np.testing.assert_allclose(x, (recording["timestamp"][-200:] - recording["timestamp"][0]) / 1000.0)
+    assert refresher.refresh(0) == 0          # buffer tidak berubah: semua kurva dilewati
+    refresher._drawn.clear()                  # kurva digambar ulang pada versi yang sama
+    refresher.refresh(0)
+    assert curves["no2"].x is x
+    refresher.buffers.append({k: v[-1] + 250.0 * (k == "timestamp") for k, v in recording.items()})
+    refresher.refresh(0)
+    assert curves["co_m"].x is not x and curves["co_m"].x[-1] == x[-1] + 0.25
+
+
+def test_session_x_cached_per_render_range(recording):
+    refresher, curves = _refresher(recording)
+    refresher.set_window(math.inf)
+    assert refresher.refresh(0) == 3
+    x = curves["co_m"].x
+    assert all(c.x is x for c in curves.values()) and len(x) <= 400 + 2 * refresher.lod.factor
+    assert refresher.refresh(0) == 0          # LOD tidak berubah: semua kurva dilewati
+    refresher._drawn.clear()
+    refresher.refresh(0)
+    assert curves["voc_gm"].x is x
+    refresher.set_window(300.0)
+    refresher.refresh(0)
+    assert curves["co_m"].x is not x and curves["co_m"].x[-1] <= x[-1]
+
+
+def test_index_range_with_non_monotonic_timestamps():
+    lod = MinMaxPyramid(channels=("co_m",))
+    lod.extend({"co_m": np.arange(6.0), "timestamp": [0, 250, 200, np.nan, 750, 1000]})
+    np.testing.assert_array_equal(lod.timestamps, [0, 250, 250, 250, 750, 1000])
+    assert lod.index_range(250, 750) == (1, 5)
+    assert lod.index_range(None, 100) == (0, 1)
+    assert lod.index_range(2000, None) == (6, 6)
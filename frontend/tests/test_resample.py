@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from conftest import CHANNELS
+from resample import resample
+from sensor_protocol import SAMPLE_PERIOD_MS, ReceiveClock
+
+T0 = 1_765_184_250_000.0
+
+
+def test_receive_clock_spreads_one_read():
+    clock = ReceiveClock()
+    np.testing.assert_array_equal(clock.stamps(3, now=T0), [T0 - 500, T0 - 250, T0])
+    # read berikutnya 10 ms kemudian: tidak boleh mundur ke sebelum read terakhir
+    np.testing.assert_array_equal(clock.stamps(2, now=T0 + 10), [T0 + 5, T0 + 10])
+    # setelah jeda panjang burst dibentang paling lama k x 250 ms
+    np.testing.assert_array_equal(clock.stamps(2, now=T0 + 60_000), [T0 + 59_750, T0 + 60_000])
+    assert len(clock.stamps(0, now=T0 + 70_000)) == 0 and clock.last == T0 + 60_000
+    clock.reset()
+    assert clock.stamps(1, now=T0)[0] == T0
+
+
+def _bursts(recording, per_read=4):
+    """Sampel asli tiba per `per_read` baris dalam satu recv, satu recv tiap per_read x 250 ms"""
+    n = len(recording["timestamp"]) // per_read * per_read
+    reads = T0 + np.arange(n // per_read) * per_read * SAMPLE_PERIOD_MS
+    return n, reads
+
+
+def test_burst_lines_are_not_averaged(recording):
+    n, reads = _bursts(recording)
+    clock = ReceiveClock()
+    stamps = np.concatenate([clock.stamps(4, now=t) for t in reads])
+    columns = {ch: recording[ch][:n] for ch in CHANNELS}
+    out, stats = resample({"timestamp": stamps, **columns})
+    assert stats["duplicates"] == 0 and stats["output"] == n
+    for ch in CHANNELS:
+        np.testing.assert_array_equal(out[ch], columns[ch])
+    # stamp per recv (perilaku lama): 4 sampel dirata-rata menjadi satu
+    old, old_stats = resample({"timestamp": np.repeat(reads, 4), **columns})
+    assert old_stats["duplicates"] == n - n // 4
+    np.testing.assert_allclose(old["co_m"][::4], columns["co_m"].reshape(-1, 4).mean(axis=1))
+
+
+def test_recorded_cadence_and_reconnect_gaps(recording):
+    out, stats = resample(recording, period_ms=SAMPLE_PERIOD_MS)
+    ts = out["timestamp"]
+    assert np.all(ts % SAMPLE_PERIOD_MS == 0) and np.all(np.diff(ts) == SAMPLE_PERIOD_MS)
+    span = recording["timestamp"][-1] - recording["timestamp"][0]
+    assert stats["output"] == len(ts) == pytest.approx(span / SAMPLE_PERIOD_MS, abs=2)
+    # backend mencatat beberapa jeda > 10 s: grid di dalamnya ditandai gap
+    holes = np.diff(recording["timestamp"]) > 4 * SAMPLE_PERIOD_MS
+    assert stats["gaps"] >= holes.sum() > 0
+    i = np.argmax(np.diff(recording["timestamp"]))
+    inside = (ts > recording["timestamp"][i]) & (ts < recording["timestamp"][i + 1])
+    assert inside.sum() > 40 and out["gap"][inside].all()
+
+
+def test_invalid_and_out_of_order_rows_dropped():
+    columns = {"timestamp": np.array([0.0, 250, 500, 400, 750, 1000]),
+               **{ch: np.array([0.0, 1, 2, 99, np.nan, 4]) for ch in CHANNELS}}
+    out, stats = resample(columns, sort=False)
+    assert stats["out_of_order"] == 1 and stats["invalid"] == 1
+    np.testing.assert_array_equal(out["timestamp"], [0, 250, 500, 750, 1000])
+    np.testing.assert_allclose(out["co_m"], [0, 1, 2, 3, 4])
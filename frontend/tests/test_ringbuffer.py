@@ -0,0 +1,49 @@
+import numpy as np
+
+from conftest import CHANNELS
+from ringbuffer import BUFFER_FIELDS, SensorRingBuffer
+
+
+def test_wraparound_keeps_newest_samples_in_order(recording):
+    n = len(recording["timestamp"])
+    buf = SensorRingBuffer(maxlen=200)
+    # satu extend per batch receiver (~50 ms), plus batch besar setelah reconnect
+    for a, b in ((0, 1), (1, 3), (3, 500), (500, 501), (501, n)):
+        buf.extend({k: v[a:b] for k, v in recording.items()})
+    assert len(buf) == 200 and buf.total == n
+    for name in ("timestamp",) + CHANNELS:
+        np.testing.assert_array_equal(buf.view(name), recording[name][-200:])
+    assert np.all(np.diff(buf.view("timestamp")) >= 0)
+    np.testing.assert_array_equal(buf.view("state"), 0.0)   # kolom yang tidak ada -> 0
+    assert buf.latest("co_m") == recording["co_m"][-1]
+
+
+def test_append_matches_extend(recording):
+    rows = {k: v[:300] for k, v in recording.items()}
+    a, b = SensorRingBuffer(maxlen=128), SensorRingBuffer(maxlen=128)
+    a.extend(rows)
+    for i in range(300):
+        b.append({k: v[i] for k, v in rows.items()})
+    for name in BUFFER_FIELDS:
+        np.testing.assert_array_equal(a.view(name), b.view(name))
+    assert a.total == b.total == 300
+
+
+def test_view_is_zero_copy(recording):
+    buf = SensorRingBuffer(maxlen=50)
+    buf.extend(recording)
+    view = buf.view("voc_m")
+    assert np.shares_memory(view, buf._data)
+    buf.append({"voc_m": 123.0})
+    assert buf.view("voc_m")[-1] == 123.0 and view[-1] == recording["voc_m"][-1]
+
+
+def test_set_maxlen_keeps_newest(recording):
+    buf = SensorRingBuffer(maxlen=100)
+    buf.extend(recording)
+    buf.set_maxlen(10)
+    np.testing.assert_array_equal(buf.view("no2"), recording["no2"][-10:])
+    buf.set_maxlen(40)
+    buf.append({"no2": -1.0})
+    np.testing.assert_array_equal(buf.view("no2"), np.r_[recording["no2"][-10:], -1.0])
+    assert buf.total == len(recording["no2"]) + 1
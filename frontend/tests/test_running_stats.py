@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from ringbuffer import SENSOR_CHANNELS
+from running_stats import BUCKET_S, RunningStats, session_stats
+from sensor_protocol import FSM_STATES
+
+
+def _matrix(columns, mask=slice(None)):
+    return np.column_stack([columns[ch][mask] for ch in SENSOR_CHANNELS])
+
+
+def _assert_matches(m, t, x):
+    assert m.n == len(x)
+    np.testing.assert_allclose(m.mean, x.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(m.std, x.std(axis=0, ddof=1), rtol=1e-9)
+    np.testing.assert_array_equal(m.min, x.min(axis=0))
+    np.testing.assert_array_equal(m.max, x.max(axis=0))
+    dt = t - t.mean()   # least squares terpusat (polyfit tidak stabil untuk t epoch ms)
+    slope = dt @ (x - x.mean(axis=0)) / (dt @ dt) * 60000.0
+    np.testing.assert_allclose(m.drift, slope, rtol=1e-6, atol=1e-9)
+
+
+def _live(columns, stats, size=2):
+    """Update per batch receiver (~2 sampel per 50 ms)"""
+    n = len(columns["timestamp"])
+    for a in range(0, n, size):
+        stats.update({k: v[a:a + size] for k, v in columns.items()})
+    return stats
+
+
+def test_session_and_state_scopes_match_numpy(recording):
+    n = len(recording["timestamp"])
+    recording["state"] = np.repeat([1.0, 2.0, 3.0, 4.0, 5.0], -(-n // 5))[:n]
+    stats = _live(recording, RunningStats())
+    t = recording["timestamp"]
+    _assert_matches(stats.get("Session"), t, _matrix(recording))
+    for s in range(1, 6):
+        mask = recording["state"] == s
+        _assert_matches(stats.get(FSM_STATES[s]), t[mask], _matrix(recording, mask))
+
+
+@pytest.mark.parametrize("window_s", (60, 300))
+def test_rolling_window_keeps_recent_buckets(recording, window_s):
+    stats = _live(recording, RunningStats(windows_s=(window_s,)))
+    t = recording["timestamp"]
+    bucket_ms = BUCKET_S * 1000.0
+    ids = np.floor(t / bucket_ms)
+    mask = ids > ids[-1] - np.ceil(window_s * 1000.0 / bucket_ms)
+    _assert_matches(stats.get(RunningStats.window_name(window_s)), t[mask], _matrix(recording, mask))
+
+
+def test_invalid_rows_skipped_out_of_range_kept(recording):
+    recording["voc_m"][[5, 50]] = np.nan
+    recording["co_gm"][100:110] = -1.0     # GM di luar jangkauan: nilai sah dari firmware
+    stats = session_stats(recording)
+    ok = np.isfinite(recording["voc_m"])
+    assert stats.skipped == 2
+    _assert_matches(stats.session, recording["timestamp"][ok], _matrix(recording, ok))
+    assert stats.session.min[SENSOR_CHANNELS.index("co_gm")] == -1.0
@@ -0,0 +1,71 @@
+import numpy as np
+
+from conftest import CHANNELS
+from sensor_protocol import LineFramer, ParseStats, parse_sensor_data, parse_sensor_lines
+
+GM = ("no2", "c2h50h_gm", "voc_gm", "co_gm")
+
+
+def arduino_lines(columns, state=3, level=1):
+    """Baris seperti sendSensorData(): String(x, 3) per kanal, lalu state, level"""
+    n = len(columns["timestamp"])
+    return [("SENSOR:" + ",".join(f"{columns[ch][i]:.3f}" for ch in CHANNELS)
+             + f",{state},{level}").encode() for i in range(n)]
+
+
+def test_recorded_lines_parse_with_out_of_range_gm(recording):
+    # GM di atas 30000 dikirim firmware sebagai -1.0: nilai sah, bukan record rusak
+    columns = {k: v[:400].copy() for k, v in recording.items()}
+    columns["voc_gm"][::7] = -1.0
+    columns["no2"][100:140] = -1.0
+    stats = ParseStats()
+    block = parse_sensor_lines(arduino_lines(columns), columns["timestamp"], stats=stats)
+    assert len(block) == 400 and block.malformed == 0 and block.valid.all()
+    for ch in CHANNELS:
+        np.testing.assert_allclose(block[ch], columns[ch], atol=5e-4)
+    assert (block["voc_gm"][::7] == -1.0).all() and (block["no2"][100:140] == -1.0).all()
+    np.testing.assert_array_equal(block["timestamp"], columns["timestamp"])
+    assert (block["state"] == 3).all() and stats.records == 400
+
+
+def test_malformed_records_are_flagged_not_dropped():
+    stats = ParseStats()
+    lines = [b"SENSOR:0.915,0.961,0.816,0.127,46.236,74.060,19.363,3,1",
+             b"SENSOR:0.915,0.961,0.816",                            # terpotong
+             b"SENSOR:0.915,0.961,ovf,0.127,46.236,74.060,19.363,3,1",
+             b"SENSOR:0.915,0.961,nan,0.127,46.236,74.060,19.363,3,1",
+             b"5 LEVEL SELESAI!",                                     # Serial.println firmware
+             b"",
+             b"SENSOR:-1.000,0.961,0.816,0.127,46.236,74.060,19.363,6,5,extra"]
+    block = parse_sensor_lines(lines, 1764058582648.0, stats=stats)
+    assert len(block) == 5
+    assert block.valid.tolist() == [True, False, False, False, True]
+    assert block.malformed == 3 and np.isnan(block["no2"][1:4]).all()
+    assert block["no2"][4] == -1.0 and block["level"][4] == 5.0
+    assert stats.records == 2 and stats.malformed == 3 and stats.ignored == 1
+    assert len(block.compress()) == 2
+
+
+def test_parse_sensor_data_single_line():
+    data = parse_sensor_data("SENSOR:-1.000,0.961,0.816,0.127,46.236,74.060,19.363,3,2\n")
+    assert data["no2"] == -1.0 and data["state"] == 3 and isinstance(data["level"], int)
+    assert parse_sensor_data("SENSOR:1,2") is None
+    assert parse_sensor_data("5 LEVEL SELESAI!") is None
+
+
+def test_line_framer_reassembles_tcp_segments(recording):
+    lines = arduino_lines({k: v[:300] for k, v in recording.items()})
+    payload = b"".join(line + b"\r\n" for line in lines)
+    framer = LineFramer(capacity=256)
+    out = []
+    for a in range(0, len(payload), 1460):            # segmen MSS
+        out += framer.feed(payload[a:a + 1460])
+    assert out == lines
+    assert framer.stats.lines == len(lines) and framer.stats.overflows == 0
+
+
+def test_line_framer_drops_overlong_line():
+    framer = LineFramer(capacity=16)
+    out = framer.feed(b"x" * 40 + b"\nSENSOR:ok\n")
+    assert out[-1] == b"SENSOR:ok"
+    assert framer.stats.overflows >= 1